@@ -4,8 +4,11 @@
 # IMPORTANT, this script is _BRUTAL_ - use at your own risk
 #
 
+import contextlib
+import json
 import signal
 import sys
+from pathlib import Path
 from typing import Optional
 
 import boto3
@@ -17,9 +20,43 @@ from config import config
 from config.cli_args import parse_args
 from config.config_environment import parse_environment_config
 from config.config_file import parse_config_file
-from registry import init_registry_resources, query_registry, terminate_registry
-from utils.aws import get_enabled_regions
-from view.output_handlers import JSONOutputHandler, RichOutputHandler
+from engine.bootstrap import bootstrap_session
+from engine.history import clear_scan_history, get_skipped_work_units
+from engine.pipeline import iter_pipeline_responses
+from engine.retry import iter_retried_terminate_responses
+from engine.scan import plan_work_units
+from engine.scheduler import iter_scheduled_terminate_responses
+from registry import init_registry_resources, query_registry
+from utils.aws import clear_client_cache, get_account_id, get_enabled_regions
+from utils.cassette import (
+    check_record_dir,
+    install_cassette,
+    save_cassette_metadata,
+    use_replay_credentials,
+)
+from utils.config_inventory import clear_config_inventories
+from utils.metrics import (
+    clear_api_metrics,
+    get_api_metrics,
+    install_api_metrics,
+    summarise_api_metrics,
+)
+from utils.profiling import profile_cpu
+from utils.prometheus import (
+    count_deletion_outcomes,
+    finish_exposition,
+    install_exposition,
+    set_metric_labels,
+    time_phase,
+)
+from utils.tagging import clear_tag_indexes
+from utils.throttle import get_concurrency_limits
+from utils.tracing import finish_tracing, install_tracing, phase, start_run_span
+from view.output_handlers import (
+    JSONOutputHandler,
+    NDJSONOutputHandler,
+    RichOutputHandler,
+)
 
 
 # Define the signal handler
@@ -61,6 +98,20 @@ def confirm_deletion():
         return response == 'yes'
 
 
+def check_pipeline_approval() -> None:
+    """
+    Check that pipeline mode, which skips confirmation, has been pre-approved.
+
+    Raises:
+        UnauthorizedAccountException: If no accounts are whitelisted.
+
+    """
+    if config.PIPELINE and config.COMMAND == 'aws' and not config.WHITELIST_ACCOUNTS:
+        raise UnauthorizedAccountException(
+            'Pipeline Mode Requires Whitelisted Accounts'
+        )
+
+
 def check_account_compliance(session) -> None:
     """
     Check the compliance of the AWS account.
@@ -72,7 +123,7 @@ def check_account_compliance(session) -> None:
         SystemError: If the account is blacklisted or not whitelisted.
 
     """
-    account_id = session.client('sts').get_caller_identity()['Account']
+    account_id = get_account_id(session)
 
     if account_id in config.BLACKLIST_ACCOUNTS:
         raise UnauthorizedAccountException('Cannot Operate On A Blacklisted Account')
@@ -184,81 +235,207 @@ def show_failures(hard_failures, console):
     for region, regional_resources in hard_failures.items():
         for resource_type, resource_arns in regional_resources.items():
             for arn in resource_arns:
-                table.add_row(region, resource_type, arn)
+                table.add_row(region, resource_type, str(arn))
 
     print()
     console.print(table)
 
 
+def show_concurrency_limits(console):
+    throttled = {
+        key: limit for key, limit in get_concurrency_limits().items() if limit.throttles
+    }
+    if not throttled:
+        return
+
+    table = Table(title='Throttled APIs (Adaptive Concurrency)')
+    table.add_column('Service')
+    table.add_column('Region')
+    table.add_column('Throttles')
+    table.add_column('Final Limit')
+
+    for (service, region), limit in sorted(
+        throttled.items(), key=lambda item: (item[0][0], item[0][1] or '')
+    ):
+        table.add_row(
+            service, region or 'default', str(limit.throttles), str(int(limit.limit))
+        )
+
+    print()
+    console.print(table)
+
+
+def show_skipped_work_units(console):
+    skipped = {}
+    for region, resource_type in get_skipped_work_units():
+        skipped.setdefault(region, []).append(resource_type)
+
+    if not skipped:
+        return
+
+    table = Table(
+        title=f'Skipped (Empty On The Last {config.SCAN_HISTORY_SKIP_AFTER} Scans)'
+    )
+    table.add_column('Region')
+    table.add_column('Resource Types')
+
+    for region in sorted(skipped):
+        table.add_row(region, ', '.join(sorted(skipped[region])))
+
+    print()
+    console.print(table)
+
+
+def show_api_metrics(console, top: int = 20):
+    summary = summarise_api_metrics(get_api_metrics())
+
+    # The table goes with rich output, other formats keep stdout to their data
+    if config.OUTPUT_FORMAT != 'rich':
+        print(json.dumps({'api_metrics': summary}), file=sys.stderr)
+        return
+
+    table = Table(title=f'Top {top} API Time Sinks')
+    table.add_column('API Call')
+    table.add_column('Resource Type')
+    table.add_column('Calls', justify='right')
+    table.add_column('Total (s)', justify='right')
+    table.add_column('Mean (ms)', justify='right')
+    table.add_column('p95 (ms)', justify='right')
+    table.add_column('Retries', justify='right')
+    table.add_column('Throttles', justify='right')
+    table.add_column('Errors')
+
+    for call_metrics in summary[:top]:
+        table.add_row(
+            call_metrics['api_call'],
+            call_metrics['resource_type'],
+            str(call_metrics['calls']),
+            f'{call_metrics["seconds"]:.2f}',
+            f'{call_metrics["mean_seconds"] * 1000:.0f}',
+            f'{call_metrics["p95_seconds"] * 1000:.0f}',
+            str(call_metrics['retries']),
+            str(call_metrics['throttles']),
+            ', '.join(
+                f'{error_code} ({count})'
+                for error_code, count in call_metrics['error_codes'].items()
+            ),
+        )
+
+    print()
+    console.print(table)
+
+
+def show_run_summary(console):
+    show_skipped_work_units(console)
+    show_concurrency_limits(console)
+
+
 def get_output_handler(output_format: Optional[str], session, console):
     if output_format == 'json':
         return JSONOutputHandler(session)
+    elif output_format == 'ndjson':
+        return NDJSONOutputHandler(session)
     elif output_format == 'rich':
         return RichOutputHandler(session, console)
     else:
         raise ValueError('Invalid Output Method')
 
 
-def process_resources(session, retrieved_resources):
+def iter_terminate_responses(session, retrieved_resources):
+    if config.ENGINE == 'async':
+        from engine.async_scan import iter_async_terminate_responses
+
+        return iter_async_terminate_responses(session, retrieved_resources)
+
+    return iter_scheduled_terminate_responses(session, retrieved_resources)
+
+
+def reconcile_responses(responses, retrieved_resources):
     hard_failures = {}
-    for region, resource_detail in retrieved_resources.items():
-        for resource_type, resource_arns in resource_detail.items():
-            response = terminate_registry[resource_type](session, region, resource_arns)
-            if not response:
-                continue
-            for arn in response.successful:
-                retrieved_resources[region][resource_type].remove(arn)
-            for error_code, failed_resources in response.failures.items():
-                if error_code == 'AccessDenied':
-                    hard_failures.setdefault(region, {}).setdefault(
-                        resource_type, []
-                    ).extend(failed_resources)
-                    for arn in failed_resources:
-                        retrieved_resources[region][resource_type].remove(arn)
+    for region, resource_type, response in responses:
+        if not response:
+            continue
+
+        count_deletion_outcomes(region, resource_type, response)
+
+        # Deleted and AccessDenied resources are done with, anything else remains
+        resolved = set()
+        for arn, outcome in response.outcomes.items():
+            if outcome.successful:
+                resolved.add(arn)
+            elif outcome.error_code == 'AccessDenied':
+                resolved.add(arn)
+                hard_failures.setdefault(region, {}).setdefault(
+                    resource_type, []
+                ).append(arn)
+
+        retrieved_resources[region][resource_type] = [
+            arn
+            for arn in retrieved_resources[region][resource_type]
+            if arn not in resolved
+        ]
     return hard_failures
 
 
-def main(script_args: Optional[dict] = None) -> None:
-    """
-    The main entry point of the AWS Apocalypse script.
-
-    Args:
-        script_args (Optional[dict]): Optional script arguments.
+def process_resources(session, retrieved_resources):
+    return reconcile_responses(
+        iter_retried_terminate_responses(
+            session,
+            iter_terminate_responses(session, retrieved_resources),
+            iter_terminate_responses,
+        ),
+        retrieved_resources,
+    )
 
-    Returns:
-        None
 
-    """
-    if not script_args:
-        script_args = {}
+def run_pipeline(session, resource_types: list[str], handler):
+    # Results still stream to the output format as they're found
+    work_units = plan_work_units(session, resource_types, config.REGIONS)
+    retrieved_resources = {}
+
+    return reconcile_responses(
+        iter_retried_terminate_responses(
+            session,
+            iter_pipeline_responses(
+                session,
+                work_units,
+                handler.iter_results(work_units),
+                retrieved_resources,
+            ),
+            # Pipeline termination is threaded whatever the engine, retries too
+            iter_scheduled_terminate_responses,
+        ),
+        retrieved_resources,
+    )
 
-    # Setup Rich Console
-    console = Console(log_path=False, log_time=False, highlight=False)
 
-    # Load Resources from the Registry
-    init_registry_resources()
+@contextlib.contextmanager
+def run_phase(name: str):
+    # Phases are traced as spans, and timed for the Prometheus metrics
+    with phase(name), time_phase(name):
+        yield
 
-    # Listing Resource Types
-    if script_args.get('list_resource_types'):
-        console.print('# [yellow] Found AWS Resources\n')
-        for service in sorted(query_registry.keys()):
-            console.print('[grey35]•[/grey35]', f'{service}')
-        return
 
-    if config_file := script_args.get('config'):
-        parse_config_file(config_file)
+def run(session, console) -> None:
+    """
+    Scan the account, then delete what was found if the command is "aws".
 
-    parse_environment_config()
+    Args:
+        session: The Boto3 session object.
+        console: The Rich console.
 
-    # Establish a boto3 session
-    try:
-        session = boto3.session.Session(profile_name=script_args.get('profile'))
-    except botocore.exceptions.ProfileNotFound as e:
-        raise SystemError(f'Profile "{script_args.get("profile")}" Not Found.') from e
+    Returns:
+        None
 
-    # Check that we're allowed to operate in this account.
+    """
+    # Resolve the account and enabled regions, then check that we're allowed
+    # to operate in this account.
     try:
+        check_pipeline_approval()
+        with run_phase('bootstrap'):
+            bootstrap_session(session)
         check_account_compliance(session)
+        set_metric_labels(account_id=get_account_id(session))
     except botocore.exceptions.ClientError as e:
         print('No AWS Access | Please pass an AWS Profile')
         raise SystemExit from e
@@ -266,7 +443,7 @@ def main(script_args: Optional[dict] = None) -> None:
         raise e
 
     # Clear the screen - TODO: Should we make this optional?
-    if config.OUTPUT_FORMAT != 'json':
+    if config.OUTPUT_FORMAT == 'rich':
         console.clear()
 
     enabled_regions = get_enabled_regions(session) + ['global']
@@ -282,17 +459,112 @@ def main(script_args: Optional[dict] = None) -> None:
         return
 
     handler = get_output_handler(config.OUTPUT_FORMAT, session, console)
-    retrieved_resources = handler.retrieve_data(resource_types, config.REGIONS)
+    if config.PIPELINE and config.COMMAND == 'aws':
+        with run_phase('pipeline'):
+            hard_failures = run_pipeline(session, resource_types, handler)
+        if config.OUTPUT_FORMAT == 'rich':
+            show_failures(hard_failures, console)
+            show_run_summary(console)
+        return
+
+    with run_phase('retrieve_data'):
+        retrieved_resources = handler.retrieve_data(resource_types, config.REGIONS)
     if not retrieved_resources or config.COMMAND == 'inspect-aws':
+        if config.OUTPUT_FORMAT == 'rich':
+            show_run_summary(console)
         return
 
     if not confirm_deletion():
         return
 
-    hard_failures = process_resources(session, retrieved_resources)
+    with run_phase('process_resources'):
+        hard_failures = process_resources(session, retrieved_resources)
 
     if config.OUTPUT_FORMAT == 'rich':
         show_failures(hard_failures, console)
+        show_run_summary(console)
+
+
+def main(script_args: Optional[dict] = None) -> None:
+    """
+    The main entry point of the AWS Apocalypse script.
+
+    Args:
+        script_args (Optional[dict]): Optional script arguments.
+
+    Returns:
+        None
+
+    """
+    if not script_args:
+        script_args = {}
+
+    # Setup Rich Console
+    console = Console(log_path=False, log_time=False, highlight=False)
+
+    # Load Resources from the Registry
+    init_registry_resources()
+
+    # Listing Resource Types
+    if script_args.get('list_resource_types'):
+        console.print('# [yellow] Found AWS Resources\n')
+        for service in sorted(query_registry.keys()):
+            console.print('[grey35]•[/grey35]', f'{service}')
+        return
+
+    if config_file := script_args.get('config'):
+        parse_config_file(config_file)
+
+    parse_environment_config()
+
+    # Profile everything from here on, including the session and bootstrap
+    with profile_cpu():
+        # Recordings must include the bootstrap calls, so its cache is bypassed
+        if config.RECORD_DIR and config.REPLAY_DIR:
+            raise SystemError('Only one of --record and --replay can be used.')
+        if config.RECORD_DIR:
+            check_record_dir(Path(config.RECORD_DIR))
+            config.BOOTSTRAP_CACHE_TTL = 0
+        if config.REPLAY_DIR:
+            use_replay_credentials(Path(config.REPLAY_DIR))
+            config.BOOTSTRAP_CACHE_TTL = 0
+
+        # Establish a boto3 session
+        profile_name = None if config.REPLAY_DIR else script_args.get('profile')
+        try:
+            session = boto3.session.Session(profile_name=profile_name)
+        except botocore.exceptions.ProfileNotFound as e:
+            raise SystemError(
+                f'Profile "{script_args.get("profile")}" Not Found.'
+            ) from e
+
+        install_cassette()
+        if config.RECORD_DIR:
+            save_cassette_metadata(Path(config.RECORD_DIR), session)
+
+        # Clients and discovery results are cached per run
+        clear_client_cache()
+        clear_tag_indexes()
+        clear_config_inventories()
+        clear_scan_history()
+        clear_api_metrics()
+
+        install_api_metrics()
+        install_tracing()
+        install_exposition()
+        start_run_span(
+            **{'apocalypse.command': config.COMMAND, 'apocalypse.engine': config.ENGINE}
+        )
+
+        successful = False
+        try:
+            run(session, console)
+            successful = True
+        finally:
+            finish_tracing()
+            finish_exposition(successful)
+            if config.METRICS:
+                show_api_metrics(console)
 
 
 def lambda_handler(
@@ -0,0 +1,295 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Synthetic resource kinds and the resource types that scan and delete them
+RESOURCE_KINDS = {
+    'instances': 'EC2::Instance',
+    'snapshots': 'EC2::Snapshot',
+    'log_groups': 'Logs::LogGroup',
+    'roles': 'IAM::Role',
+    'queues': 'SQS::Queue',
+}
+
+# Kinds that only exist once per account, rather than in every region
+GLOBAL_KINDS = {'roles'}
+
+
+class StubError(Exception):
+    """An API error response, raised by an operation handler."""
+
+    def __init__(self, code: str, message: str = '') -> None:
+        super().__init__(code)
+        self.code = code
+        self.message = message or code
+
+
+@dataclass
+class SyntheticAccount:
+    """
+    The resources of a fake AWS account, served by the stubbed endpoint.
+
+    Every region gets `counts[kind]` resources of each regional kind and the
+    account gets `counts[kind]` of each global kind. The first `exempt_ratio`
+    of each are tagged with the exception tag, so they survive a nuke run
+    with exceptions allowed.
+    """
+
+    account_id: str
+    regions: list[str]
+    counts: dict[str, int]
+    exempt_ratio: float = 0.0
+    exception_tag: str = 'exempt:nuke'
+
+    resources: dict[tuple[str, str], dict[str, dict]] = field(
+        init=False, default_factory=dict
+    )
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._handlers: dict[tuple[str, str], Callable] = {
+            ('ec2', 'DescribeInstances'): self.describe_instances,
+            ('ec2', 'ModifyInstanceAttribute'): self.no_content,
+            ('ec2', 'TerminateInstances'): self.terminate_instances,
+            ('ec2', 'DescribeVolumes'): lambda region, params: {'Volumes': []},
+            ('ec2', 'DescribeSnapshots'): self.describe_snapshots,
+            ('ec2', 'DeleteSnapshot'): self.delete_snapshot,
+            ('logs', 'DescribeLogGroups'): self.describe_log_groups,
+            ('logs', 'ListTagsForResource'): self.list_log_group_tags,
+            ('logs', 'DeleteLogGroup'): self.delete_log_group,
+            ('iam', 'ListRoles'): self.list_roles,
+            ('iam', 'ListRoleTags'): self.list_role_tags,
+            ('iam', 'ListAttachedRolePolicies'): (
+                lambda region, params: {'AttachedPolicies': []}
+            ),
+            ('iam', 'ListRolePolicies'): lambda region, params: {'PolicyNames': []},
+            ('iam', 'ListInstanceProfilesForRole'): (
+                lambda region, params: {'InstanceProfiles': []}
+            ),
+            ('iam', 'DeleteRole'): self.delete_role,
+            ('sqs', 'ListQueues'): self.list_queues,
+            ('sqs', 'ListQueueTags'): self.list_queue_tags,
+            ('sqs', 'DeleteQueue'): self.delete_queue,
+        }
+
+        for kind in RESOURCE_KINDS:
+            for region in ['global'] if kind in GLOBAL_KINDS else self.regions:
+                self.resources[(region, kind)] = {
+                    resource_id: resource
+                    for resource_id, resource in (
+                        self.make_resource(region, kind, index)
+                        for index in range(self.counts.get(kind, 0))
+                    )
+                }
+
+    def get_tags(self, index: int, count: int) -> dict[str, str]:
+        tags = {'Name': f'benchmark-{index}', 'Environment': 'benchmark'}
+        if index < int(count * self.exempt_ratio):
+            tags[self.exception_tag] = 'true'
+        return tags
+
+    def make_resource(self, region: str, kind: str, index: int) -> tuple[str, dict]:
+        tags = self.get_tags(index, self.counts[kind])
+        tag_list = [{'Key': key, 'Value': value} for key, value in tags.items()]
+
+        if kind == 'instances':
+            instance_id = f'i-{index:017x}'
+            return instance_id, {
+                'InstanceId': instance_id,
+                'State': {'Name': 'running'},
+                'Tags': tag_list,
+            }
+
+        if kind == 'snapshots':
+            snapshot_id = f'snap-{index:017x}'
+            return snapshot_id, {'SnapshotId': snapshot_id, 'Tags': tag_list}
+
+        if kind == 'log_groups':
+            group_name = f'/benchmark/log-group-{index:06d}'
+            return group_name, {
+                'logGroupName': group_name,
+                'arn': f'arn:aws:logs:{region}:{self.account_id}:log-group:{group_name}:*',
+                'tags': tags,
+            }
+
+        if kind == 'roles':
+            role_name = f'benchmark-role-{index:06d}'
+            return role_name, {
+                'Path': '/',
+                'RoleName': role_name,
+                'RoleId': f'AROA{index:017d}',
+                'Arn': f'arn:aws:iam::{self.account_id}:role/{role_name}',
+                'Tags': tag_list,
+            }
+
+        queue_name = f'benchmark-queue-{index:06d}'
+        return (
+            f'https://sqs.{region}.amazonaws.com/{self.account_id}/{queue_name}',
+            {'Tags': tags},
+        )
+
+    def handle(self, service_name: str, operation_name: str, region: str, params):
+        """
+        Answer an API call from the account's resources.
+
+        Args:
+            service_name (str): The botocore service name (i.e. 'ec2').
+            operation_name (str): The API operation (i.e. 'DescribeInstances').
+            region (str): The client's region.
+            params (dict): The call's parameters.
+
+        Returns:
+            Optional[dict]: The whole, unpaginated response, or None if the
+                operation isn't supported.
+
+        Raises:
+            StubError: For an API error response.
+
+        """
+        if handler := self._handlers.get((service_name, operation_name)):
+            with self._lock:
+                return handler(region, params)
+        return None
+
+    def get_remaining(self) -> dict[str, int]:
+        # Resources of each resource type the nuke run has left behind
+        remaining: dict[str, int] = {}
+        with self._lock:
+            for (region, kind), resources in self.resources.items():
+                alive = [
+                    resource
+                    for resource in resources.values()
+                    if resource.get('State', {}).get('Name') != 'terminated'
+                ]
+                remaining[RESOURCE_KINDS[kind]] = remaining.get(
+                    RESOURCE_KINDS[kind], 0
+                ) + len(alive)
+        return remaining
+
+    def get_exempt(self) -> dict[str, int]:
+        # Resources of each resource type the nuke run should leave behind
+        return {
+            resource_type: int(self.counts.get(kind, 0) * self.exempt_ratio)
+            * (1 if kind in GLOBAL_KINDS else len(self.regions))
+            for kind, resource_type in RESOURCE_KINDS.items()
+        }
+
+    def no_content(self, region: str, params: dict) -> dict:
+        return {}
+
+    def describe_instances(self, region: str, params: dict) -> dict:
+        filters = {
+            instance_filter['Name']: set(instance_filter['Values'])
+            for instance_filter in params.get('Filters', [])
+        }
+        instance_ids = set(params.get('InstanceIds', [])) | filters.get(
+            'instance-id', set()
+        )
+
+        instances = self.resources[(region, 'instances')]
+        return {
+            'Reservations': [
+                {'Instances': [instance]}
+                for instance_id, instance in instances.items()
+                if (not instance_ids or instance_id in instance_ids)
+                and (
+                    'instance-state-name' not in filters
+                    or instance['State']['Name'] in filters['instance-state-name']
+                )
+            ]
+        }
+
+    def terminate_instances(self, region: str, params: dict) -> dict:
+        instances = self.resources[(region, 'instances')]
+        if missing := set(params['InstanceIds']) - set(instances):
+            raise StubError('InvalidInstanceID.NotFound', ', '.join(sorted(missing)))
+
+        # Terminated instances stay visible, like they do in AWS
+        for instance_id in params['InstanceIds']:
+            instances[instance_id]['State'] = {'Name': 'terminated'}
+
+        return {
+            'TerminatingInstances': [
+                {'InstanceId': instance_id, 'CurrentState': {'Name': 'shutting-down'}}
+                for instance_id in params['InstanceIds']
+            ]
+        }
+
+    def describe_snapshots(self, region: str, params: dict) -> dict:
+        return {'Snapshots': list(self.resources[(region, 'snapshots')].values())}
+
+    def delete_snapshot(self, region: str, params: dict) -> dict:
+        self.delete(
+            region, 'snapshots', params['SnapshotId'], 'InvalidSnapshot.NotFound'
+        )
+        return {}
+
+    def describe_log_groups(self, region: str, params: dict) -> dict:
+        return {
+            'logGroups': [
+                {'logGroupName': group['logGroupName'], 'arn': group['arn']}
+                for group in self.resources[(region, 'log_groups')].values()
+            ]
+        }
+
+    def list_log_group_tags(self, region: str, params: dict) -> dict:
+        group_name = params['resourceArn'].split(':log-group:', 1)[1]
+        return {
+            'tags': self.get(
+                region, 'log_groups', group_name, 'ResourceNotFoundException'
+            )['tags']
+        }
+
+    def delete_log_group(self, region: str, params: dict) -> dict:
+        self.delete(
+            region, 'log_groups', params['logGroupName'], 'ResourceNotFoundException'
+        )
+        return {}
+
+    def list_roles(self, region: str, params: dict) -> dict:
+        return {
+            'Roles': [
+                {key: value for key, value in role.items() if key != 'Tags'}
+                for role in self.resources[('global', 'roles')].values()
+            ],
+            'IsTruncated': False,
+        }
+
+    def list_role_tags(self, region: str, params: dict) -> dict:
+        role = self.get('global', 'roles', params['RoleName'], 'NoSuchEntity')
+        return {'Tags': role['Tags'], 'IsTruncated': False}
+
+    def delete_role(self, region: str, params: dict) -> dict:
+        self.delete('global', 'roles', params['RoleName'], 'NoSuchEntity')
+        return {}
+
+    def list_queues(self, region: str, params: dict) -> dict:
+        return {'QueueUrls': list(self.resources[(region, 'queues')])}
+
+    def list_queue_tags(self, region: str, params: dict) -> dict:
+        queue = self.get(
+            region,
+            'queues',
+            params['QueueUrl'],
+            'AWS.SimpleQueueService.NonExistentQueue',
+        )
+        return {'Tags': queue['Tags']}
+
+    def delete_queue(self, region: str, params: dict) -> dict:
+        self.delete(
+            region,
+            'queues',
+            params['QueueUrl'],
+            'AWS.SimpleQueueService.NonExistentQueue',
+        )
+        return {}
+
+    def get(self, region: str, kind: str, resource_id: str, error_code: str) -> dict:
+        try:
+            return self.resources[(region, kind)][resource_id]
+        except KeyError:
+            raise StubError(error_code, resource_id) from None
+
+    def delete(self, region: str, kind: str, resource_id: str, error_code: str) -> None:
+        if self.resources[(region, kind)].pop(resource_id, None) is None:
+            raise StubError(error_code, resource_id)
@@ -0,0 +1,337 @@
+#
+# Checks the API calls query and terminate functions make against their
+# declared CallBudget, with N generated resources on a stubbed endpoint
+#
+# Run from the repository root: python -m benchmarks.budgets --help
+#
+
+import argparse
+import contextlib
+import dataclasses
+import json
+import os
+import sys
+from collections import Counter
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import boto3
+import botocore.waiter
+from rich.console import Console
+from rich.table import Table
+
+import utils.deletion
+from config import config
+from engine.history import clear_scan_history
+from registry import (
+    CallBudget,
+    init_registry_resources,
+    query_call_budgets,
+    query_registry,
+    terminate_call_budgets,
+    terminate_registry,
+)
+from utils import API_RATE_LIMITS, TAGGING_API_RESOURCE_TYPES
+from utils.aws import (
+    AccountContext,
+    clear_client_cache,
+    clear_client_hooks,
+    set_account_context,
+)
+from utils.config_inventory import clear_config_inventories
+from utils.resource import ResourceRef
+from utils.tagging import clear_tag_indexes, set_tag_index
+from utils.throttle import clear_throttle_state
+
+from .shapes import GeneratedAccount
+from .stub import StubbedEndpoint
+
+RESOURCE_COUNTS = [10, 100, 1000]
+
+
+class CompleteTagIndex(dict):
+    # A Tagging API sweep that found every resource, none of them tagged
+    def __contains__(self, resource_arn) -> bool:
+        return True
+
+    def __missing__(self, resource_arn) -> dict:
+        return {}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Check Query And Terminate Functions Against Their API Call Budgets'
+    )
+    parser.add_argument(
+        '--size',
+        type=int,
+        action='append',
+        default=[],
+        help=f'Generated Resources To Check With (Default: {RESOURCE_COUNTS})',
+    )
+    parser.add_argument(
+        '--resource-type',
+        action='append',
+        default=[],
+        help='Only Check These Resource Types',
+    )
+    parser.add_argument(
+        '--discovery',
+        choices=['native', 'tagging-api'],
+        default='native',
+        help='With "tagging-api", Check Its Resource Types Make No Call Per Resource',
+    )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Also Report Query Functions Without A Declared Budget',
+    )
+    parser.add_argument('--output', help='Also Write The JSON Results Here')
+
+    return parser.parse_args()
+
+
+def use_stubbed_credentials() -> None:
+    # Nothing reaches AWS, but never risk a real profile's credentials
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ.update(
+        {
+            'AWS_ACCESS_KEY_ID': 'budgets',
+            'AWS_SECRET_ACCESS_KEY': 'budgets',
+            'AWS_DEFAULT_REGION': 'us-east-1',
+        }
+    )
+
+
+@contextlib.contextmanager
+def unpaced_calls():
+    # Rate limits and waits change how long calls take, not how many are made
+    original_rate_limits = dict(API_RATE_LIMITS)
+    original_times = (utils.deletion.time, botocore.waiter.time)
+    API_RATE_LIMITS.clear()
+    utils.deletion.time = botocore.waiter.time = SimpleNamespace(
+        sleep=lambda seconds: None
+    )
+
+    try:
+        yield
+    finally:
+        API_RATE_LIMITS.update(original_rate_limits)
+        utils.deletion.time, botocore.waiter.time = original_times
+
+
+def get_region(resource_type: str) -> str:
+    return 'global' if resource_type in config.GLOBAL_RESOURCES else 'us-east-1'
+
+
+def get_generated_arns(
+    resource_type: str, account_id: str, resource_count: int
+) -> list[ResourceRef]:
+    # Resource types are Service::Resource, or Service:Resource for Kinesis
+    service, resource = resource_type.lower().replace('::', ':').split(':', 1)
+    region = '' if resource_type in config.GLOBAL_RESOURCES else 'us-east-1'
+
+    return [
+        ResourceRef(
+            f'arn:aws:{service}:{region}:{account_id}:{resource}/',
+            f'{resource}-{index}',
+        )
+        for index in range(resource_count)
+    ]
+
+
+def get_call_budget(
+    call_budgets: dict[str, CallBudget], resource_type: str, discovery: str
+) -> Optional[CallBudget]:
+    # Tags come from the regional sweep, so there's no call per resource left
+    budget = call_budgets.get(resource_type)
+    if budget and discovery == 'tagging-api':
+        budget = dataclasses.replace(budget, per_resource=0)
+
+    return budget
+
+
+def count_calls(
+    endpoint: StubbedEndpoint, function: Callable, *args
+) -> tuple[Counter, Optional[str]]:
+    calls_before = Counter(endpoint.calls)
+    error = None
+
+    try:
+        function(*args)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+
+    return endpoint.calls - calls_before, error
+
+
+def check_budgets(
+    resource_types: list[str], resource_count: int, discovery: str = 'native'
+) -> dict[tuple[str, str], dict]:
+    """
+    Count the API calls each function makes with N generated resources.
+
+    Query functions list the generated resources, terminate functions with a
+    budget are given N generated ARNs.
+
+    With "tagging-api" discovery, only query functions of the resource types in
+    TAGGING_API_RESOURCE_TYPES are checked. The region's sweep is taken to have
+    found every resource, so their budgets allow no calls per resource.
+
+    Args:
+        resource_types (list[str]): The resource types to check.
+        resource_count (int): The resources to generate (N).
+        discovery (str): "native" or "tagging-api".
+
+    Returns:
+        dict[tuple[str, str], dict]: The calls by operation, total, budget and
+            any error, keyed by (resource type, 'query' or 'terminate').
+
+    """
+    account = GeneratedAccount(resource_count)
+    endpoint = StubbedEndpoint(account)
+
+    clear_client_cache()
+    clear_client_hooks()
+    clear_tag_indexes()
+    clear_config_inventories()
+    clear_scan_history()
+    clear_throttle_state()
+    endpoint.install()
+
+    session = boto3.session.Session(region_name='us-east-1')
+    set_account_context(
+        session, AccountContext(account.account_id, 'aws', ('us-east-1',))
+    )
+
+    functions = [
+        ('query', query_registry, query_call_budgets),
+        ('terminate', terminate_registry, terminate_call_budgets),
+    ]
+    if discovery == 'tagging-api':
+        set_tag_index(session, 'us-east-1', CompleteTagIndex())
+        resource_types = [
+            resource_type
+            for resource_type in resource_types
+            if resource_type in TAGGING_API_RESOURCE_TYPES
+        ]
+        functions = functions[:1]
+
+    results = {}
+    for resource_type in resource_types:
+        region = get_region(resource_type)
+
+        for function_kind, registry, call_budgets in functions:
+            if resource_type not in registry:
+                continue
+
+            # Terminate functions may poll until a deletion finishes, which
+            # generated responses never do, so they need a declared budget
+            if function_kind == 'terminate' and resource_type not in call_budgets:
+                continue
+
+            args = [session, region]
+            if function_kind == 'terminate':
+                args.append(
+                    get_generated_arns(
+                        resource_type, account.account_id, resource_count
+                    )
+                )
+
+            calls, error = count_calls(endpoint, registry[resource_type], *args)
+            budget = get_call_budget(call_budgets, resource_type, discovery)
+
+            results[(resource_type, function_kind)] = {
+                'calls': dict(sorted(calls.items())),
+                'total_calls': calls.total(),
+                'max_calls': budget.max_calls(resource_count) if budget else None,
+                'error': error,
+            }
+
+    return results
+
+
+def is_within_budget(result: dict) -> bool:
+    return not result['error'] and result['total_calls'] <= result['max_calls']
+
+
+def main() -> None:
+    args = parse_args()
+
+    use_stubbed_credentials()
+    init_registry_resources()
+    config.DISCOVERY = args.discovery
+
+    resource_counts = args.size or RESOURCE_COUNTS
+    budgeted = set(query_call_budgets) | set(terminate_call_budgets)
+    resource_types = sorted(
+        resource_type
+        for resource_type in set(query_registry) | set(terminate_registry)
+        if (args.all or resource_type in budgeted)
+        and (not args.resource_type or resource_type in args.resource_type)
+    )
+
+    results: dict[tuple[str, str], dict[int, dict]] = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with unpaced_calls():
+            for resource_count in resource_counts:
+                for key, result in check_budgets(
+                    resource_types, resource_count, args.discovery
+                ).items():
+                    results.setdefault(key, {})[resource_count] = result
+
+    table = Table(title='API Calls For N Resources (Calls / Budget)')
+    table.add_column('Resource Type')
+    table.add_column('Function')
+    for resource_count in resource_counts:
+        table.add_column(f'N={resource_count}', justify='right')
+
+    over_budget = []
+    for (resource_type, function_kind), counted in sorted(results.items()):
+        cells = []
+        for result in counted.values():
+            if result['max_calls'] is None:
+                cells.append('error' if result['error'] else str(result['total_calls']))
+            elif is_within_budget(result):
+                cells.append(f'[green]{result["total_calls"]} / {result["max_calls"]}')
+            else:
+                cells.append(
+                    f'[red]{"error" if result["error"] else result["total_calls"]}'
+                    f' / {result["max_calls"]}'
+                )
+                over_budget.append((resource_type, function_kind))
+
+        table.add_row(resource_type, function_kind, *cells)
+
+    console = Console(highlight=False)
+    console.print(table)
+
+    for resource_type, function_kind in sorted(set(over_budget)):
+        for resource_count, result in results[(resource_type, function_kind)].items():
+            if not is_within_budget(result):
+                console.print(
+                    f'[red]{resource_type} {function_kind} (N={resource_count}):'
+                    f' {result["error"] or result["calls"]}'
+                )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(
+                {
+                    resource_type: {
+                        function_kind: counted
+                        for (result_type, function_kind), counted in results.items()
+                        if result_type == resource_type
+                    }
+                    for resource_type in resource_types
+                },
+                output_file,
+                indent=2,
+            )
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
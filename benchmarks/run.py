@@ -0,0 +1,390 @@
+#
+# Benchmarks scanning and deleting synthetic accounts on a stubbed AWS endpoint
+#
+# Run from the repository root: python -m benchmarks.run --help
+#
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import boto3
+import botocore
+
+import utils.deletion
+from apocalypse import process_resources, run_pipeline
+from config import config
+from engine.history import clear_scan_history
+from registry import (
+    async_query_registry,
+    async_terminate_registry,
+    init_registry_resources,
+    query_registry,
+    terminate_registry,
+)
+from utils.aws import (
+    AccountContext,
+    clear_client_cache,
+    clear_client_hooks,
+    set_account_context,
+)
+from utils.config_inventory import clear_config_inventories
+from utils.tagging import clear_tag_indexes
+from utils.throttle import clear_throttle_state
+from view.output_handlers import JSONOutputHandler, NDJSONOutputHandler
+
+from .account import GLOBAL_KINDS, RESOURCE_KINDS, SyntheticAccount
+from .stub import StubbedEndpoint
+
+BENCHMARK_REGIONS = [
+    'us-east-1',
+    'us-east-2',
+    'us-west-1',
+    'us-west-2',
+    'ca-central-1',
+    'eu-west-1',
+    'eu-west-2',
+    'eu-west-3',
+    'eu-central-1',
+    'eu-north-1',
+    'ap-south-1',
+    'ap-northeast-1',
+    'ap-northeast-2',
+    'ap-northeast-3',
+    'ap-southeast-1',
+    'ap-southeast-2',
+    'sa-east-1',
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Benchmark Scanning And Deleting Synthetic Accounts'
+    )
+    parser.add_argument(
+        '--regions',
+        type=int,
+        default=4,
+        choices=range(1, len(BENCHMARK_REGIONS) + 1),
+        metavar=f'1-{len(BENCHMARK_REGIONS)}',
+        help='Regions In The Synthetic Account',
+    )
+    parser.add_argument(
+        '--instances', type=int, default=1000, help='EC2 Instances Per Region'
+    )
+    parser.add_argument(
+        '--snapshots', type=int, default=1000, help='EBS Snapshots Per Region'
+    )
+    parser.add_argument(
+        '--log-groups', type=int, default=1000, help='Log Groups Per Region'
+    )
+    parser.add_argument('--roles', type=int, default=1000, help='IAM Roles')
+    parser.add_argument(
+        '--queues', type=int, default=1000, help='SQS Queues Per Region'
+    )
+    parser.add_argument(
+        '--exempt-ratio',
+        type=float,
+        default=0.1,
+        help='Share Of Each Resource Kind Tagged With The Exception Tag',
+    )
+    parser.add_argument(
+        '--latency', type=float, default=10, help='Milliseconds Added To Every API Call'
+    )
+    parser.add_argument(
+        '--wait-scale',
+        type=float,
+        default=0,
+        help='Scale Applied To Deletion Polling And Retry Backoff Sleeps',
+    )
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--max-workers', type=int, default=config.MAX_WORKERS)
+    parser.add_argument('--output-format', choices=['json', 'ndjson'], default='json')
+    parser.add_argument(
+        '--pipeline', action='store_true', help='Terminate While Scanning'
+    )
+    parser.add_argument(
+        '--scan-only', action='store_true', help='Skip Deleting The Resources'
+    )
+    parser.add_argument('--repeat', type=int, default=1, help='Runs To Average')
+    parser.add_argument('--output', help='Write The JSON Results Here, Not Stdout')
+
+    return parser.parse_args()
+
+
+def timed(function, timings: dict, resource_type: str):
+    def record(result, started: float) -> None:
+        timing = timings[resource_type]
+        elapsed = time.perf_counter() - started
+        timing['invocations'] += 1
+        timing['seconds'] += elapsed
+        timing['max_seconds'] = max(timing['max_seconds'], elapsed)
+
+        # Query functions return ARNs, terminate functions a DeleteResponse
+        if isinstance(result, list):
+            timing['resources'] += len(result)
+        elif result is not None:
+            timing['deleted'] += len(result.successful)
+            timing['failed'] += len(result.outcomes) - len(result.successful)
+
+    if asyncio.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = await function(*args, **kwargs)
+            record(result, started)
+            return result
+
+    else:
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = function(*args, **kwargs)
+            record(result, started)
+            return result
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def scaled_waits(scale: float):
+    # Deletions are instant here, so deletion polling only waits if asked to
+    original_time = utils.deletion.time
+    utils.deletion.time = SimpleNamespace(
+        sleep=lambda seconds: original_time.sleep(seconds * scale)
+    )
+
+    try:
+        yield
+    finally:
+        utils.deletion.time = original_time
+
+
+@contextlib.contextmanager
+def timed_registries(
+    resource_types: list[str], scan_timings: dict, terminate_timings: dict
+):
+    # Time every registry function invocation, whichever engine makes it
+    registries = [
+        (query_registry, scan_timings),
+        (async_query_registry, scan_timings),
+        (terminate_registry, terminate_timings),
+        (async_terminate_registry, terminate_timings),
+    ]
+    originals = [dict(registry) for registry, _ in registries]
+
+    try:
+        for registry, timings in registries:
+            for resource_type in resource_types:
+                if resource_type in registry:
+                    registry[resource_type] = timed(
+                        registry[resource_type], timings, resource_type
+                    )
+        yield
+    finally:
+        for (registry, _), original in zip(registries, originals):
+            registry.clear()
+            registry.update(original)
+
+
+def new_timings() -> defaultdict:
+    return defaultdict(
+        lambda: {
+            'invocations': 0,
+            'seconds': 0.0,
+            'max_seconds': 0.0,
+            'resources': 0,
+            'deleted': 0,
+            'failed': 0,
+        }
+    )
+
+
+def run_benchmark(args: argparse.Namespace, regions: list[str], counts: dict) -> dict:
+    """
+    Scan, then delete, a new synthetic account on a new stubbed endpoint.
+
+    Args:
+        args (argparse.Namespace): The benchmark arguments.
+        regions (list[str]): The synthetic account's regions.
+        counts (dict): Resources of each kind, per region for regional kinds.
+
+    Returns:
+        dict: The run's phase and per resource type timings and API calls.
+
+    """
+    account = SyntheticAccount('123456789012', regions, counts, args.exempt_ratio)
+    endpoint = StubbedEndpoint(account, args.latency / 1000)
+
+    clear_client_cache()
+    clear_client_hooks()
+    clear_tag_indexes()
+    clear_config_inventories()
+    clear_scan_history()
+    clear_throttle_state()
+    endpoint.install()
+
+    session = boto3.session.Session(region_name='us-east-1')
+    set_account_context(
+        session, AccountContext(account.account_id, 'aws', tuple(regions))
+    )
+
+    resource_types = [
+        resource_type
+        for kind, resource_type in RESOURCE_KINDS.items()
+        if counts.get(kind)
+    ]
+    scan_timings = new_timings()
+    terminate_timings = new_timings()
+    phases = {}
+
+    handler_class = (
+        NDJSONOutputHandler if args.output_format == 'ndjson' else JSONOutputHandler
+    )
+    handler = handler_class(session)
+
+    with (
+        open(os.devnull, 'w') as devnull,
+        contextlib.redirect_stdout(devnull),
+        scaled_waits(args.wait_scale),
+        timed_registries(resource_types, scan_timings, terminate_timings),
+    ):
+        if args.pipeline:
+            started = time.perf_counter()
+            run_pipeline(session, resource_types, handler)
+            phases['pipeline'] = {'seconds': time.perf_counter() - started}
+        else:
+            started = time.perf_counter()
+            retrieved_resources = handler.retrieve_data(resource_types, config.REGIONS)
+            phases['retrieve_data'] = {'seconds': time.perf_counter() - started}
+
+            if not args.scan_only:
+                started = time.perf_counter()
+                process_resources(session, retrieved_resources)
+                phases['process_resources'] = {'seconds': time.perf_counter() - started}
+
+    remaining = account.get_remaining()
+    exempt = account.get_exempt()
+
+    return {
+        'phases': phases,
+        'resource_types': {
+            resource_type: {
+                'scan': scan_timings[resource_type],
+                'terminate': terminate_timings[resource_type],
+                'remaining': remaining[resource_type],
+                'expected_remaining': (
+                    remaining[resource_type]
+                    if args.scan_only
+                    else exempt[resource_type]
+                ),
+            }
+            for resource_type in resource_types
+        },
+        'api_calls': dict(sorted(endpoint.calls.items())),
+        'unhandled_api_calls': dict(sorted(endpoint.unhandled.items())),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.repeat < 1:
+        raise SystemExit('--repeat must be at least 1')
+
+    # Nothing reaches AWS, but never risk a real profile's credentials
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ.update(
+        {
+            'AWS_ACCESS_KEY_ID': 'benchmark',
+            'AWS_SECRET_ACCESS_KEY': 'benchmark',
+            'AWS_DEFAULT_REGION': 'us-east-1',
+        }
+    )
+
+    config.COMMAND = 'aws'
+    config.ENGINE = args.engine
+    config.MAX_WORKERS = args.max_workers
+    config.ALLOW_EXCEPTIONS = True
+    config.RETRY_BACKOFF *= args.wait_scale
+
+    init_registry_resources()
+
+    regions = BENCHMARK_REGIONS[: args.regions]
+    for region in regions + ['global']:
+        config.add_region(region)
+    counts = {
+        'instances': args.instances,
+        'snapshots': args.snapshots,
+        'log_groups': args.log_groups,
+        'roles': args.roles,
+        'queues': args.queues,
+    }
+
+    runs = []
+    for run in range(args.repeat):
+        runs.append(run_benchmark(args, regions, counts))
+        print(
+            f'Run {run + 1}/{args.repeat}: '
+            + ', '.join(
+                f'{phase} {timing["seconds"]:.2f}s'
+                for phase, timing in runs[-1]['phases'].items()
+            ),
+            file=sys.stderr,
+        )
+
+    results = {
+        'started': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'boto3': boto3.__version__,
+            'botocore': botocore.__version__,
+        },
+        'parameters': {
+            'regions': regions,
+            'resources': {
+                RESOURCE_KINDS[kind]: count
+                * (1 if kind in GLOBAL_KINDS else len(regions))
+                for kind, count in counts.items()
+            },
+            'exempt_ratio': args.exempt_ratio,
+            'latency_ms': args.latency,
+            'wait_scale': args.wait_scale,
+            'engine': args.engine,
+            'max_workers': args.max_workers,
+            'output_format': args.output_format,
+            'pipeline': args.pipeline,
+            'scan_only': args.scan_only,
+        },
+        'summary': {
+            phase: {
+                'mean_seconds': sum(run['phases'][phase]['seconds'] for run in runs)
+                / len(runs),
+                'min_seconds': min(run['phases'][phase]['seconds'] for run in runs),
+            }
+            for phase in runs[0]['phases']
+        },
+        'runs': runs,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+import botocore.exceptions
+import botocore.session
+
+# Nested structures are generated this deep, which also ends recursive shapes
+MAX_DEPTH = 8
+
+GENERATED_TIMESTAMP = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class GeneratedAccount:
+    """
+    Answers any API call with generated responses, from botocore's models.
+
+    Listing calls (those without required parameters) return `resource_count`
+    items in each of their top level lists, and every other list has a single
+    item. Strings are named after their member and item, and members that look
+    like ARNs are given ARNs, so identifiers passed from one call to the next
+    are unique per resource.
+    """
+
+    def __init__(self, resource_count: int, account_id: str = '123456789012') -> None:
+        self.resource_count = resource_count
+        self.account_id = account_id
+        self._botocore = botocore.session.get_session()
+        self._responses: dict[tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def is_listing(self, operation_model) -> bool:
+        # Calls scoped to one resource (i.e. its tags) list that resource's items
+        input_shape = operation_model.input_shape
+        if input_shape and input_shape.required_members:
+            return False
+
+        if operation_model.name.startswith(('Describe', 'Get', 'List')):
+            return True
+
+        service_model = operation_model.service_model
+        try:
+            self._botocore.get_paginator_model(
+                service_model.service_name, service_model.api_version
+            ).get_paginator(operation_model.name)
+            return True
+        except (ValueError, botocore.exceptions.UnknownServiceError):
+            return False
+
+    def generate(self, shape, name: str, context: tuple, depth: int, index: int):
+        service_name, region = context
+
+        if shape.type_name == 'structure':
+            if depth > MAX_DEPTH:
+                return {}
+            return {
+                member_name: self.generate(
+                    member_shape, member_name, context, depth + 1, index
+                )
+                for member_name, member_shape in shape.members.items()
+            }
+
+        if shape.type_name == 'list':
+            return [self.generate(shape.member, name, context, depth + 1, index)]
+
+        if shape.type_name == 'map':
+            return {}
+
+        if shape.type_name == 'string':
+            if shape.enum:
+                return shape.enum[0]
+            if name.lower().endswith('arn'):
+                return (
+                    f'arn:aws:{service_name}:{region}:{self.account_id}:'
+                    f'{name.lower()}/{name}-{index}'
+                )
+            return f'{name}-{index}'
+
+        if shape.type_name in ('integer', 'long'):
+            return 1
+
+        if shape.type_name in ('float', 'double'):
+            return 1.0
+
+        if shape.type_name == 'boolean':
+            return False
+
+        if shape.type_name == 'timestamp':
+            return GENERATED_TIMESTAMP
+
+        return b''
+
+    def get_response(self, operation_model, region: str) -> dict:
+        service_name = operation_model.service_model.service_name
+        output_shape = operation_model.output_shape
+        if output_shape is None:
+            return {}
+
+        context = (service_name, region)
+        item_count = self.resource_count if self.is_listing(operation_model) else 1
+
+        response = {}
+        for member_name, member_shape in output_shape.members.items():
+            if member_shape.type_name == 'list':
+                response[member_name] = [
+                    self.generate(member_shape.member, member_name, context, 2, index)
+                    for index in range(item_count)
+                ]
+            else:
+                response[member_name] = self.generate(
+                    member_shape, member_name, context, 1, 0
+                )
+
+        return response
+
+    def handle(
+        self, service_name: str, operation_name: str, region: str, params
+    ) -> Optional[dict]:
+        """
+        Answer an API call with a generated response.
+
+        Responses are generated once per operation and region, then reused.
+
+        Args:
+            service_name (str): The botocore service name (i.e. 'ec2').
+            operation_name (str): The API operation (i.e. 'DescribeInstances').
+            region (str): The client's region.
+            params (dict): The call's parameters.
+
+        Returns:
+            dict: The whole, unpaginated response.
+
+        """
+        key = (service_name, operation_name, region)
+
+        with self._lock:
+            if key not in self._responses:
+                operation_model = self._botocore.get_service_model(
+                    service_name
+                ).operation_model(operation_name)
+                self._responses[key] = self.get_response(operation_model, region)
+
+        # Pagination replaces the top level lists, so each call gets a copy
+        return dict(self._responses[key])
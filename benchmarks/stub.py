@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import botocore.exceptions
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+from utils.aws import register_client_hook
+
+from .account import StubError, SyntheticAccount
+
+# Page size for paginated calls made without a limit
+DEFAULT_PAGE_SIZE = 100
+
+
+def capture_params(params: dict, context: dict, **kwargs) -> None:
+    # before-call only sees the serialized request, so keep the API parameters
+    context['stub_params'] = params
+
+
+class StubbedEndpoint:
+    """
+    A local AWS stand-in, answering every client call from a SyntheticAccount.
+
+    Calls are answered in a botocore before-call handler, so nothing leaves
+    the process, after sleeping `latency` seconds to stand in for the round
+    trip. List calls are paginated as the real API would, using the page
+    sizes the caller asks for. Calls the account doesn't support get an empty
+    response and are counted separately.
+    """
+
+    def __init__(self, account: SyntheticAccount, latency: float = 0.0) -> None:
+        self.account = account
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.unhandled: Counter = Counter()
+        self._lock = threading.Lock()
+        self._botocore = botocore.session.get_session()
+        self._paginators: dict[tuple[str, str], Optional[dict]] = {}
+
+    def install(self) -> None:
+        register_client_hook(self.register)
+
+    def register(self, client, is_async: bool = False) -> None:
+        region_name = client.meta.region_name
+
+        def respond(model, context, **kwargs):
+            time.sleep(self.latency)
+            return self.get_response(model, region_name, context)
+
+        async def respond_async(model, context, **kwargs):
+            await asyncio.sleep(self.latency)
+            return self.get_response(model, region_name, context)
+
+        client.meta.events.register('before-parameter-build', capture_params)
+        client.meta.events.register(
+            'before-call', respond_async if is_async else respond
+        )
+
+    def get_paginator_config(self, model) -> Optional[dict]:
+        service_model = model.service_model
+        key = (service_model.service_name, model.name)
+
+        if key not in self._paginators:
+            try:
+                self._paginators[key] = self._botocore.get_paginator_model(
+                    service_model.service_name, service_model.api_version
+                ).get_paginator(model.name)
+            except (ValueError, botocore.exceptions.UnknownServiceError):
+                self._paginators[key] = None
+
+        return self._paginators[key]
+
+    def paginate(self, model, params: dict, parsed: dict) -> dict:
+        paginator_config = self.get_paginator_config(model)
+        if not paginator_config:
+            return parsed
+
+        def as_list(keys) -> list[str]:
+            return keys if isinstance(keys, list) else [keys]
+
+        # Tokens are the offset of the next page
+        input_token = as_list(paginator_config['input_token'])[0]
+        output_tokens = as_list(paginator_config['output_token'])
+        limit_key = paginator_config.get('limit_key')
+
+        start = int(params.get(input_token) or 0)
+        end = start + int(params.get(limit_key) or DEFAULT_PAGE_SIZE)
+
+        truncated = False
+        for result_key in as_list(paginator_config['result_key']):
+            if isinstance(results := parsed.get(result_key), list):
+                parsed[result_key] = results[start:end]
+                truncated = truncated or end < len(results)
+
+        for output_token in output_tokens:
+            parsed.pop(output_token, None)
+        if truncated:
+            parsed[output_tokens[0]] = str(end)
+        if more_results := paginator_config.get('more_results'):
+            parsed[more_results] = truncated
+
+        return parsed
+
+    def get_response(self, model, region_name: str, context: dict) -> tuple:
+        service_name = model.service_model.service_name
+        params = context.get('stub_params', {})
+
+        with self._lock:
+            self.calls[f'{service_name}.{model.name}'] += 1
+
+        try:
+            parsed = self.account.handle(service_name, model.name, region_name, params)
+            status_code = 200
+        except StubError as e:
+            parsed = {'Error': {'Code': e.code, 'Message': e.message}}
+            status_code = 400
+
+        if parsed is None:
+            with self._lock:
+                self.unhandled[f'{service_name}.{model.name}'] += 1
+            parsed = {}
+
+        if status_code == 200:
+            parsed = self.paginate(model, params, parsed)
+
+        # S3 reports a bucket's region in a header
+        parsed['ResponseMetadata'] = {
+            'HTTPStatusCode': status_code,
+            'HTTPHeaders': {'x-amz-bucket-region': region_name},
+        }
+        return AWSResponse('https://stub.invalid/', status_code, {}, None), parsed
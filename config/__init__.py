@@ -9,6 +9,80 @@ class Config:
     COMMAND: str = 'inspect-aws'
     OUTPUT_FORMAT: str = 'rich'
 
+    # Also write gzipped "ndjson" or "csv" files per region/resource type here
+    OUTPUT_DIR: str = ''
+    OUTPUT_DIR_FORMAT: str = 'ndjson'
+
+    # Number of (region, resource type) pairs scanned concurrently
+    MAX_WORKERS: int = 10
+
+    # Adapt calls in flight per service/region to throttling, up to MAX_CONCURRENCY
+    ADAPTIVE_CONCURRENCY: bool = True
+    MAX_CONCURRENCY: int = 100
+
+    # "threads" or "async" (requires aiobotocore)
+    ENGINE: str = 'threads'
+
+    # "native" lists and tags each resource with its own service's APIs,
+    # "tagging-api" takes tags from one Resource Groups Tagging API sweep per region,
+    # "config" takes resources and tags from AWS Config advanced queries
+    DISCOVERY: str = 'native'
+
+    # AWS Config aggregator (in the session's region) used by "config" discovery
+    CONFIG_AGGREGATOR: str = ''
+
+    # Regions are sharded across this many processes when scanning (1 disables)
+    PROCESSES: int = 1
+
+    # State file of previous scan results, pairs empty on the last
+    # SCAN_HISTORY_SKIP_AFTER scans are skipped until SCAN_HISTORY_REFRESH_INTERVAL
+    # seconds after they were last scanned
+    SCAN_HISTORY_FILE: str = ''
+    SCAN_HISTORY_SKIP_AFTER: int = 3
+    SCAN_HISTORY_REFRESH_INTERVAL: int = 86400
+
+    # Seconds to reuse the cached account ID and enabled regions (0 disables)
+    BOOTSTRAP_CACHE_TTL: int = 0
+
+    # Terminate each region/resource type as soon as it's scanned, without
+    # confirmation - only allowed with WHITELIST_ACCOUNTS set
+    PIPELINE: bool = False
+    # Scanned region/resource types buffered ahead of termination
+    PIPELINE_QUEUE_SIZE: int = 100
+
+    # Rounds of retrying transient and dependency failures once the rest of
+    # the deletions have finished, the first after RETRY_BACKOFF seconds and
+    # doubling each round (0 disables)
+    RETRY_ROUNDS: int = 3
+    RETRY_BACKOFF: float = 5
+
+    # Record every API response to this directory, or answer every API call
+    # from a recording in it without reaching AWS, waiting the recorded
+    # latencies multiplied by REPLAY_LATENCY_SCALE
+    RECORD_DIR: str = ''
+    REPLAY_DIR: str = ''
+    REPLAY_LATENCY_SCALE: float = 1.0
+
+    # Report the count, latency, retries, throttles, bytes and errors of each
+    # API call per resource type at the end of the run
+    METRICS: bool = False
+
+    # Expose Prometheus metrics of the run (resources, API calls, throttles,
+    # in-flight deletions and phase durations) on an HTTP port and/or in a
+    # node_exporter textfile, rewritten as the run goes
+    METRICS_PORT: int = 0
+    METRICS_TEXTFILE: str = ''
+
+    # Export OpenTelemetry spans of the run, its regions, registry functions,
+    # API calls and waits as OTLP/JSON, to a file and/or an OTLP/HTTP collector
+    TRACE_FILE: str = ''
+    TRACE_ENDPOINT: str = ''
+
+    # Profile the run's CPU with cProfile, and/or sample a collapsed-stack
+    # flamegraph attributed to resource types
+    PROFILE_CPU: str = ''
+    PROFILE_CPU_FLAMEGRAPH: str = ''
+
     # Script will NOT operate in these accounts
     BLACKLIST_ACCOUNTS: set[str] = field(default_factory=set)
 
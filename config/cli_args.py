@@ -47,6 +47,139 @@ def add_common_arguments(parser):
         action='append',
         default=[],
     )
+    parser.add_argument(
+        '--output-dir',
+        help='Also Write Gzipped Files Per Region/Resource Type To This Directory',
+    )
+    parser.add_argument(
+        '--output-dir-format',
+        choices=['ndjson', 'csv'],
+        help='Format Of The Files Written To --output-dir',
+    )
+    parser.add_argument(
+        '--max-workers',
+        help='Maximum Concurrent Region/Resource Type Scans',
+        type=int,
+    )
+    parser.add_argument(
+        '--no-adaptive-concurrency',
+        help='Disable Adapting Concurrency To Throttling Responses',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--max-concurrency',
+        help='Maximum Adaptive API Calls In Flight Per Service/Region',
+        type=int,
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'async'],
+        help='Scan/Terminate Engine - "async" requires aiobotocore',
+    )
+    parser.add_argument(
+        '--discovery',
+        choices=['native', 'tagging-api', 'config'],
+        help='Resource Discovery Backend - "tagging-api" sweeps tags once per region, '
+        '"config" uses AWS Config advanced queries',
+    )
+    parser.add_argument(
+        '--config-aggregator',
+        help='AWS Config Aggregator To Query With "config" Discovery',
+    )
+    parser.add_argument(
+        '--processes',
+        help='Shard Region Scans Across This Many Processes',
+        type=int,
+    )
+    parser.add_argument(
+        '--scan-history',
+        help='Scan History File - Skips Region/Resource Types Empty On Recent Scans',
+    )
+    parser.add_argument(
+        '--skip-empty-after',
+        help='Skip Region/Resource Types Empty On This Many Scans In A Row',
+        type=int,
+    )
+    parser.add_argument(
+        '--full-refresh-interval',
+        help='Seconds Before Known Empty Region/Resource Types Are Scanned Again',
+        type=int,
+    )
+    parser.add_argument(
+        '--bootstrap-cache-ttl',
+        help='Seconds To Cache Account ID And Enabled Regions On Disk',
+        type=int,
+    )
+    parser.add_argument(
+        '--pipeline',
+        help='Terminate Resources As Soon As They Are Found (Whitelisted Accounts Only)',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--pipeline-queue-size',
+        help='Scanned Region/Resource Types To Buffer Ahead Of Termination',
+        type=int,
+    )
+    parser.add_argument(
+        '--retry-rounds',
+        help='Rounds Of Retrying Transient And Dependency Failures',
+        type=int,
+    )
+    parser.add_argument(
+        '--retry-backoff',
+        help='Seconds Before The First Retry Round, Doubling Each Round',
+        type=float,
+    )
+    parser.add_argument(
+        '--record',
+        help='Record Every API Response To This Directory',
+        metavar='DIR',
+    )
+    parser.add_argument(
+        '--replay',
+        help='Answer API Calls From A Recording In This Directory, Offline',
+        metavar='DIR',
+    )
+    parser.add_argument(
+        '--replay-latency-scale',
+        help='Scale Applied To Recorded Latencies When Replaying (0 For None)',
+        type=float,
+    )
+    parser.add_argument(
+        '--metrics',
+        help='Report Calls, Latency And Errors Per API Call And Resource Type',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Serve Prometheus Metrics Of The Run On This Port (/metrics)',
+    )
+    parser.add_argument(
+        '--metrics-textfile',
+        metavar='FILE',
+        help='Write Prometheus Metrics Of The Run To This Textfile',
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='Write OpenTelemetry Spans Of The Run To This File (OTLP/JSON)',
+    )
+    parser.add_argument(
+        '--trace-endpoint',
+        metavar='URL',
+        help='Send OpenTelemetry Spans Of The Run To This OTLP/HTTP Collector',
+    )
+    parser.add_argument(
+        '--profile-cpu',
+        metavar='FILE',
+        help='Write A cProfile Profile Of The Run To This File',
+    )
+    parser.add_argument(
+        '--profile-cpu-flamegraph',
+        metavar='FILE',
+        help='Write Collapsed Stacks Of The Run CPU Time To This File',
+    )
 
 
 def parse_args() -> dict:
@@ -74,9 +207,10 @@ def parse_args() -> dict:
 
     global_parser.add_argument(
         '--output',
-        choices=['rich', 'json'],
+        choices=['rich', 'json', 'ndjson'],
         default='rich',
-        help='Output Format - "rich" for Rich Formatting, or "json" to retrieve pure data',
+        help='Output Format - "rich" for Rich Formatting, "json" to retrieve pure data, '
+        'or "ndjson" to stream a record per resource',
     )
     global_args, _ = global_parser.parse_known_args()
 
@@ -143,6 +277,87 @@ def parse_args() -> dict:
         for service in args.exclude_service:
             config.add_excluded_service(service)
 
+    if args.output_dir:
+        config.OUTPUT_DIR = args.output_dir
+
+    if args.output_dir_format:
+        config.OUTPUT_DIR_FORMAT = args.output_dir_format
+
+    if args.max_workers:
+        config.MAX_WORKERS = args.max_workers
+
+    if args.no_adaptive_concurrency:
+        config.ADAPTIVE_CONCURRENCY = False
+
+    if args.max_concurrency:
+        config.MAX_CONCURRENCY = args.max_concurrency
+
+    if args.engine:
+        config.ENGINE = args.engine
+
+    if args.discovery:
+        config.DISCOVERY = args.discovery
+
+    if args.config_aggregator:
+        config.CONFIG_AGGREGATOR = args.config_aggregator
+
+    if args.processes:
+        config.PROCESSES = args.processes
+
+    if args.scan_history:
+        config.SCAN_HISTORY_FILE = args.scan_history
+
+    if args.skip_empty_after:
+        config.SCAN_HISTORY_SKIP_AFTER = args.skip_empty_after
+
+    if args.full_refresh_interval is not None:
+        config.SCAN_HISTORY_REFRESH_INTERVAL = args.full_refresh_interval
+
+    if args.bootstrap_cache_ttl is not None:
+        config.BOOTSTRAP_CACHE_TTL = args.bootstrap_cache_ttl
+
+    if args.pipeline:
+        config.PIPELINE = True
+
+    if args.pipeline_queue_size:
+        config.PIPELINE_QUEUE_SIZE = args.pipeline_queue_size
+
+    if args.retry_rounds is not None:
+        config.RETRY_ROUNDS = args.retry_rounds
+
+    if args.retry_backoff is not None:
+        config.RETRY_BACKOFF = args.retry_backoff
+
+    if args.record:
+        config.RECORD_DIR = args.record
+
+    if args.replay:
+        config.REPLAY_DIR = args.replay
+
+    if args.replay_latency_scale is not None:
+        config.REPLAY_LATENCY_SCALE = args.replay_latency_scale
+
+    if args.metrics:
+        config.METRICS = True
+
+    if args.metrics_port:
+        config.METRICS_PORT = args.metrics_port
+
+    if args.metrics_textfile:
+        config.METRICS_TEXTFILE = args.metrics_textfile
+
+    if args.trace:
+        config.TRACE_FILE = args.trace
+
+    if args.trace_endpoint:
+        config.TRACE_ENDPOINT = args.trace_endpoint
+
+    if args.profile_cpu:
+        config.PROFILE_CPU = args.profile_cpu
+
+    if args.profile_cpu_flamegraph:
+        config.PROFILE_CPU_FLAMEGRAPH = args.profile_cpu_flamegraph
+
     with contextlib.suppress(AttributeError):
         config.ALLOW_EXCEPTIONS = args.allow_exceptions
         if args.exception_tag:
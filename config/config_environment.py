@@ -35,3 +35,87 @@ def parse_environment_config() -> None:
     if services := os.environ.get('NUKE_EXCLUDE_SERVICES'):
         for service in services.split(','):
             config.add_excluded_service(service)
+
+    if output_dir := os.environ.get('NUKE_OUTPUT_DIR'):
+        config.OUTPUT_DIR = output_dir
+
+    if output_dir_format := os.environ.get('NUKE_OUTPUT_DIR_FORMAT'):
+        config.OUTPUT_DIR_FORMAT = output_dir_format
+
+    if max_workers := os.environ.get('NUKE_MAX_WORKERS'):
+        config.MAX_WORKERS = int(max_workers)
+
+    if adaptive_concurrency := os.environ.get('NUKE_ADAPTIVE_CONCURRENCY'):
+        if adaptive_concurrency in ['false', 'False']:
+            config.ADAPTIVE_CONCURRENCY = False
+
+    if max_concurrency := os.environ.get('NUKE_MAX_CONCURRENCY'):
+        config.MAX_CONCURRENCY = int(max_concurrency)
+
+    if engine := os.environ.get('NUKE_ENGINE'):
+        config.ENGINE = engine
+
+    if discovery := os.environ.get('NUKE_DISCOVERY'):
+        config.DISCOVERY = discovery
+
+    if aggregator := os.environ.get('NUKE_CONFIG_AGGREGATOR'):
+        config.CONFIG_AGGREGATOR = aggregator
+
+    if processes := os.environ.get('NUKE_PROCESSES'):
+        config.PROCESSES = int(processes)
+
+    if scan_history := os.environ.get('NUKE_SCAN_HISTORY'):
+        config.SCAN_HISTORY_FILE = scan_history
+
+    if skip_after := os.environ.get('NUKE_SKIP_EMPTY_AFTER'):
+        config.SCAN_HISTORY_SKIP_AFTER = int(skip_after)
+
+    if refresh_interval := os.environ.get('NUKE_FULL_REFRESH_INTERVAL'):
+        config.SCAN_HISTORY_REFRESH_INTERVAL = int(refresh_interval)
+
+    if cache_ttl := os.environ.get('NUKE_BOOTSTRAP_CACHE_TTL'):
+        config.BOOTSTRAP_CACHE_TTL = int(cache_ttl)
+
+    if pipeline := os.environ.get('NUKE_PIPELINE'):
+        if pipeline in ['true', 'True']:
+            config.PIPELINE = True
+
+    if queue_size := os.environ.get('NUKE_PIPELINE_QUEUE_SIZE'):
+        config.PIPELINE_QUEUE_SIZE = int(queue_size)
+
+    if retry_rounds := os.environ.get('NUKE_RETRY_ROUNDS'):
+        config.RETRY_ROUNDS = int(retry_rounds)
+
+    if retry_backoff := os.environ.get('NUKE_RETRY_BACKOFF'):
+        config.RETRY_BACKOFF = float(retry_backoff)
+
+    if record_dir := os.environ.get('NUKE_RECORD_DIR'):
+        config.RECORD_DIR = record_dir
+
+    if replay_dir := os.environ.get('NUKE_REPLAY_DIR'):
+        config.REPLAY_DIR = replay_dir
+
+    if latency_scale := os.environ.get('NUKE_REPLAY_LATENCY_SCALE'):
+        config.REPLAY_LATENCY_SCALE = float(latency_scale)
+
+    if metrics := os.environ.get('NUKE_METRICS'):
+        if metrics in ['true', 'True']:
+            config.METRICS = True
+
+    if metrics_port := os.environ.get('NUKE_METRICS_PORT'):
+        config.METRICS_PORT = int(metrics_port)
+
+    if metrics_textfile := os.environ.get('NUKE_METRICS_TEXTFILE'):
+        config.METRICS_TEXTFILE = metrics_textfile
+
+    if trace_file := os.environ.get('NUKE_TRACE_FILE'):
+        config.TRACE_FILE = trace_file
+
+    if trace_endpoint := os.environ.get('NUKE_TRACE_ENDPOINT'):
+        config.TRACE_ENDPOINT = trace_endpoint
+
+    if profile_cpu := os.environ.get('NUKE_PROFILE_CPU'):
+        config.PROFILE_CPU = profile_cpu
+
+    if flamegraph := os.environ.get('NUKE_PROFILE_CPU_FLAMEGRAPH'):
+        config.PROFILE_CPU_FLAMEGRAPH = flamegraph
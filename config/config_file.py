@@ -42,3 +42,84 @@ def parse_config_file(config_file: Path) -> None:
 
     for service in json_config.get('exclude_services', []):
         config.add_excluded_service(service)
+
+    if output_dir := json_config.get('output_dir'):
+        config.OUTPUT_DIR = output_dir
+
+    if output_dir_format := json_config.get('output_dir_format'):
+        config.OUTPUT_DIR_FORMAT = output_dir_format
+
+    if max_workers := json_config.get('max_workers'):
+        config.MAX_WORKERS = max_workers
+
+    if json_config.get('adaptive_concurrency') is False:
+        config.ADAPTIVE_CONCURRENCY = False
+
+    if max_concurrency := json_config.get('max_concurrency'):
+        config.MAX_CONCURRENCY = max_concurrency
+
+    if engine := json_config.get('engine'):
+        config.ENGINE = engine
+
+    if discovery := json_config.get('discovery'):
+        config.DISCOVERY = discovery
+
+    if aggregator := json_config.get('config_aggregator'):
+        config.CONFIG_AGGREGATOR = aggregator
+
+    if processes := json_config.get('processes'):
+        config.PROCESSES = processes
+
+    if scan_history := json_config.get('scan_history'):
+        config.SCAN_HISTORY_FILE = scan_history
+
+    if skip_after := json_config.get('skip_empty_after'):
+        config.SCAN_HISTORY_SKIP_AFTER = skip_after
+
+    if (refresh_interval := json_config.get('full_refresh_interval')) is not None:
+        config.SCAN_HISTORY_REFRESH_INTERVAL = refresh_interval
+
+    if (cache_ttl := json_config.get('bootstrap_cache_ttl')) is not None:
+        config.BOOTSTRAP_CACHE_TTL = cache_ttl
+
+    if json_config.get('pipeline') is True:
+        config.PIPELINE = True
+
+    if queue_size := json_config.get('pipeline_queue_size'):
+        config.PIPELINE_QUEUE_SIZE = queue_size
+
+    if (retry_rounds := json_config.get('retry_rounds')) is not None:
+        config.RETRY_ROUNDS = retry_rounds
+
+    if (retry_backoff := json_config.get('retry_backoff')) is not None:
+        config.RETRY_BACKOFF = retry_backoff
+
+    if record_dir := json_config.get('record_dir'):
+        config.RECORD_DIR = record_dir
+
+    if replay_dir := json_config.get('replay_dir'):
+        config.REPLAY_DIR = replay_dir
+
+    if (latency_scale := json_config.get('replay_latency_scale')) is not None:
+        config.REPLAY_LATENCY_SCALE = latency_scale
+
+    if json_config.get('metrics') is True:
+        config.METRICS = True
+
+    if metrics_port := json_config.get('metrics_port'):
+        config.METRICS_PORT = metrics_port
+
+    if metrics_textfile := json_config.get('metrics_textfile'):
+        config.METRICS_TEXTFILE = metrics_textfile
+
+    if trace_file := json_config.get('trace_file'):
+        config.TRACE_FILE = trace_file
+
+    if trace_endpoint := json_config.get('trace_endpoint'):
+        config.TRACE_ENDPOINT = trace_endpoint
+
+    if profile_cpu := json_config.get('profile_cpu'):
+        config.PROFILE_CPU = profile_cpu
+
+    if flamegraph := json_config.get('profile_cpu_flamegraph'):
+        config.PROFILE_CPU_FLAMEGRAPH = flamegraph
@@ -0,0 +1,265 @@
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from config import config
+from engine.scan import scan_work_unit, terminate_work_unit
+from engine.scheduler import build_terminate_graph
+from registry import DeleteResponse, async_query_registry, async_terminate_registry
+from utils.aws import (
+    apply_client_hooks,
+    get_session_account_id,
+    get_session_profile,
+)
+from utils.prometheus import deletions_in_flight
+from utils.resource import ResourceRef, to_resource_refs
+from utils.throttle import register_adaptive_concurrency, register_rate_limits_async
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import AioSession
+except ImportError:
+    AioSession = None
+
+
+class AsyncSession:
+    """
+    Hands out aiobotocore clients, cached per (service, region) for the run.
+
+    Async service functions receive this in place of the boto3 session and
+    use `await session.client(...)` to get a client.
+    """
+
+    def __init__(
+        self,
+        profile_name: Optional[str],
+        max_pool_connections: int,
+        account_id: Optional[str] = None,
+    ):
+        if AioSession is None:
+            raise SystemError('The async engine requires aiobotocore to be installed.')
+
+        self._session = AioSession(profile=profile_name)
+        self._config = AioConfig(max_pool_connections=max_pool_connections)
+        self._account_id = account_id
+        self._clients: dict[tuple[str, Optional[str]], object] = {}
+        self._exit_stack = contextlib.AsyncExitStack()
+        self._lock = asyncio.Lock()
+
+    async def client(self, service_name: str, region_name: Optional[str] = None):
+        key = (service_name, region_name)
+
+        async with self._lock:
+            if key not in self._clients:
+                client = await self._exit_stack.enter_async_context(
+                    self._session.create_client(
+                        service_name, region_name=region_name, config=self._config
+                    )
+                )
+                if config.ADAPTIVE_CONCURRENCY:
+                    register_adaptive_concurrency(client, config.MAX_CONCURRENCY)
+                register_rate_limits_async(client, self._account_id)
+                apply_client_hooks(client, is_async=True)
+                self._clients[key] = client
+
+        return self._clients[key]
+
+    async def close(self) -> None:
+        await self._exit_stack.aclose()
+
+
+async def as_completed_results(coroutines: list) -> AsyncIterator:
+    tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+
+    try:
+        for completed in asyncio.as_completed(tasks):
+            yield await completed
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def iter_async_results(
+    session, max_workers: int, make_results: Callable[..., AsyncIterator]
+) -> Iterator:
+    """
+    Drive an async iterator on a private event loop from synchronous code.
+
+    Args:
+        session: The Boto3 session object.
+        max_workers (int): Executor threads, and the fewest connections per
+            client.
+        make_results (Callable): Builds the async iterator from the
+            AsyncSession and the executor for sync fallbacks.
+
+    Yields:
+        Each result of the async iterator.
+
+    """
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def results_with_session():
+        aio_session = AsyncSession(
+            get_session_profile(session),
+            max(max_workers, config.MAX_CONCURRENCY),
+            get_session_account_id(session),
+        )
+
+        try:
+            async with contextlib.aclosing(
+                make_results(aio_session, executor)
+            ) as results:
+                async for result in results:
+                    yield result
+        finally:
+            await aio_session.close()
+
+    results = results_with_session()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(anext(results))
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(results.aclose())
+        executor.shutdown(wait=False, cancel_futures=True)
+        loop.close()
+
+
+async def scan_work_unit_async(
+    aio_session: AsyncSession,
+    session,
+    executor: ThreadPoolExecutor,
+    region: str,
+    resource_type: str,
+) -> tuple[str, str, list[ResourceRef]]:
+    if query_function := async_query_registry.get(resource_type):
+        resource_arns = to_resource_refs(
+            await query_function(aio_session, region) or []
+        )
+    else:
+        resource_arns = await asyncio.get_running_loop().run_in_executor(
+            executor, scan_work_unit, session, region, resource_type
+        )
+
+    return region, resource_type, resource_arns or []
+
+
+def iter_async_scan_results(
+    session,
+    work_units: list[tuple[str, str]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    """
+    Scan every (region, resource_type) work unit on a single event loop.
+
+    Async query functions run as coroutines, sync ones run in an executor.
+
+    Args:
+        session: The Boto3 session object.
+        work_units (list[tuple[str, str]]): The (region, resource_type) pairs.
+        max_workers (Optional[int]): Concurrency, defaults to config.MAX_WORKERS.
+
+    Yields:
+        tuple[str, str, list[ResourceRef]]: The region, resource type and found ARNs.
+
+    """
+    yield from iter_async_results(
+        session,
+        max_workers or config.MAX_WORKERS,
+        lambda aio_session, executor: as_completed_results(
+            [
+                scan_work_unit_async(
+                    aio_session, session, executor, region, resource_type
+                )
+                for region, resource_type in work_units
+            ]
+        ),
+    )
+
+
+async def terminate_work_unit_async(
+    aio_session: AsyncSession,
+    session,
+    executor: ThreadPoolExecutor,
+    region: str,
+    resource_type: str,
+    resource_arns: list[ResourceRef],
+) -> tuple[str, str, Optional[DeleteResponse]]:
+    if terminate_function := async_terminate_registry.get(resource_type):
+        with deletions_in_flight(region, resource_type, len(resource_arns)):
+            response = await terminate_function(aio_session, region, resource_arns)
+    else:
+        response = await asyncio.get_running_loop().run_in_executor(
+            executor, terminate_work_unit, session, region, resource_type, resource_arns
+        )
+
+    return region, resource_type, response
+
+
+async def scheduled_terminate_results(
+    aio_session: AsyncSession,
+    session,
+    executor: ThreadPoolExecutor,
+    retrieved_resources: dict[str, dict[str, list[ResourceRef]]],
+) -> AsyncIterator:
+    graph = build_terminate_graph(retrieved_resources)
+    tasks: dict[asyncio.Task, tuple[str, str]] = {}
+
+    try:
+        while graph.is_active():
+            for region, resource_type in graph.get_ready():
+                task = asyncio.create_task(
+                    terminate_work_unit_async(
+                        aio_session,
+                        session,
+                        executor,
+                        region,
+                        resource_type,
+                        retrieved_resources[region][resource_type],
+                    )
+                )
+                tasks[task] = (region, resource_type)
+
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                graph.done(tasks.pop(task))
+                yield task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def iter_async_terminate_responses(
+    session,
+    retrieved_resources: dict[str, dict[str, list[ResourceRef]]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[str, str, Optional[DeleteResponse]]]:
+    """
+    Terminate resources in dependency order on a single event loop.
+
+    Each (region, resource_type) starts as soon as its prerequisites in that
+    region have finished, so independent types and regions run concurrently.
+
+    Args:
+        session: The Boto3 session object.
+        retrieved_resources (dict): The {region: {type: [arns]}} to terminate.
+        max_workers (Optional[int]): Concurrency, defaults to config.MAX_WORKERS.
+
+    Yields:
+        tuple[str, str, Optional[DeleteResponse]]: The region, resource type
+            and terminate response.
+
+    """
+    yield from iter_async_results(
+        session,
+        max_workers or config.MAX_WORKERS,
+        lambda aio_session, executor: scheduled_terminate_results(
+            aio_session, session, executor, retrieved_resources
+        ),
+    )
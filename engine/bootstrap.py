@@ -0,0 +1,139 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import boto3
+
+from config import config
+from utils.aws import (
+    AccountContext,
+    get_client,
+    get_enabled_regions,
+    get_session_profile,
+    set_account_context,
+)
+
+BOOTSTRAP_CACHE_DIR = Path.home() / '.cache' / 'aws-apocalypse'
+
+
+def get_cache_path(session: boto3.session.Session) -> Path:
+    """
+    Get the bootstrap cache file for the session's profile and credentials.
+
+    The access key is part of the key so that switching credentials under the
+    same (or no) profile never reuses another account's details.
+
+    Args:
+        session: The Boto3 session object.
+
+    Returns:
+        Path: The cache file path.
+
+    """
+    credentials = session.get_credentials()
+    access_key = credentials.access_key if credentials else ''
+    profile_name = get_session_profile(session) or 'default'
+
+    digest = hashlib.sha256(f'{profile_name}:{access_key}'.encode()).hexdigest()
+    return BOOTSTRAP_CACHE_DIR / f'bootstrap-{profile_name}-{digest[:16]}.json'
+
+
+def load_cached_context(cache_path: Path, ttl: int) -> Optional[AccountContext]:
+    try:
+        cached = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - cached.get('timestamp', 0) > ttl:
+        return None
+
+    try:
+        return AccountContext(
+            account_id=cached['account_id'],
+            partition=cached['partition'],
+            enabled_regions=tuple(cached['enabled_regions']),
+        )
+    except (KeyError, TypeError):
+        return None
+
+
+def save_cached_context(cache_path: Path, account_context: AccountContext) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps(
+                {
+                    'timestamp': time.time(),
+                    'account_id': account_context.account_id,
+                    'partition': account_context.partition,
+                    'enabled_regions': list(account_context.enabled_regions),
+                }
+            )
+        )
+    except OSError:
+        # The cache is only an optimisation, e.g. Lambda has a read-only home
+        pass
+
+
+def get_caller_identity(session: boto3.session.Session) -> dict:
+    return get_client(session, 'sts').get_caller_identity()
+
+
+def resolve_account_context(session: boto3.session.Session) -> AccountContext:
+    """
+    Resolve the account ID, partition and enabled regions concurrently.
+
+    Args:
+        session: The Boto3 session object.
+
+    Returns:
+        AccountContext: The resolved account details.
+
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        identity = pool.submit(get_caller_identity, session)
+        enabled_regions = pool.submit(get_enabled_regions, session)
+
+        caller_identity = identity.result()
+        return AccountContext(
+            account_id=caller_identity['Account'],
+            partition=caller_identity['Arn'].split(':')[1],
+            enabled_regions=tuple(enabled_regions.result()),
+        )
+
+
+def bootstrap_session(
+    session: boto3.session.Session, cache_ttl: Optional[int] = None
+) -> AccountContext:
+    """
+    Resolve the account details once and expose them to every service function.
+
+    When a cache TTL is configured, details from a previous run with the same
+    profile and credentials are reused until they expire.
+
+    Args:
+        session: The Boto3 session object.
+        cache_ttl (Optional[int]): Cache lifetime in seconds, defaults to
+            config.BOOTSTRAP_CACHE_TTL. 0 disables the on-disk cache.
+
+    Returns:
+        AccountContext: The account details for the session.
+
+    Raises:
+        botocore.exceptions.ClientError: If the account details can't be retrieved.
+
+    """
+    cache_ttl = config.BOOTSTRAP_CACHE_TTL if cache_ttl is None else cache_ttl
+    cache_path = get_cache_path(session) if cache_ttl > 0 else None
+
+    account_context = cache_path and load_cached_context(cache_path, cache_ttl)
+    if not account_context:
+        account_context = resolve_account_context(session)
+        if cache_path:
+            save_cached_context(cache_path, account_context)
+
+    set_account_context(session, account_context)
+    return account_context
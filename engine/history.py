@@ -0,0 +1,143 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from config import config
+from utils.aws import get_account_id
+from utils.resource import ResourceRef
+
+# The history for this run, loaded on first use
+_history: Optional['ScanHistory'] = None
+
+
+class ScanHistory:
+    """
+    Per (region, resource_type) results of previous scans, for one account.
+
+    The state file holds every account's history, keyed by account ID:
+
+        {account_id: {"pairs": {"region|type": {...}}}}
+
+    Each pair records its last result count, when it was last scanned and how
+    many scans in a row it has been empty. Refreshes are due per pair, so runs
+    narrowed to some regions or resource types never delay the others'.
+    """
+
+    def __init__(self, path: Path, account_id: str):
+        self.path = path
+        self.account_id = account_id
+        self.skipped: list[tuple[str, str]] = []
+
+        try:
+            self._state = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self._state = {}
+
+        self._account = self._state.setdefault(account_id, {'pairs': {}})
+
+    @staticmethod
+    def get_pair_key(region: str, resource_type: str) -> str:
+        return f'{region}|{resource_type}'
+
+    def is_known_empty(self, region: str, resource_type: str) -> bool:
+        # Empty on each of the last N scans, the latest within the refresh interval
+        pair = self._account['pairs'].get(self.get_pair_key(region, resource_type))
+        return (
+            pair is not None
+            and pair['empty_runs'] >= config.SCAN_HISTORY_SKIP_AFTER
+            and time.time() - pair.get('timestamp', 0)
+            < config.SCAN_HISTORY_REFRESH_INTERVAL
+        )
+
+    def skip_known_empty(
+        self, work_units: list[tuple[str, str]]
+    ) -> list[tuple[str, str]]:
+        """
+        Drop the work units that were empty on each of the last N scans.
+
+        A work unit is scanned again once SCAN_HISTORY_REFRESH_INTERVAL has
+        passed since it was last scanned.
+
+        Args:
+            work_units (list[tuple[str, str]]): The work units to filter.
+
+        Returns:
+            list[tuple[str, str]]: The work units to scan.
+
+        """
+        self.skipped = [
+            work_unit for work_unit in work_units if self.is_known_empty(*work_unit)
+        ]
+
+        skipped = set(self.skipped)
+        return [work_unit for work_unit in work_units if work_unit not in skipped]
+
+    def update(self, region: str, resource_type: str, count: int) -> None:
+        pair = self._account['pairs'].setdefault(
+            self.get_pair_key(region, resource_type), {'empty_runs': 0}
+        )
+        pair['count'] = count
+        pair['timestamp'] = time.time()
+        pair['empty_runs'] = 0 if count else pair['empty_runs'] + 1
+
+    def save(self) -> None:
+        # Write then rename, so an interrupted run never leaves a truncated file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f'{self.path.name}.tmp')
+        temporary_path.write_text(json.dumps(self._state, indent=2))
+        os.replace(temporary_path, self.path)
+
+    def record(
+        self, results: Iterator[tuple[str, str, list[ResourceRef]]]
+    ) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+        """
+        Record each scan result as it passes through, saving once all are seen.
+
+        Args:
+            results (Iterator): The (region, resource_type, arns) scan results.
+
+        Yields:
+            tuple[str, str, list[ResourceRef]]: Each scan result, unchanged.
+
+        """
+        for region, resource_type, resource_arns in results:
+            self.update(region, resource_type, len(resource_arns))
+            yield region, resource_type, resource_arns
+
+        self.save()
+
+
+def get_scan_history(session) -> Optional[ScanHistory]:
+    """
+    Get this run's scan history, if one is configured.
+
+    Args:
+        session: The Boto3 session object.
+
+    Returns:
+        Optional[ScanHistory]: The history for the session's account, or None
+            when config.SCAN_HISTORY_FILE isn't set.
+
+    """
+    global _history
+
+    if not config.SCAN_HISTORY_FILE:
+        return None
+
+    if _history is None:
+        _history = ScanHistory(
+            Path(config.SCAN_HISTORY_FILE).expanduser(), get_account_id(session)
+        )
+
+    return _history
+
+
+def get_skipped_work_units() -> list[tuple[str, str]]:
+    return _history.skipped if _history else []
+
+
+def clear_scan_history() -> None:
+    global _history
+    _history = None
@@ -0,0 +1,162 @@
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from config import config
+from engine.scan import terminate_work_unit
+from engine.scheduler import get_prerequisites
+from registry import DeleteResponse
+from utils.resource import ResourceRef
+
+# Put on the scan queue once every work unit has been scanned
+_SCAN_COMPLETE = object()
+
+
+def produce_scan_results(
+    scan_results: Iterator,
+    scan_queue: queue.Queue,
+    wakeup: threading.Event,
+    stopping: threading.Event,
+) -> None:
+    def put(item) -> bool:
+        # Give up if the consumer has stopped, rather than blocking forever
+        while not stopping.is_set():
+            try:
+                scan_queue.put(item, timeout=0.1)
+                wakeup.set()
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for result in scan_results:
+            if not put(result):
+                return
+    except Exception as e:
+        put(e)
+        return
+
+    put(_SCAN_COMPLETE)
+
+
+def iter_pipeline_responses(
+    session,
+    work_units: list[tuple[str, str]],
+    scan_results: Iterator[tuple[str, str, list[ResourceRef]]],
+    retrieved_resources: dict[str, dict[str, list[ResourceRef]]],
+    max_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> Iterator[tuple[str, str, Optional[DeleteResponse]]]:
+    """
+    Terminate each work unit's resources as soon as they've been scanned.
+
+    Scanning runs in the background, feeding a bounded queue. A work unit is
+    terminated once it's been scanned and its prerequisites in the region have
+    been scanned and terminated, so scanning and termination overlap.
+
+    Args:
+        session: The Boto3 session object.
+        work_units (list[tuple[str, str]]): The (region, resource_type) pairs.
+        scan_results (Iterator): The scan results for the work units.
+        retrieved_resources (dict): Filled with {region: {type: [arns]}} as
+            resources are found.
+        max_workers (Optional[int]): Terminate threads, defaults to config.MAX_WORKERS.
+        queue_size (Optional[int]): Scanned batches to buffer, defaults to
+            config.PIPELINE_QUEUE_SIZE.
+
+    Yields:
+        tuple[str, str, Optional[DeleteResponse]]: The region, resource type
+            and terminate response.
+
+    """
+    region_types = defaultdict(set)
+    for region, resource_type in work_units:
+        region_types[region].add(resource_type)
+
+    prerequisites = {
+        (region, resource_type): {
+            (region, prerequisite)
+            for prerequisite in get_prerequisites(resource_type, region_types[region])
+        }
+        for region, resource_type in work_units
+    }
+
+    scan_queue = queue.Queue(maxsize=queue_size or config.PIPELINE_QUEUE_SIZE)
+    completed = queue.SimpleQueue()
+    wakeup = threading.Event()
+    stopping = threading.Event()
+
+    finished: set[tuple[str, str]] = set()
+    waiting: dict[tuple[str, str], list[ResourceRef]] = {}
+    futures = {}
+    scanning = True
+
+    producer = threading.Thread(
+        target=produce_scan_results,
+        args=(scan_results, scan_queue, wakeup, stopping),
+        daemon=True,
+    )
+
+    def on_terminated(future):
+        completed.put(future)
+        wakeup.set()
+
+    with ThreadPoolExecutor(max_workers=max_workers or config.MAX_WORKERS) as pool:
+        producer.start()
+
+        try:
+            while scanning or waiting or futures:
+                wakeup.wait()
+                wakeup.clear()
+
+                while True:
+                    try:
+                        item = scan_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    if item is _SCAN_COMPLETE:
+                        scanning = False
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        region, resource_type, resource_arns = item
+                        if resource_arns:
+                            retrieved_resources.setdefault(region, {})[
+                                resource_type
+                            ] = resource_arns
+                            waiting[(region, resource_type)] = resource_arns
+                        else:
+                            finished.add((region, resource_type))
+
+                while True:
+                    try:
+                        future = completed.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    work_unit = futures.pop(future)
+                    finished.add(work_unit)
+                    yield *work_unit, future.result()
+
+                for work_unit in [
+                    work_unit
+                    for work_unit in waiting
+                    if prerequisites[work_unit] <= finished
+                ]:
+                    future = pool.submit(
+                        terminate_work_unit, session, *work_unit, waiting.pop(work_unit)
+                    )
+                    futures[future] = work_unit
+                    future.add_done_callback(on_terminated)
+
+                # Only possible if the declared dependencies contain a cycle
+                if not scanning and not futures and waiting:
+                    raise RuntimeError(
+                        f'Pipeline stalled waiting on prerequisites: {sorted(waiting)}'
+                    )
+        finally:
+            stopping.set()
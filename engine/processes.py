@@ -0,0 +1,137 @@
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Iterator, Optional
+
+import boto3
+
+from config import config
+from registry import init_registry_resources
+from utils.aws import (
+    AccountContext,
+    get_account_context,
+    get_session_profile,
+    set_account_context,
+)
+from utils.cassette import install_cassette
+from utils.metrics import (
+    ApiCallMetrics,
+    drain_api_metrics,
+    install_api_metrics,
+    merge_api_metrics,
+)
+from utils.profiling import install_worker_cpu_profiler
+from utils.resource import ResourceRef
+from utils.tracing import Span, adopt_spans, drain_spans, install_worker_tracing
+
+# The session owned by each worker process, built by init_worker
+_worker_session: Optional[boto3.session.Session] = None
+
+
+def init_worker(
+    profile_name: Optional[str],
+    region_name: Optional[str],
+    config_state: dict,
+    account_context: Optional[AccountContext],
+) -> None:
+    """
+    Prepare a worker process to run registry scans.
+
+    Workers are spawned fresh, so the parent's configuration is copied over and
+    each worker loads the registry, records or replays its own API calls,
+    collects its own API metrics and spans, profiles its own CPU and builds its
+    own boto3 session.
+
+    Args:
+        profile_name (Optional[str]): The AWS profile of the parent session.
+        region_name (Optional[str]): The default region of the parent session.
+        config_state (dict): The parent's configuration values.
+        account_context (Optional[AccountContext]): The parent's bootstrapped
+            account details, so workers don't have to resolve them again.
+
+    Returns:
+        None
+
+    """
+    global _worker_session
+
+    for key, value in config_state.items():
+        setattr(config, key, value)
+
+    # Each worker scans its regions in-process, the parent keeps the history
+    config.PROCESSES = 1
+    config.SCAN_HISTORY_FILE = ''
+
+    init_registry_resources()
+    install_cassette()
+    install_api_metrics()
+    install_worker_tracing()
+    install_worker_cpu_profiler()
+    _worker_session = boto3.session.Session(
+        profile_name=profile_name, region_name=region_name
+    )
+    if account_context:
+        set_account_context(_worker_session, account_context)
+
+
+def scan_region(
+    work_units: list[tuple[str, str]],
+) -> tuple[
+    list[tuple[str, str, list[ResourceRef]]],
+    dict[tuple[str, str, str], ApiCallMetrics],
+    list[Span],
+]:
+    from engine.scan import iter_scan_results
+
+    # The region's API metrics and spans go back with its results, to add to
+    # the parent's
+    results = list(iter_scan_results(_worker_session, work_units))
+    return results, drain_api_metrics(), drain_spans()
+
+
+def iter_process_scan_results(
+    session,
+    work_units: list[tuple[str, str]],
+    processes: Optional[int] = None,
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    """
+    Shard regions across worker processes, each running the normal registry scan.
+
+    Every region is a separate task, so idle workers pick up the next region and
+    results arrive as each region completes.
+
+    Args:
+        session: The Boto3 session object.
+        work_units (list[tuple[str, str]]): The (region, resource_type) pairs.
+        processes (Optional[int]): Worker processes, defaults to config.PROCESSES.
+
+    Yields:
+        tuple[str, str, list[ResourceRef]]: The region, resource type and found ARNs.
+
+    """
+    with ProcessPoolExecutor(
+        max_workers=processes or config.PROCESSES,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(
+            get_session_profile(session),
+            session.region_name,
+            asdict(config),
+            get_account_context(session),
+        ),
+    ) as pool:
+        regional_work_units = defaultdict(list)
+        for region, resource_type in work_units:
+            regional_work_units[region].append((region, resource_type))
+
+        futures = [
+            pool.submit(scan_region, regional_work_units[region])
+            for region in sorted(regional_work_units)
+        ]
+
+        for future in as_completed(futures):
+            results, api_metrics, spans = future.result()
+            merge_api_metrics(api_metrics)
+            adopt_spans(spans)
+            yield from results
@@ -0,0 +1,132 @@
+import time
+from typing import Callable, Iterator, Optional
+
+from config import config
+from registry import DeleteResponse
+from utils.resource import ResourceRef
+from utils.throttle import THROTTLING_ERROR_CODES
+from utils.tracing import span
+
+# How a failed deletion is handled
+RETRY_NOW = 'retry-now'
+RETRY_AFTER_DEPENDENTS = 'retry-after-dependents'
+PERMANENT = 'permanent'
+
+# Transient failures, worth another attempt after a backoff. DeletionTimeout
+# isn't one, the delete was accepted and is still running, so sending it again
+# only fails (i.e. InvalidDBInstanceState) or acts on a terminating resource
+RETRY_NOW_ERROR_CODES = THROTTLING_ERROR_CODES | {
+    'InternalError',
+    'InternalFailure',
+    'InternalServerError',
+    'RequestTimeout',
+    'RequestTimeoutException',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+}
+
+# Failures because something else still uses or is attached to the resource,
+# which may clear once other deletions in the region have finished
+RETRY_AFTER_DEPENDENTS_ERROR_CODES = {
+    'ClusterContainsContainerInstancesException',
+    'ClusterContainsServicesException',
+    'ClusterContainsTasksException',
+    'ConflictException',
+    'DeleteConflict',
+    'DependencyViolation',
+    'IncorrectState',
+    'InvalidCacheClusterState',
+    'InvalidDBClusterStateFault',
+    'InvalidDBInstanceState',
+    'InvalidGroup.InUse',
+    'InvalidNetworkInterface.InUse',
+    'InvalidSnapshot.InUse',
+    'InvalidState',
+    'InvalidStateException',
+    'ResourceConflictException',
+    'ResourceInUse',
+    'ResourceInUseException',
+    'VolumeInUse',
+}
+
+
+def classify_failure(error_code: str) -> str:
+    if error_code in RETRY_NOW_ERROR_CODES:
+        return RETRY_NOW
+    if error_code in RETRY_AFTER_DEPENDENTS_ERROR_CODES:
+        return RETRY_AFTER_DEPENDENTS
+    return PERMANENT
+
+
+def iter_retried_terminate_responses(
+    session,
+    responses: Iterator[tuple[str, str, Optional[DeleteResponse]]],
+    iter_terminate: Callable[..., Iterator[tuple[str, str, Optional[DeleteResponse]]]],
+    rounds: Optional[int] = None,
+    backoff: Optional[float] = None,
+) -> Iterator[tuple[str, str, Optional[DeleteResponse]]]:
+    """
+    Pass terminate responses through, then retry their retryable failures.
+
+    Once every response has been seen, the deferred ARNs are terminated again
+    (in dependency order, with iter_terminate) for up to `rounds` rounds,
+    waiting `backoff` seconds before the first and doubling each round.
+    Transient failures are always retried. Failures caused by dependents are
+    only retried in regions where the previous round deleted something, as
+    nothing else would have changed.
+
+    Args:
+        session: The Boto3 session object.
+        responses (Iterator): The (region, resource_type, response) to pass on.
+        iter_terminate (Callable): Terminates {region: {type: [arns]}}, such
+            as iter_scheduled_terminate_responses.
+        rounds (Optional[int]): Retry rounds, defaults to config.RETRY_ROUNDS.
+        backoff (Optional[float]): Seconds before the first retry round,
+            defaults to config.RETRY_BACKOFF.
+
+    Yields:
+        tuple[str, str, Optional[DeleteResponse]]: Every region, resource type
+            and terminate response, including the retries.
+
+    """
+    rounds = config.RETRY_ROUNDS if rounds is None else rounds
+    delay = config.RETRY_BACKOFF if backoff is None else backoff
+
+    for retry_round in range(rounds + 1):
+        deferred: dict[str, dict[str, list[ResourceRef]]] = {}
+        dependents: dict[str, dict[str, list[ResourceRef]]] = {}
+        progressed: set[str] = set()
+
+        for region, resource_type, response in responses:
+            yield region, resource_type, response
+            if not response:
+                continue
+
+            for arn, outcome in response.outcomes.items():
+                if outcome.successful:
+                    progressed.add(region)
+                    continue
+
+                failure_class = classify_failure(outcome.error_code)
+                if failure_class == PERMANENT:
+                    continue
+
+                retry_resources = deferred if failure_class == RETRY_NOW else dependents
+                retry_resources.setdefault(region, {}).setdefault(
+                    resource_type, []
+                ).append(ResourceRef.from_arn(arn))
+
+        for region in progressed & set(dependents):
+            for resource_type, resource_arns in dependents[region].items():
+                deferred.setdefault(region, {}).setdefault(resource_type, []).extend(
+                    resource_arns
+                )
+
+        if not deferred or retry_round == rounds:
+            return
+
+        with span('retry backoff', **{'apocalypse.retry_round': retry_round}):
+            time.sleep(delay)
+        delay *= 2
+
+        responses = iter_terminate(session, deferred)
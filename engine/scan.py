@@ -0,0 +1,189 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional
+
+from config import config
+from engine.history import get_scan_history
+from registry import DeleteResponse, query_registry, terminate_registry
+from utils.config_inventory import get_config_resources
+from utils.prometheus import count_discovered_resources, deletions_in_flight
+from utils.resource import ResourceRef, to_resource_refs
+
+
+def get_work_units(
+    resource_types: list[str], regions: list[str] | set[str]
+) -> list[tuple[str, str]]:
+    """
+    Build the (region, resource_type) pairs that need scanning.
+
+    Global resources are only scanned in the "global" region and regional
+    resources are never scanned there.
+
+    Args:
+        resource_types (list[str]): The resource types to scan.
+        regions (list[str] | set[str]): The regions to scan.
+
+    Returns:
+        list[tuple[str, str]]: The (region, resource_type) work units.
+
+    """
+    return [
+        (region, resource_type)
+        for resource_type in resource_types
+        for region in sorted(regions)
+        if (region == 'global') == (resource_type in config.GLOBAL_RESOURCES)
+    ]
+
+
+def plan_work_units(
+    session, resource_types: list[str], regions: list[str] | set[str]
+) -> list[tuple[str, str]]:
+    """
+    Build the work units to scan, leaving out those the scan history says are
+    known to be empty.
+
+    Args:
+        session: The Boto3 session object.
+        resource_types (list[str]): The resource types to scan.
+        regions (list[str] | set[str]): The regions to scan.
+
+    Returns:
+        list[tuple[str, str]]: The (region, resource_type) work units to scan.
+
+    """
+    work_units = get_work_units(resource_types, regions)
+
+    if history := get_scan_history(session):
+        return history.skip_known_empty(work_units)
+
+    return work_units
+
+
+def scan_work_unit(session, region: str, resource_type: str) -> list[ResourceRef]:
+    # ARNs are parsed once here, everything downstream works with ResourceRefs
+    if config.DISCOVERY == 'config':
+        # Types Config doesn't record here fall back to their query function
+        resource_arns = get_config_resources(session, region, resource_type)
+        if resource_arns is not None:
+            return to_resource_refs(resource_arns)
+
+    return to_resource_refs(query_registry[resource_type](session, region) or [])
+
+
+def terminate_work_unit(
+    session, region: str, resource_type: str, resource_arns: list[ResourceRef]
+) -> Optional[DeleteResponse]:
+    with deletions_in_flight(region, resource_type, len(resource_arns)):
+        return terminate_registry[resource_type](session, region, resource_arns)
+
+
+def iter_scan_results(
+    session,
+    work_units: list[tuple[str, str]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    """
+    Scan every (region, resource_type) work unit using the configured engine.
+
+    Results are counted for the Prometheus metrics, and recorded in the scan
+    history when one is configured.
+
+    Args:
+        session: The Boto3 session object.
+        work_units (list[tuple[str, str]]): The (region, resource_type) pairs.
+        max_workers (Optional[int]): Concurrency, defaults to config.MAX_WORKERS.
+
+    Yields:
+        tuple[str, str, list[ResourceRef]]: The region, resource type and found ARNs.
+
+    """
+    if config.PROCESSES > 1:
+        from engine.processes import iter_process_scan_results
+
+        results = iter_process_scan_results(session, work_units)
+    elif config.ENGINE == 'async':
+        from engine.async_scan import iter_async_scan_results
+
+        results = iter_async_scan_results(session, work_units, max_workers)
+    else:
+        results = iter_threaded_scan_results(session, work_units, max_workers)
+
+    results = count_discovered_resources(results)
+    if history := get_scan_history(session):
+        return history.record(results)
+
+    return results
+
+
+def iter_threaded_scan_results(
+    session,
+    work_units: list[tuple[str, str]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    """
+    Scan every (region, resource_type) work unit on a bounded thread pool.
+
+    Results are yielded in the calling thread as each work unit completes.
+
+    Args:
+        session: The Boto3 session object.
+        work_units (list[tuple[str, str]]): The (region, resource_type) pairs.
+        max_workers (Optional[int]): Thread pool size, defaults to config.MAX_WORKERS.
+
+    Yields:
+        tuple[str, str, list[ResourceRef]]: The region, resource type and found ARNs.
+
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or config.MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(scan_work_unit, session, region, resource_type): (
+                region,
+                resource_type,
+            )
+            for region, resource_type in work_units
+        }
+
+        for future in as_completed(futures):
+            region, resource_type = futures[future]
+            yield region, resource_type, future.result()
+
+
+def merge_scan_results(
+    results: dict[tuple[str, str], list[ResourceRef]], work_units: list[tuple[str, str]]
+) -> dict[str, dict[str, list[ResourceRef]]]:
+    """
+    Merge per work unit results into the {region: {type: [arns]}} structure.
+
+    Work units are merged in a stable order, regardless of completion order.
+
+    Args:
+        results (dict[tuple[str, str], list[ResourceRef]]): ARNs keyed by work unit.
+        work_units (list[tuple[str, str]]): The work units in output order.
+
+    Returns:
+        dict[str, dict[str, list[ResourceRef]]]: The found resources, empty ones omitted.
+
+    """
+    resource_output: dict[str, dict[str, list[ResourceRef]]] = {}
+
+    for region, resource_type in work_units:
+        if resource_arns := results.get((region, resource_type)):
+            resource_output.setdefault(region, {})[resource_type] = resource_arns
+
+    return resource_output
+
+
+def scan_resources(
+    session,
+    resource_types: list[str],
+    regions: list[str] | set[str],
+    max_workers: Optional[int] = None,
+) -> dict[str, dict[str, list[ResourceRef]]]:
+    work_units = plan_work_units(session, resource_types, regions)
+    results = {
+        (region, resource_type): resource_arns
+        for region, resource_type, resource_arns in iter_scan_results(
+            session, work_units, max_workers
+        )
+    }
+
+    return merge_scan_results(results, work_units)
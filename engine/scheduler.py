@@ -0,0 +1,119 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
+from typing import Iterator, Optional
+
+from config import config
+from engine.scan import terminate_work_unit
+from registry import DeleteResponse, terminate_dependencies
+from utils.resource import ResourceRef
+
+
+def get_prerequisites(resource_type: str, present_types) -> set[str]:
+    """
+    Get the resource types that must be terminated before the given one.
+
+    Dependencies on resource types with nothing to terminate are followed
+    through to their own dependencies, so ordering is kept across gaps.
+
+    Args:
+        resource_type (str): The resource type to be terminated.
+        present_types: The resource types being terminated in the region.
+
+    Returns:
+        set[str]: The present resource types to terminate first.
+
+    """
+    prerequisites = set()
+    pending = list(terminate_dependencies.get(resource_type, ()))
+    seen = set(pending)
+
+    while pending:
+        dependency = pending.pop()
+        if dependency in present_types:
+            prerequisites.add(dependency)
+            continue
+
+        for transitive in terminate_dependencies.get(dependency, ()):
+            if transitive not in seen:
+                seen.add(transitive)
+                pending.append(transitive)
+
+    return prerequisites
+
+
+def build_terminate_graph(
+    retrieved_resources: dict[str, dict[str, list[ResourceRef]]],
+) -> TopologicalSorter:
+    """
+    Build the termination DAG, with a node per (region, resource_type).
+
+    Args:
+        retrieved_resources (dict): The {region: {type: [arns]}} to terminate.
+
+    Returns:
+        TopologicalSorter: The prepared graph.
+
+    Raises:
+        graphlib.CycleError: If the declared dependencies contain a cycle.
+
+    """
+    graph = TopologicalSorter()
+
+    for region, resource_detail in retrieved_resources.items():
+        for resource_type in resource_detail:
+            graph.add(
+                (region, resource_type),
+                *(
+                    (region, prerequisite)
+                    for prerequisite in get_prerequisites(
+                        resource_type, resource_detail
+                    )
+                ),
+            )
+
+    graph.prepare()
+    return graph
+
+
+def iter_scheduled_terminate_responses(
+    session,
+    retrieved_resources: dict[str, dict[str, list[ResourceRef]]],
+    max_workers: Optional[int] = None,
+) -> Iterator[tuple[str, str, Optional[DeleteResponse]]]:
+    """
+    Terminate resources in dependency order on a bounded thread pool.
+
+    Each (region, resource_type) starts as soon as its prerequisites in that
+    region have finished, so independent types and regions run concurrently.
+
+    Args:
+        session: The Boto3 session object.
+        retrieved_resources (dict): The {region: {type: [arns]}} to terminate.
+        max_workers (Optional[int]): Thread pool size, defaults to config.MAX_WORKERS.
+
+    Yields:
+        tuple[str, str, Optional[DeleteResponse]]: The region, resource type
+            and terminate response.
+
+    """
+    graph = build_terminate_graph(retrieved_resources)
+
+    with ThreadPoolExecutor(max_workers=max_workers or config.MAX_WORKERS) as pool:
+        futures = {}
+
+        while graph.is_active():
+            for region, resource_type in graph.get_ready():
+                future = pool.submit(
+                    terminate_work_unit,
+                    session,
+                    region,
+                    resource_type,
+                    retrieved_resources[region][resource_type],
+                )
+                futures[future] = (region, resource_type)
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                region, resource_type = futures.pop(future)
+                graph.done((region, resource_type))
+                yield region, resource_type, future.result()
@@ -1,18 +1,98 @@
+import math
 import os.path
+import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 from importlib import import_module
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Optional
 
 query_registry: dict[str, Callable[..., None]] = {}
 terminate_registry: dict[str, Callable[..., None]] = {}
 
+# Coroutine variants of the above, used by the async engine where available
+async_query_registry: dict[str, Callable[..., None]] = {}
+async_terminate_registry: dict[str, Callable[..., None]] = {}
+
+# Resource types that must be terminated before each resource type
+terminate_dependencies: dict[str, set[str]] = defaultdict(set)
+
+
+@dataclass(frozen=True)
+class CallBudget:
+    """
+    The most API calls a query or terminate function may make for N resources.
+
+    That's `constant` calls, plus `per_page` for every `page_size` resources
+    (for list pages and batch calls), plus `per_resource` for each resource.
+    Budgets are checked by benchmarks/budgets.py (and its tests), so a function
+    that becomes a call per resource (N+1) is caught before it reaches a large
+    account.
+    """
+
+    constant: int = 1
+    per_page: int = 0
+    page_size: int = 100
+    per_resource: int = 0
+
+    def max_calls(self, resource_count: int) -> int:
+        return (
+            self.constant
+            + self.per_page * math.ceil(resource_count / self.page_size)
+            + self.per_resource * resource_count
+        )
+
+
+# API call budgets, declared with each resource type's functions
+query_call_budgets: dict[str, CallBudget] = {}
+terminate_call_budgets: dict[str, CallBudget] = {}
+
+
+@dataclass
+class DeleteOutcome:
+    successful: bool
+    error_code: Optional[str] = None
+    # Seconds from the terminate function starting until this resource was done
+    elapsed: float = 0.0
+
 
 @dataclass
 class DeleteResponse:
-    successful: list = field(default_factory=list)
-    failures: dict[str, list] = field(default_factory=lambda: defaultdict(list))
+    """
+    The outcome of a terminate function, per resource ARN.
+
+    Outcomes are keyed by ARN, so reconciling them against the scanned
+    resources is a lookup per resource rather than a list scan.
+    """
+
+    outcomes: dict[str, DeleteOutcome] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+
+    def mark_successful(self, resource_arn: str) -> None:
+        self.outcomes[resource_arn] = DeleteOutcome(
+            True, elapsed=time.monotonic() - self.started
+        )
+
+    def mark_failed(self, resource_arn: str, error_code: str) -> None:
+        self.outcomes[resource_arn] = DeleteOutcome(
+            False, error_code, time.monotonic() - self.started
+        )
+
+    @property
+    def successful(self) -> tuple[str, ...]:
+        return tuple(
+            resource_arn
+            for resource_arn, outcome in self.outcomes.items()
+            if outcome.successful
+        )
+
+    @property
+    def failures(self) -> dict[str, tuple[str, ...]]:
+        failures = defaultdict(list)
+        for resource_arn, outcome in self.outcomes.items():
+            if not outcome.successful:
+                failures[outcome.error_code].append(resource_arn)
+        return {error_code: tuple(arns) for error_code, arns in failures.items()}
 
 
 def init_registry_resources():
@@ -1,19 +1,76 @@
-from typing import Callable
+from inspect import iscoroutinefunction
+from typing import Callable, Optional
 
-from registry import query_registry, terminate_registry
+from registry import (
+    CallBudget,
+    async_query_registry,
+    async_terminate_registry,
+    query_call_budgets,
+    query_registry,
+    terminate_call_budgets,
+    terminate_dependencies,
+    terminate_registry,
+)
+from utils.metrics import attribute_api_calls
+from utils.tracing import trace_registry_function
 
 
-def register_query_function(resource_type: str) -> Callable:
+def register_query_function(
+    resource_type: str, call_budget: Optional[CallBudget] = None
+) -> Callable:
+    """
+    Register a query function for a resource type.
+
+    Args:
+        resource_type (str): The resource type string.
+        call_budget (Optional[CallBudget]): The most API calls the function
+            may make for N resources.
+
+    """
+    if call_budget:
+        query_call_budgets[resource_type] = call_budget
+
     def decorator(func: Callable[..., None]) -> Callable[..., None]:
-        query_registry[resource_type] = func
+        registered = attribute_api_calls(
+            resource_type, trace_registry_function('query', resource_type, func)
+        )
+        if iscoroutinefunction(func):
+            async_query_registry[resource_type] = registered
+        else:
+            query_registry[resource_type] = registered
         return func
 
     return decorator
 
 
-def register_terminate_function(resource_type: str) -> Callable:
+def register_terminate_function(
+    resource_type: str,
+    depends_on: Optional[list[str]] = None,
+    call_budget: Optional[CallBudget] = None,
+) -> Callable:
+    """
+    Register a terminate function for a resource type.
+
+    Args:
+        resource_type (str): The resource type string.
+        depends_on (Optional[list[str]]): Resource types that have to be
+            terminated, in the same region, before this one can be.
+        call_budget (Optional[CallBudget]): The most API calls the function
+            may make for N resources.
+
+    """
+    terminate_dependencies[resource_type].update(depends_on or [])
+    if call_budget:
+        terminate_call_budgets[resource_type] = call_budget
+
     def decorator(func: Callable[..., None]) -> Callable[..., None]:
-        terminate_registry[resource_type] = func
+        registered = attribute_api_calls(
+            resource_type, trace_registry_function('terminate', resource_type, func)
+        )
+        if iscoroutinefunction(func):
+            async_terminate_registry[resource_type] = registered
+        else:
+            terminate_registry[resource_type] = registered
         return func
 
     return decorator
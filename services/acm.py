@@ -1,14 +1,19 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('CertificateManager::Certificate')
+@register_query_function(
+    'CertificateManager::Certificate',
+    call_budget=CallBudget(per_page=1, per_resource=1),
+)
 def query_acm_certificates(session, region) -> list[str]:
-    acm = session.client('acm', region_name=region)
+    acm = get_client(session, 'acm', region)
     resource_arns = []
 
     certificates = list(
@@ -20,28 +25,42 @@ def query_acm_certificates(session, region) -> list[str]:
     )
 
     for cert_arn in certificates:
-        cert_tags = acm.list_tags_for_certificate(CertificateArn=cert_arn)['Tags']
+        cert_tags = get_resource_tags(
+            session,
+            region,
+            cert_arn,
+            lambda: boto3_tag_list_to_dict(
+                acm.list_tags_for_certificate(CertificateArn=cert_arn)['Tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(cert_tags)):
+        if check_delete(cert_tags):
             resource_arns.append(cert_arn)
 
     return resource_arns
 
 
-@register_terminate_function('CertificateManager::Certificate')
+@register_terminate_function(
+    'CertificateManager::Certificate',
+    depends_on=[
+        'ElasticLoadBalancing::LoadBalancer',
+        'ElasticLoadBalancingV2::LoadBalancer',
+    ],
+    call_budget=CallBudget(per_resource=1),
+)
 def remove_acm_certificates(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    acm = session.client('acm', region_name=region)
+    acm = get_client(session, 'acm', region)
 
     response = DeleteResponse()
 
     for cert_arn in resource_arns:
         try:
-            acm.delete_certificate(CertificateArn=cert_arn)
-            response.successful.append(cert_arn)
+            acm.delete_certificate(CertificateArn=cert_arn.arn)
+            response.mark_successful(cert_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(cert_arn)
+            response.mark_failed(cert_arn, error_code)
 
     return response
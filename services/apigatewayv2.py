@@ -1,14 +1,15 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate
+from utils.aws import boto3_paginate, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('ApiGatewayV2::Api')
+@register_query_function('ApiGatewayV2::Api', call_budget=CallBudget(per_page=1))
 def query_apigatewayv2_apis(session, region) -> list[str]:
-    apigateway = session.client('apigatewayv2', region_name=region)
+    apigateway = get_client(session, 'apigatewayv2', region)
     apis = list(
         boto3_paginate(
             apigateway,
@@ -24,22 +25,24 @@ def query_apigatewayv2_apis(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('ApiGatewayV2::Api')
+@register_terminate_function(
+    'ApiGatewayV2::Api', call_budget=CallBudget(per_resource=1)
+)
 def remove_apigatewayv2_apis(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    apigateway = session.client('apigatewayv2', region_name=region)
+    apigateway = get_client(session, 'apigatewayv2', region)
 
     response = DeleteResponse()
 
     for api_arn in resource_arns:
-        api_id = api_arn.split('/')[-1]
+        api_id = api_arn.name
 
         try:
             apigateway.delete_api(ApiId=api_id)
-            response.successful.append(api_arn)
+            response.mark_successful(api_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(api_arn)
+            response.mark_failed(api_arn, error_code)
 
     return response
@@ -1,14 +1,17 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('AutoScaling::AutoScalingGroup')
+@register_query_function(
+    'AutoScaling::AutoScalingGroup', call_budget=CallBudget(per_page=1)
+)
 def query_autoscaling_groups(session, region) -> list[str]:
-    autoscaling = session.client('autoscaling', region_name=region)
+    autoscaling = get_client(session, 'autoscaling', region)
     groups = list(
         boto3_paginate(
             autoscaling,
@@ -24,30 +27,32 @@ def query_autoscaling_groups(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('AutoScaling::AutoScalingGroup')
+@register_terminate_function(
+    'AutoScaling::AutoScalingGroup', call_budget=CallBudget(per_resource=1)
+)
 def remove_autoscaling_groups(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    autoscaling = session.client('autoscaling', region_name=region)
+    autoscaling = get_client(session, 'autoscaling', region)
 
     response = DeleteResponse()
 
     for group_arn in resource_arns:
         try:
-            autoscaling.delete_auto_scaling_group(
-                AutoScalingGroupName=group_arn.split('/')[-1]
-            )
-            response.successful.append(group_arn)
+            autoscaling.delete_auto_scaling_group(AutoScalingGroupName=group_arn.name)
+            response.mark_successful(group_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(group_arn)
+            response.mark_failed(group_arn, error_code)
 
     return response
 
 
-@register_query_function('AutoScaling::LaunchConfiguration')
+@register_query_function(
+    'AutoScaling::LaunchConfiguration', call_budget=CallBudget(per_page=1)
+)
 def query_autoscaling_launch_configs(session, region) -> list[str]:
-    autoscaling = session.client('autoscaling', region_name=region)
+    autoscaling = get_client(session, 'autoscaling', region)
     return list(
         boto3_paginate(
             autoscaling,
@@ -57,21 +62,25 @@ def query_autoscaling_launch_configs(session, region) -> list[str]:
     )
 
 
-@register_terminate_function('AutoScaling::LaunchConfiguration')
+@register_terminate_function(
+    'AutoScaling::LaunchConfiguration',
+    depends_on=['AutoScaling::AutoScalingGroup'],
+    call_budget=CallBudget(per_resource=1),
+)
 def remove_autoscaling_launch_configs(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    autoscaling = session.client('autoscaling', region_name=region)
+    autoscaling = get_client(session, 'autoscaling', region)
 
     response = DeleteResponse()
 
     for config_arn in resource_arns:
         try:
             autoscaling.delete_launch_configuration(
-                LaunchConfigurationName=config_arn.split('/')[-1]
+                LaunchConfigurationName=config_arn.name
             )
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(config_arn)
+            response.mark_failed(config_arn, error_code)
 
     return response
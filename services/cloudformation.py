@@ -1,14 +1,17 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('CloudFormation::Stack')
+@register_query_function(
+    'CloudFormation::Stack', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_cloudformation_stacks(session, region) -> list[str]:
-    cf = session.client('cloudformation', region_name=region)
+    cf = get_client(session, 'cloudformation', region)
 
     resource_arns = []
 
@@ -31,22 +34,24 @@ def query_cloudformation_stacks(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('CloudFormation::Stack')
+@register_terminate_function(
+    'CloudFormation::Stack', call_budget=CallBudget(per_resource=1)
+)
 def remove_cloudformation_stacks(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    cf = session.client('cloudformation', region_name=region)
+    cf = get_client(session, 'cloudformation', region)
 
     response = DeleteResponse()
 
     for stack_arn in resource_arns:
-        stack_name = stack_arn.split('/')[-2]
+        stack_name = stack_arn.resource_id.split('/')[0]
 
         try:
             cf.delete_stack(StackName=stack_name)
-            response.successful.append(stack_arn)
+            response.mark_successful(stack_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(stack_arn)
+            response.mark_failed(stack_arn, error_code)
 
     return response
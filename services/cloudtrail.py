@@ -1,14 +1,16 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_tag_list_to_dict
+from utils.aws import get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import TagResolver
 
 
-@register_query_function('CloudTrail::Trail')
+@register_query_function('CloudTrail::Trail', call_budget=CallBudget(per_page=2))
 def query_cloudtrail_trails(session, region) -> list[str]:
-    cloudtrail = session.client('cloudtrail', region_name=region)
+    cloudtrail = get_client(session, 'cloudtrail', region)
 
     trails = [
         trail['TrailARN']
@@ -16,33 +18,29 @@ def query_cloudtrail_trails(session, region) -> list[str]:
         if not trail['IsOrganizationTrail'] and trail['HomeRegion'] == region
     ]
 
+    tags = TagResolver(cloudtrail, 'list_tags').resolve(trails)
+
     return [
-        trail_arn
-        for trail_arn in trails
-        if check_delete(
-            boto3_tag_list_to_dict(
-                cloudtrail.list_tags(ResourceIdList=[trail_arn])['ResourceTagList'][0][
-                    'TagsList'
-                ]
-            )
-        )
+        trail_arn for trail_arn, trail_tags in tags.items() if check_delete(trail_tags)
     ]
 
 
-@register_terminate_function('CloudTrail::Trail')
+@register_terminate_function(
+    'CloudTrail::Trail', call_budget=CallBudget(per_resource=1)
+)
 def remove_cloudtrail_trails(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    cloudtrail = session.client('cloudtrail', region_name=region)
+    cloudtrail = get_client(session, 'cloudtrail', region)
 
     response = DeleteResponse()
 
     for trail_arn in resource_arns:
         try:
-            cloudtrail.delete_trail(Name=trail_arn.split('/')[-1])
-            response.successful.append(trail_arn)
+            cloudtrail.delete_trail(Name=trail_arn.resource_id)
+            response.mark_successful(trail_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(trail_arn)
+            response.mark_failed(trail_arn, error_code)
 
     return response
@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('CloudWatch::Alarm')
+@register_query_function(
+    'CloudWatch::Alarm', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_cloudwatch_alarms(session, region) -> list[str]:
-    cloudwatch = session.client('cloudwatch', region_name=region)
+    cloudwatch = get_client(session, 'cloudwatch', region)
     resource_arns = []
 
     for alarm_arn in boto3_paginate(
@@ -17,38 +21,47 @@ def query_cloudwatch_alarms(session, region) -> list[str]:
         AlarmTypes=['MetricAlarm'],
         search='MetricAlarms[].AlarmArn',
     ):
-        alarm_tags = cloudwatch.list_tags_for_resource(ResourceARN=alarm_arn)['Tags']
+        alarm_tags = get_resource_tags(
+            session,
+            region,
+            alarm_arn,
+            lambda: boto3_tag_list_to_dict(
+                cloudwatch.list_tags_for_resource(ResourceARN=alarm_arn)['Tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(alarm_tags)):
+        if check_delete(alarm_tags):
             resource_arns.append(alarm_arn)
 
     return resource_arns
 
 
-@register_terminate_function('CloudWatch::Alarm')
+@register_terminate_function(
+    'CloudWatch::Alarm', call_budget=CallBudget(per_resource=1)
+)
 def remove_cloudwatch_alarms(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    cloudwatch = session.client('cloudwatch', region_name=region)
+    cloudwatch = get_client(session, 'cloudwatch', region)
 
     response = DeleteResponse()
 
     for alarm_arn in resource_arns:
-        alarm_name = alarm_arn.split(':')[-1]
+        alarm_name = alarm_arn.resource_id
 
         try:
             cloudwatch.delete_alarms(AlarmNames=[alarm_name])
-            response.successful.append(alarm_arn)
+            response.mark_successful(alarm_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(alarm_arn)
+            response.mark_failed(alarm_arn, error_code)
 
     return response
 
 
-@register_query_function('CloudWatch::Dashboard')
+@register_query_function('CloudWatch::Dashboard', call_budget=CallBudget(per_page=1))
 def query_cloudwatch_dashboards(session, region) -> list[str]:
-    cloudwatch = session.client('cloudwatch', region_name='us-east-1')
+    cloudwatch = get_client(session, 'cloudwatch', 'us-east-1')
     return [
         dashboard['DashboardArn']
         for dashboard in boto3_paginate(
@@ -57,22 +70,24 @@ def query_cloudwatch_dashboards(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('CloudWatch::Dashboard')
+@register_terminate_function(
+    'CloudWatch::Dashboard', call_budget=CallBudget(per_resource=1)
+)
 def remove_cloudwatch_dashboards(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    cloudwatch = session.client('cloudwatch', region_name='us-east-1')
+    cloudwatch = get_client(session, 'cloudwatch', 'us-east-1')
 
     response = DeleteResponse()
 
     for dasbboard_arn in resource_arns:
-        dashboard_name = dasbboard_arn.split('/')[-1]
+        dashboard_name = dasbboard_arn.resource_id
 
         try:
             cloudwatch.delete_dashboards(DashboardNames=[dashboard_name])
-            response.successful.append(dasbboard_arn)
+            response.mark_successful(dasbboard_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(dasbboard_arn)
+            response.mark_failed(dasbboard_arn, error_code)
 
     return response
@@ -1,14 +1,17 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('DynamoDB::Table')
+@register_query_function(
+    'DynamoDB::Table', call_budget=CallBudget(per_page=1, per_resource=2)
+)
 def query_ddb_tables(session, region) -> list[str]:
-    ddb = session.client('dynamodb', region_name=region)
+    ddb = get_client(session, 'dynamodb', region)
     resource_arns = []
 
     tables = list(
@@ -29,20 +32,22 @@ def query_ddb_tables(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('DynamoDB::Table')
-def remove_ddb_tables(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ddb = session.client('dynamodb', region_name=region)
+@register_terminate_function('DynamoDB::Table', call_budget=CallBudget(per_resource=1))
+def remove_ddb_tables(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ddb = get_client(session, 'dynamodb', region)
 
     response = DeleteResponse()
 
     for table_arn in resource_arns:
-        table_name = table_arn.split('/')[-1]
+        table_name = table_arn.resource_id
 
         try:
             ddb.delete_table(TableName=table_name)
-            response.successful.append(table_arn)
+            response.mark_successful(table_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(table_arn)
+            response.mark_failed(table_arn, error_code)
 
     return response
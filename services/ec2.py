@@ -1,15 +1,24 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_account_id
+from utils.aws import (
+    boto3_paginate,
+    boto3_tag_list_to_dict,
+    get_account_id,
+    get_client,
+    get_resource,
+)
+from utils.deletion import DeletionTracker, get_remaining_ec2_instances
 from utils.general import batch, check_delete
+from utils.resource import ResourceRef
+from utils.tracing import span
 
 
-@register_query_function('EC2::Image')
+@register_query_function('EC2::Image', call_budget=CallBudget(per_page=1))
 def query_ec2_images(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     images = list(
         boto3_paginate(
             ec2,
@@ -26,29 +35,31 @@ def query_ec2_images(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::Image')
-def remove_ec2_images(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+@register_terminate_function('EC2::Image', call_budget=CallBudget(per_resource=1))
+def remove_ec2_images(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for image_arn in resource_arns:
-        image_id = image_arn.split('/')[-1]
+        image_id = image_arn.resource_id
 
         try:
             ec2.deregister_image(ImageId=image_id)
-            response.successful.append(image_arn)
+            response.mark_successful(image_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(image_arn)
+            response.mark_failed(image_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::Instance')
+@register_query_function('EC2::Instance', call_budget=CallBudget(per_page=1))
 def query_ec2_instances(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     if instances := list(
         boto3_paginate(
@@ -72,16 +83,20 @@ def query_ec2_instances(session, region) -> list[str]:
         return []
 
 
-@register_terminate_function('EC2::Instance')
-def remove_ec2_instances(session, region, resource_arns: list[str]) -> DeleteResponse:
+@register_terminate_function(
+    'EC2::Instance', depends_on=['AutoScaling::AutoScalingGroup']
+)
+def remove_ec2_instances(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
-    instance_ids = [instance_arn.split('/')[-1] for instance_arn in resource_arns]
+    instance_ids = [instance_arn.resource_id for instance_arn in resource_arns]
     retained_volume_arns = [
-        f'arn:aws:ec2:{region}:{account_id}:volume/{volume_id}'
+        ResourceRef.from_arn(f'arn:aws:ec2:{region}:{account_id}:volume/{volume_id}')
         for volume_id, volume_tags in boto3_paginate(
             ec2,
             'describe_volumes',
@@ -97,37 +112,46 @@ def remove_ec2_instances(session, region, resource_arns: list[str]) -> DeleteRes
         if check_delete(boto3_tag_list_to_dict(volume_tags))
     ]
 
-    for instance_id in instance_ids:
-        ec2.modify_instance_attribute(
-            InstanceId=instance_id,
-            DisableApiTermination={'Value': False},
-        )
+    terminate_arns = []
+    for instance_arn in resource_arns:
+        try:
+            ec2.modify_instance_attribute(
+                InstanceId=instance_arn.resource_id,
+                DisableApiTermination={'Value': False},
+            )
 
-        ec2.modify_instance_attribute(
-            InstanceId=instance_id,
-            DisableApiStop={'Value': False},
-        )
+            ec2.modify_instance_attribute(
+                InstanceId=instance_arn.resource_id,
+                DisableApiStop={'Value': False},
+            )
+            terminate_arns.append(instance_arn)
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response['Error']['Code']
+            response.mark_failed(instance_arn, error_code)
 
-    # We're doing this in smaller batches
-    for terminate_batch in batch(instance_ids, 50):
-        ec2.terminate_instances(InstanceIds=terminate_batch)
-        ec2.get_waiter('instance_terminated').wait(
-            InstanceIds=terminate_batch, WaiterConfig={'Delay': 10}
+    tracker = DeletionTracker(
+        lambda arns: get_remaining_ec2_instances(ec2, arns), delay=10, max_attempts=40
+    )
+
+    # We're terminating in smaller batches, then waiting on them all together
+    for terminate_batch in batch(terminate_arns, 50):
+        ec2.terminate_instances(
+            InstanceIds=[instance_arn.resource_id for instance_arn in terminate_batch]
         )
-        for instance_id in terminate_batch:
-            response.successful.append(
-                f'arn:aws:ec2:{region}:{account_id}:instance/{instance_id}'
-            )
+        for instance_arn in terminate_batch:
+            tracker.track(instance_arn)
+
+    tracker.wait(response)
 
     remove_ec2_volumes(session, region, retained_volume_arns)
 
     return response
 
 
-@register_query_function('EC2::NetworkInterface')
+@register_query_function('EC2::NetworkInterface', call_budget=CallBudget(per_page=1))
 def query_ec2_network_interfaces(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     interfaces = list(
         boto3_paginate(
             ec2,
@@ -143,31 +167,35 @@ def query_ec2_network_interfaces(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::NetworkInterface')
+@register_terminate_function(
+    'EC2::NetworkInterface',
+    depends_on=['EC2::Instance', 'Lambda::Function'],
+    call_budget=CallBudget(per_resource=1),
+)
 def remove_ec2_network_interfaces(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for interface_arn in resource_arns:
-        interface_id = interface_arn.split('/')[-1]
+        interface_id = interface_arn.resource_id
 
         try:
             ec2.delete_network_interface(NetworkInterfaceId=interface_id)
-            response.successful.append(interface_arn)
+            response.mark_successful(interface_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(interface_arn)
+            response.mark_failed(interface_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::SecurityGroup')
+@register_query_function('EC2::SecurityGroup', call_budget=CallBudget(per_page=1))
 def query_ec2_security_groups(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     security_groups = list(
         boto3_paginate(
@@ -184,11 +212,36 @@ def query_ec2_security_groups(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::SecurityGroup')
+@register_terminate_function(
+    'EC2::SecurityGroup',
+    depends_on=[
+        'AutoScaling::AutoScalingGroup',
+        'DocDB::DBCluster',
+        'DocDB::DBInstance',
+        'EC2::Instance',
+        'EC2::NetworkInterface',
+        'ECS::Cluster',
+        'EFS::FileSystem',
+        'ElastiCache::CacheCluster',
+        'ElastiCache::ServerlessCache',
+        'ElasticLoadBalancing::LoadBalancer',
+        'ElasticLoadBalancingV2::LoadBalancer',
+        'Elasticsearch::Domain',
+        'FSx::FileSystem',
+        'Lambda::Function',
+        'Neptune::DBCluster',
+        'Neptune::DBInstance',
+        'OpenSearchService::Domain',
+        'RDS::Cluster',
+        'RDS::Instance',
+        'Transfer::Server',
+    ],
+    call_budget=CallBudget(per_resource=2),
+)
 def remove_ec2_security_groups(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
@@ -223,24 +276,24 @@ def remove_ec2_security_groups(
 
     # Remove any ingress rule references
     for group_arn in resource_arns:
-        group_id = group_arn.split('/')[-1]
+        group_id = group_arn.resource_id
 
         remove_references_and_wipe_sg(group_id)
 
         try:
             ec2.delete_security_group(GroupId=group_id)
-            response.successful.append(group_arn)
+            response.mark_successful(group_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(group_arn)
+            response.mark_failed(group_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::Snapshot')
+@register_query_function('EC2::Snapshot', call_budget=CallBudget(per_page=1))
 def query_ec2_snapshots(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     snapshots = list(
         boto3_paginate(
             ec2,
@@ -257,29 +310,33 @@ def query_ec2_snapshots(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::Snapshot')
-def remove_ec2_snapshots(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+@register_terminate_function(
+    'EC2::Snapshot', depends_on=['EC2::Image'], call_budget=CallBudget(per_resource=1)
+)
+def remove_ec2_snapshots(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for snapshot_arn in resource_arns:
-        snapshot_id = snapshot_arn.split('/')[-1]
+        snapshot_id = snapshot_arn.resource_id
 
         try:
             ec2.delete_snapshot(SnapshotId=snapshot_id)
-            response.successful.append(snapshot_arn)
+            response.mark_successful(snapshot_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(snapshot_arn)
+            response.mark_failed(snapshot_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::Volume')
+@register_query_function('EC2::Volume', call_budget=CallBudget(per_page=1))
 def query_ec2_volumes(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     volumes = list(
         boto3_paginate(
             ec2,
@@ -296,28 +353,32 @@ def query_ec2_volumes(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::Volume')
-def remove_ec2_volumes(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+@register_terminate_function(
+    'EC2::Volume', depends_on=['EC2::Instance'], call_budget=CallBudget(per_resource=1)
+)
+def remove_ec2_volumes(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for volume_arn in resource_arns:
-        volume_id = volume_arn.split('/')[-1]
+        volume_id = volume_arn.resource_id
         try:
             ec2.delete_volume(VolumeId=volume_id)
-            response.successful.append(volume_arn)
+            response.mark_successful(volume_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(volume_arn)
+            response.mark_failed(volume_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::LaunchTemplate')
+@register_query_function('EC2::LaunchTemplate', call_budget=CallBudget(per_page=1))
 def query_launch_templates(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     templates = list(
         boto3_paginate(
             ec2,
@@ -333,31 +394,35 @@ def query_launch_templates(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::LaunchTemplate')
+@register_terminate_function(
+    'EC2::LaunchTemplate',
+    depends_on=['AutoScaling::AutoScalingGroup'],
+    call_budget=CallBudget(per_resource=1),
+)
 def remove_launch_templates(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for template_arn in resource_arns:
-        template_id = template_arn.split('/')[-1]
+        template_id = template_arn.resource_id
 
         try:
             ec2.delete_launch_template(LaunchTemplateId=template_id)
-            response.successful.append(template_arn)
+            response.mark_successful(template_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(template_arn)
+            response.mark_failed(template_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::VPC')
+@register_query_function('EC2::VPC', call_budget=CallBudget(per_page=1))
 def query_ec2_vpcs(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     vpcs = list(
         boto3_paginate(
@@ -374,15 +439,24 @@ def query_ec2_vpcs(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::VPC')
-def remove_ec2_vpcs(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ec2 = session.resource('ec2', region_name=region)
-    ec2_c = session.client('ec2', region_name=region)
+@register_terminate_function(
+    'EC2::VPC',
+    depends_on=[
+        'EC2::Instance',
+        'EC2::NetworkInterface',
+        'EC2::SecurityGroup',
+    ],
+)
+def remove_ec2_vpcs(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ec2 = get_resource(session, 'ec2', region)
+    ec2_c = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for vpc_arn in resource_arns:
-        vpc_id = vpc_arn.split('/')[-1]
+        vpc_id = vpc_arn.resource_id
         vpc = ec2.Vpc(vpc_id)
 
         gateways = []
@@ -403,7 +477,10 @@ def remove_ec2_vpcs(session, region, resource_arns: list[str]) -> DeleteResponse
 
         if gateways:
             # Wait for NAT Gateways to be removed
-            ec2_c.get_waiter('nat_gateway_deleted').wait(NatGatewayIds=gateways)
+            with span(
+                'waiter nat_gateway_deleted', **{'apocalypse.in_flight': len(gateways)}
+            ):
+                ec2_c.get_waiter('nat_gateway_deleted').wait(NatGatewayIds=gateways)
 
         for eip_allocation in eip_allocations:
             ec2_c.release_address(AllocationId=eip_allocation)
@@ -442,18 +519,18 @@ def remove_ec2_vpcs(session, region, resource_arns: list[str]) -> DeleteResponse
 
         try:
             vpc.delete()
-            response.successful.append(vpc_arn)
+            response.mark_successful(vpc_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(vpc_arn)
+            response.mark_failed(vpc_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::DHCPOptions')
+@register_query_function('EC2::DHCPOptions', call_budget=CallBudget(per_page=1))
 def query_ec2_dhcp_options(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     option_sets = list(
         boto3_paginate(
@@ -470,31 +547,33 @@ def query_ec2_dhcp_options(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::DHCPOptions')
+@register_terminate_function(
+    'EC2::DHCPOptions', depends_on=['EC2::VPC'], call_budget=CallBudget(per_resource=1)
+)
 def remove_ec2_dhcp_options(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for set_arn in resource_arns:
-        set_id = set_arn.split('/')[-1]
+        set_id = set_arn.resource_id
 
         try:
             ec2.delete_dhcp_options(DhcpOptionsId=set_id)
-            response.successful.append(set_arn)
+            response.mark_successful(set_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(set_arn)
+            response.mark_failed(set_arn, error_code)
 
     return response
 
 
-@register_query_function('EC2::EIP')
+@register_query_function('EC2::EIP', call_budget=CallBudget(per_page=1))
 def query_ec2_addresses(session, region) -> list[str]:
     account_id = get_account_id(session)
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client(session, 'ec2', region)
     addresses = ec2.describe_addresses()['Addresses']
     return [
         f'arn:aws:ec2:{region}:{account_id}:eip-allocation/{address["AllocationId"]}'
@@ -503,20 +582,22 @@ def query_ec2_addresses(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('EC2::EIP')
-def remove_ec2_addresses(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ec2 = session.client('ec2', region_name=region)
+@register_terminate_function('EC2::EIP', call_budget=CallBudget(per_resource=1))
+def remove_ec2_addresses(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ec2 = get_client(session, 'ec2', region)
 
     response = DeleteResponse()
 
     for eip_arn in resource_arns:
-        allocation_id = eip_arn.split('/')[-1]
+        allocation_id = eip_arn.resource_id
 
         try:
             ec2.release_address(AllocationId=allocation_id)
-            response.successful.append(eip_arn)
+            response.mark_successful(eip_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(eip_arn)
+            response.mark_failed(eip_arn, error_code)
 
     return response
@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('ECR::Repository')
+@register_query_function(
+    'ECR::Repository', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_ecr_repositories(session, region) -> list[str]:
-    ecr = session.client('ecr', region_name=region)
+    ecr = get_client(session, 'ecr', region)
     resource_arns = []
 
     repositories = list(
@@ -20,30 +24,37 @@ def query_ecr_repositories(session, region) -> list[str]:
     )
 
     for repo_arn in repositories:
-        repo_tags = ecr.list_tags_for_resource(resourceArn=repo_arn)['tags']
+        repo_tags = get_resource_tags(
+            session,
+            region,
+            repo_arn,
+            lambda: boto3_tag_list_to_dict(
+                ecr.list_tags_for_resource(resourceArn=repo_arn)['tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(repo_tags)):
+        if check_delete(repo_tags):
             resource_arns.append(repo_arn)
 
     return resource_arns
 
 
-@register_terminate_function('ECR::Repository')
+@register_terminate_function('ECR::Repository', call_budget=CallBudget(per_resource=1))
 def remove_ecr_repositories(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ecr = session.client('ecr', region_name=region)
+    ecr = get_client(session, 'ecr', region)
 
     response = DeleteResponse()
 
     for repo_arn in resource_arns:
-        repo_name = repo_arn.split('/')[-1]
+        repo_name = repo_arn.resource_id
 
         try:
             ecr.delete_repository(repositoryName=repo_name, force=True)
-            response.successful.append(repo_arn)
+            response.mark_successful(repo_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(repo_arn)
+            response.mark_failed(repo_arn, error_code)
 
     return response
@@ -2,15 +2,18 @@ import time
 
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import TagResolver
+from utils.tracing import span
 
 
-@register_query_function('ECS::Cluster')
+@register_query_function('ECS::Cluster', call_budget=CallBudget(per_page=2))
 def query_ecs_clusters(session, region) -> list[str]:
-    ecs = session.client('ecs', region_name=region)
+    ecs = get_client(session, 'ecs', region)
     resource_arns = []
 
     clusters = list(
@@ -20,10 +23,9 @@ def query_ecs_clusters(session, region) -> list[str]:
             search='clusterArns[]',
         )
     )
-    for cluster_arn in clusters:
-        tags = ecs.list_tags_for_resource(resourceArn=cluster_arn)['tags']
-
-        if not check_delete(boto3_tag_list_to_dict(tags)):
+    tags = TagResolver(ecs, 'describe_clusters').resolve(clusters)
+    for cluster_arn, cluster_tags in tags.items():
+        if not check_delete(cluster_tags):
             continue
 
         resource_arns.append(cluster_arn)
@@ -32,8 +34,10 @@ def query_ecs_clusters(session, region) -> list[str]:
 
 
 @register_terminate_function('ECS::Cluster')
-def remove_ecs_clusters(session, region, resource_arns: list[str]) -> DeleteResponse:
-    ecs = session.client('ecs', region_name=region)
+def remove_ecs_clusters(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    ecs = get_client(session, 'ecs', region)
 
     response = DeleteResponse()
 
@@ -42,42 +46,45 @@ def remove_ecs_clusters(session, region, resource_arns: list[str]) -> DeleteResp
             boto3_paginate(
                 ecs,
                 'list_services',
-                cluster=cluster_arn,
+                cluster=cluster_arn.arn,
                 search='serviceArns[]',
             )
         )
         for service_arn in services:
-            ecs.delete_service(cluster=cluster_arn, service=service_arn, force=True)
+            ecs.delete_service(cluster=cluster_arn.arn, service=service_arn, force=True)
 
         if services:
             # Monitor service removal
             while True:
                 print(f'Draining ECS Cluster (may take a few minutes): {cluster_arn}')
                 service_status = ecs.describe_services(
-                    cluster=cluster_arn, services=services
+                    cluster=cluster_arn.arn, services=services
                 )['services']
                 if [
                     service['serviceArn']
                     for service in service_status
                     if service['status'] in ['DRAINING']
                 ]:
-                    time.sleep(5)
+                    with span('sleep'):
+                        time.sleep(5)
                 else:
                     break
 
         try:
-            ecs.delete_cluster(cluster=cluster_arn)
-            response.successful.append(cluster_arn)
+            ecs.delete_cluster(cluster=cluster_arn.arn)
+            response.mark_successful(cluster_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(cluster_arn)
+            response.mark_failed(cluster_arn, error_code)
 
     return response
 
 
-@register_query_function('ECS::TaskDefinition')
+@register_query_function(
+    'ECS::TaskDefinition', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_ecs_task_definitions(session, region) -> list[str]:
-    ecs = session.client('ecs', region_name=region)
+    ecs = get_client(session, 'ecs', region)
 
     resource_arns = []
 
@@ -97,24 +104,28 @@ def query_ecs_task_definitions(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('ECS::TaskDefinition')
+@register_terminate_function(
+    'ECS::TaskDefinition',
+    depends_on=['ECS::Cluster'],
+    call_budget=CallBudget(per_resource=2),
+)
 def remove_ecs_task_definitions(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    ecs = session.client('ecs', region_name=region)
+    ecs = get_client(session, 'ecs', region)
 
     response = DeleteResponse()
 
     for task_arn in resource_arns:
         # Deregister Task Definition First
-        ecs.deregister_task_definition(taskDefinition=task_arn)
+        ecs.deregister_task_definition(taskDefinition=task_arn.arn)
 
         # Then Delete It
         try:
-            ecs.delete_task_definitions(taskDefinitions=[task_arn])
-            response.successful.append(task_arn)
+            ecs.delete_task_definitions(taskDefinitions=[task_arn.arn])
+            response.mark_successful(task_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(task_arn)
+            response.mark_failed(task_arn, error_code)
 
     return response
@@ -2,15 +2,17 @@ import time
 
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tracing import span
 
 
-@register_query_function('EFS::FileSystem')
+@register_query_function('EFS::FileSystem', call_budget=CallBudget(per_page=1))
 def query_efs_filesystems(session, region) -> list[str]:
-    efs = session.client('efs', region_name=region)
+    efs = get_client(session, 'efs', region)
     filesystems = list(
         boto3_paginate(
             efs,
@@ -27,13 +29,15 @@ def query_efs_filesystems(session, region) -> list[str]:
 
 
 @register_terminate_function('EFS::FileSystem')
-def remove_efs_filesystems(session, region, resource_arns: list[str]) -> DeleteResponse:
-    efs = session.client('efs', region_name=region)
+def remove_efs_filesystems(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    efs = get_client(session, 'efs', region)
 
     response = DeleteResponse()
 
     for fs_arn in resource_arns:
-        fs_id = fs_arn.split('/')[-1]
+        fs_id = fs_arn.resource_id
 
         mount_targets = [
             target['MountTargetId']
@@ -47,16 +51,17 @@ def remove_efs_filesystems(session, region, resource_arns: list[str]) -> DeleteR
         # Monitor Status
         while True:
             if efs.describe_mount_targets(FileSystemId=fs_id)['MountTargets']:
-                time.sleep(5)
+                with span('sleep'):
+                    time.sleep(5)
                 continue
             break
 
         # Remove Filesystem
         try:
             efs.delete_file_system(FileSystemId=fs_id)
-            response.successful.append(fs_arn)
+            response.mark_successful(fs_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(fs_arn)
+            response.mark_failed(fs_arn, error_code)
 
     return response
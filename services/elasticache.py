@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('ElastiCache::CacheCluster')
+@register_query_function(
+    'ElastiCache::CacheCluster', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_elasticache_clusters(session, region) -> list[str]:
-    elasticache = session.client('elasticache', region_name=region)
+    elasticache = get_client(session, 'elasticache', region)
     resource_arns = []
 
     clusters = list(
@@ -20,43 +24,54 @@ def query_elasticache_clusters(session, region) -> list[str]:
     )
     for cluster_arn, cluster_id in clusters:
         try:
-            cluster_tags = elasticache.list_tags_for_resource(ResourceName=cluster_arn)[
-                'TagList'
-            ]
+            cluster_tags = get_resource_tags(
+                session,
+                region,
+                cluster_arn,
+                lambda: boto3_tag_list_to_dict(
+                    elasticache.list_tags_for_resource(ResourceName=cluster_arn)[
+                        'TagList'
+                    ]
+                ),
+            )
         except elasticache.exceptions.CacheClusterNotFoundFault:
             # This can happen if the script is run more than once a day
             continue
 
-        if check_delete(boto3_tag_list_to_dict(cluster_tags)):
+        if check_delete(cluster_tags):
             resource_arns.append(cluster_arn)
 
     return resource_arns
 
 
-@register_terminate_function('ElastiCache::CacheCluster')
+@register_terminate_function(
+    'ElastiCache::CacheCluster', call_budget=CallBudget(per_resource=1)
+)
 def remove_elasticache_clusters(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    elasticache = session.client('elasticache', region_name=region)
+    elasticache = get_client(session, 'elasticache', region)
 
     response = DeleteResponse()
 
     for cluster_arn in resource_arns:
-        cluster_id = cluster_arn.split(':')[-1]
+        cluster_id = cluster_arn.resource_id
 
         try:
             elasticache.delete_cache_cluster(CacheClusterId=cluster_id)
-            response.successful.append(cluster_arn)
+            response.mark_successful(cluster_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(cluster_arn)
+            response.mark_failed(cluster_arn, error_code)
 
     return response
 
 
-@register_query_function('ElastiCache::ServerlessCache')
+@register_query_function(
+    'ElastiCache::ServerlessCache', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_elasticache_serverless_clusters(session, region) -> list[str]:
-    elasticache = session.client('elasticache', region_name=region)
+    elasticache = get_client(session, 'elasticache', region)
     resource_arns = []
 
     clusters = list(
@@ -68,34 +83,43 @@ def query_elasticache_serverless_clusters(session, region) -> list[str]:
     )
     for cluster_arn in clusters:
         try:
-            cluster_tags = elasticache.list_tags_for_resource(ResourceName=cluster_arn)[
-                'TagList'
-            ]
+            cluster_tags = get_resource_tags(
+                session,
+                region,
+                cluster_arn,
+                lambda: boto3_tag_list_to_dict(
+                    elasticache.list_tags_for_resource(ResourceName=cluster_arn)[
+                        'TagList'
+                    ]
+                ),
+            )
         except elasticache.exceptions.CacheClusterNotFoundFault:
             continue
 
-        if check_delete(boto3_tag_list_to_dict(cluster_tags)):
+        if check_delete(cluster_tags):
             resource_arns.append(cluster_arn)
 
     return resource_arns
 
 
-@register_terminate_function('ElastiCache::ServerlessCache')
+@register_terminate_function(
+    'ElastiCache::ServerlessCache', call_budget=CallBudget(per_resource=1)
+)
 def remove_elasticache_serverless_clusters(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    elasticache = session.client('elasticache', region_name=region)
+    elasticache = get_client(session, 'elasticache', region)
 
     response = DeleteResponse()
 
     for cluster_arn in resource_arns:
-        cluster_name = cluster_arn.split(':')[-1]
+        cluster_name = cluster_arn.resource_id
 
         try:
             elasticache.delete_serverless_cache(ServerlessCacheName=cluster_name)
-            response.successful.append(cluster_arn)
+            response.mark_successful(cluster_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(cluster_arn)
+            response.mark_failed(cluster_arn, error_code)
 
     return response
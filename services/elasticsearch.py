@@ -1,14 +1,15 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_tag_list_to_dict
+from utils.aws import boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('Elasticsearch::Domain')
+@register_query_function('Elasticsearch::Domain', call_budget=CallBudget(per_page=2))
 def query_opensearch_domains(session, region) -> list[str]:
-    es = session.client('es', region_name=region)
+    es = get_client(session, 'es', region)
     resource_arns = []
 
     domains = [
@@ -31,22 +32,24 @@ def query_opensearch_domains(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('Elasticsearch::Domain')
+@register_terminate_function(
+    'Elasticsearch::Domain', call_budget=CallBudget(per_resource=1)
+)
 def remove_opensearch_domains(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    es = session.client('es', region_name=region)
+    es = get_client(session, 'es', region)
 
     response = DeleteResponse()
 
     for domain_arn in resource_arns:
-        domain_name = domain_arn.split('/')
+        domain_name = domain_arn.resource_id
 
         try:
             es.delete_elasticsearch_domain(DomainName=domain_name)
-            response.successful.append(domain_arn)
+            response.mark_successful(domain_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(domain_arn)
+            response.mark_failed(domain_arn, error_code)
 
     return response
@@ -1,15 +1,20 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_account_id
+from utils.aws import boto3_paginate, get_account_id, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import TagResolver
 
 
-@register_query_function('ElasticLoadBalancing::LoadBalancer')
+@register_query_function(
+    'ElasticLoadBalancing::LoadBalancer',
+    call_budget=CallBudget(per_page=2, page_size=20),
+)
 def query_elb_loadbalancers(session, region) -> list[str]:
     account_id = get_account_id(session)
-    elb = session.client('elb', region_name=region)
+    elb = get_client(session, 'elb', region)
     resource_arns = []
 
     loadbalancers = list(
@@ -20,12 +25,9 @@ def query_elb_loadbalancers(session, region) -> list[str]:
         )
     )
 
-    for lb_name in loadbalancers:
-        tags = elb.describe_tags(LoadBalancerNames=[lb_name])['TagDescriptions'][0][
-            'Tags'
-        ]
-
-        if check_delete(boto3_tag_list_to_dict(tags)):
+    tags = TagResolver(elb, 'describe_tags').resolve(loadbalancers)
+    for lb_name, lb_tags in tags.items():
+        if check_delete(lb_tags):
             resource_arns.append(
                 f'arn:aws:elasticloadbalancing:{region}:{account_id}:loadbalancer/{lb_name}'
             )
@@ -33,22 +35,24 @@ def query_elb_loadbalancers(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('ElasticLoadBalancing::LoadBalancer')
+@register_terminate_function(
+    'ElasticLoadBalancing::LoadBalancer', call_budget=CallBudget(per_resource=1)
+)
 def remove_elb_loadbalancers(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    elb = session.client('elb', region_name=region)
+    elb = get_client(session, 'elb', region)
 
     response = DeleteResponse()
 
     for lb_arn in resource_arns:
-        lb_name = lb_arn.split('/')[-1]
+        lb_name = lb_arn.resource_id
 
         try:
             elb.delete_load_balancer(LoadBalancerName=lb_name)
-            response.successful.append(lb_arn)
+            response.mark_successful(lb_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(lb_arn)
+            response.mark_failed(lb_arn, error_code)
 
     return response
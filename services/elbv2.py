@@ -1,14 +1,19 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import TagResolver
 
 
-@register_query_function('ElasticLoadBalancingV2::LoadBalancer')
+@register_query_function(
+    'ElasticLoadBalancingV2::LoadBalancer',
+    call_budget=CallBudget(per_page=2, page_size=20),
+)
 def query_elbv2_loadbalancers(session, region) -> list[str]:
-    elb = session.client('elbv2', region_name=region)
+    elb = get_client(session, 'elbv2', region)
     resource_arns = []
 
     loadbalancers = list(
@@ -19,37 +24,41 @@ def query_elbv2_loadbalancers(session, region) -> list[str]:
         )
     )
 
-    for lb_arn in loadbalancers:
-        tags = elb.describe_tags(ResourceArns=[lb_arn])['TagDescriptions'][0]['Tags']
-
-        if check_delete(boto3_tag_list_to_dict(tags)):
+    tags = TagResolver(elb, 'describe_tags').resolve(loadbalancers)
+    for lb_arn, lb_tags in tags.items():
+        if check_delete(lb_tags):
             resource_arns.append(lb_arn)
 
     return resource_arns
 
 
-@register_terminate_function('ElasticLoadBalancingV2::LoadBalancer')
+@register_terminate_function(
+    'ElasticLoadBalancingV2::LoadBalancer', call_budget=CallBudget(per_resource=1)
+)
 def remove_elbv2_loadbalancers(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    elb = session.client('elbv2', region_name=region)
+    elb = get_client(session, 'elbv2', region)
 
     response = DeleteResponse()
 
     for lb_arn in resource_arns:
         try:
-            elb.delete_load_balancer(LoadBalancerArn=lb_arn)
-            response.successful.append(lb_arn)
+            elb.delete_load_balancer(LoadBalancerArn=lb_arn.arn)
+            response.mark_successful(lb_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(lb_arn)
+            response.mark_failed(lb_arn, error_code)
 
     return response
 
 
-@register_query_function('ElasticLoadBalancingV2::TargetGroup')
+@register_query_function(
+    'ElasticLoadBalancingV2::TargetGroup',
+    call_budget=CallBudget(per_page=2, page_size=20),
+)
 def query_elbv2_targetgroups(session, region) -> list[str]:
-    elb = session.client('elbv2', region_name=region)
+    elb = get_client(session, 'elbv2', region)
     resource_arns = []
 
     groups = list(
@@ -60,29 +69,35 @@ def query_elbv2_targetgroups(session, region) -> list[str]:
         )
     )
 
-    for group_arn in groups:
-        tags = elb.describe_tags(ResourceArns=[group_arn])['TagDescriptions'][0]['Tags']
-
-        if check_delete(boto3_tag_list_to_dict(tags)):
+    tags = TagResolver(elb, 'describe_tags').resolve(groups)
+    for group_arn, group_tags in tags.items():
+        if check_delete(group_tags):
             resource_arns.append(group_arn)
 
     return resource_arns
 
 
-@register_terminate_function('ElasticLoadBalancingV2::TargetGroup')
+@register_terminate_function(
+    'ElasticLoadBalancingV2::TargetGroup',
+    depends_on=[
+        'AutoScaling::AutoScalingGroup',
+        'ElasticLoadBalancingV2::LoadBalancer',
+    ],
+    call_budget=CallBudget(per_resource=1),
+)
 def remove_elbv2_targetgroups(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    elb = session.client('elbv2', region_name=region)
+    elb = get_client(session, 'elbv2', region)
 
     response = DeleteResponse()
 
     for group_arn in resource_arns:
         try:
-            elb.delete_target_group(TargetGroupArn=group_arn)
-            response.successful.append(group_arn)
+            elb.delete_target_group(TargetGroupArn=group_arn.arn)
+            response.mark_successful(group_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(group_arn)
+            response.mark_failed(group_arn, error_code)
 
     return response
@@ -1,37 +1,48 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('Events::Rule')
+@register_query_function(
+    'Events::Rule', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_eventbridge_rule(session, region) -> list[str]:
-    events = session.client('events', region_name=region)
+    events = get_client(session, 'events', region)
 
     resource_arns = []
 
     rules = boto3_paginate(events, 'list_rules', search='Rules[].Arn')
     for rule_arn in rules:
-        rule_tags = events.list_tags_for_resource(ResourceARN=rule_arn)['Tags']
-
-        if check_delete(boto3_tag_list_to_dict(rule_tags)):
+        rule_tags = get_resource_tags(
+            session,
+            region,
+            rule_arn,
+            lambda: boto3_tag_list_to_dict(
+                events.list_tags_for_resource(ResourceARN=rule_arn)['Tags']
+            ),
+        )
+
+        if check_delete(rule_tags):
             resource_arns.append(rule_arn)
 
     return resource_arns
 
 
-@register_terminate_function('Events::Rule')
+@register_terminate_function('Events::Rule', call_budget=CallBudget(per_resource=3))
 def remove_eventbridge_rule(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    events = session.client('events', region_name=region)
+    events = get_client(session, 'events', region)
 
     response = DeleteResponse()
 
     for rule_arn in resource_arns:
-        rule_name = rule_arn.split('/')[-1]
+        rule_name = rule_arn.name
         try:
             if target_ids := [
                 target['Id']
@@ -39,9 +50,9 @@ def remove_eventbridge_rule(
             ]:
                 events.remove_targets(Rule=rule_name, Ids=target_ids)
             events.delete_rule(Name=rule_name, Force=True)
-            response.successful.append(rule_arn)
+            response.mark_successful(rule_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(rule_arn)
+            response.mark_failed(rule_arn, error_code)
 
     return response
@@ -1,14 +1,15 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('FSx::FileSystem')
+@register_query_function('FSx::FileSystem', call_budget=CallBudget(per_page=1))
 def query_fsx_filesystems(session, region) -> list[str]:
-    fsx = session.client('fsx', region_name=region)
+    fsx = get_client(session, 'fsx', region)
     filesystems = list(
         boto3_paginate(
             fsx,
@@ -24,13 +25,15 @@ def query_fsx_filesystems(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('FSx::FileSystem')
-def remove_fsx_filesystems(session, region, resource_arns: list[str]) -> DeleteResponse:
-    fsx = session.client('fsx', region_name=region)
+@register_terminate_function('FSx::FileSystem', call_budget=CallBudget(per_resource=1))
+def remove_fsx_filesystems(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    fsx = get_client(session, 'fsx', region)
 
     response = DeleteResponse()
 
-    fsx_ids = [arn.split('/')[-1] for arn in resource_arns]
+    fsx_ids = [fs_arn.resource_id for fs_arn in resource_arns]
     filesystems = list(
         boto3_paginate(
             fsx,
@@ -54,9 +57,9 @@ def remove_fsx_filesystems(session, region, resource_arns: list[str]) -> DeleteR
 
         try:
             fsx.delete_file_system(FileSystemId=fs_id, **delete_params)
-            response.successful.append(fs_arn)
+            response.mark_successful(fs_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(fs_arn)
+            response.mark_failed(fs_arn, error_code)
 
     return response
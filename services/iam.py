@@ -1,15 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_tag_list_to_dict
+from utils.aws import boto3_tag_list_to_dict, get_client, get_resource
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('IAM::User')
+@register_query_function(
+    'IAM::User', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_iam_users(session, region) -> list[str]:
-    iam = session.resource('iam')
-    iam_c = session.client('iam')
+    iam = get_resource(session, 'iam')
+    iam_c = get_client(session, 'iam')
     resource_arns = []
 
     for user in iam.users.all():
@@ -23,14 +26,16 @@ def query_iam_users(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('IAM::User')
-def remove_iam_users(session, region, resource_arns: list[str]) -> DeleteResponse:
-    iam = session.resource('iam')
+@register_terminate_function('IAM::User', call_budget=CallBudget(per_resource=7))
+def remove_iam_users(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    iam = get_resource(session, 'iam')
 
     response = DeleteResponse()
 
     for user_arn in resource_arns:
-        username = user_arn.split('/')[-1]
+        username = user_arn.name
         user = iam.User(username)
 
         try:
@@ -46,15 +51,17 @@ def remove_iam_users(session, region, resource_arns: list[str]) -> DeleteRespons
             user.delete()
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(user_arn)
+            response.mark_failed(user_arn, error_code)
 
     return response
 
 
-@register_query_function('IAM::Role')
+@register_query_function(
+    'IAM::Role', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_iam_roles(session, region) -> list[str]:
-    iam = session.resource('iam')
-    iam_c = session.client('iam')
+    iam = get_resource(session, 'iam')
+    iam_c = get_client(session, 'iam')
     resource_arns = []
 
     for role in iam.roles.all():
@@ -73,13 +80,15 @@ def query_iam_roles(session, region) -> list[str]:
 
 
 @register_terminate_function('IAM::Role')
-def remove_iam_roles(session, region, resource_arns: list[str]) -> DeleteResponse:
-    iam = session.resource('iam')
+def remove_iam_roles(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    iam = get_resource(session, 'iam')
 
     response = DeleteResponse()
 
     for role_arn in resource_arns:
-        role_name = role_arn.split('/')[-1]
+        role_name = role_arn.name
         role = iam.Role(role_name)
 
         try:
@@ -97,63 +106,75 @@ def remove_iam_roles(session, region, resource_arns: list[str]) -> DeleteRespons
                 instance_profile.remove_role(RoleName=role.name)
 
             role.delete()
-            response.successful.append(role_arn)
+            response.mark_successful(role_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(role_arn)
+            response.mark_failed(role_arn, error_code)
 
     return response
 
 
-@register_query_function('IAM::InstanceProfile')
+@register_query_function('IAM::InstanceProfile', call_budget=CallBudget(per_page=1))
 def query_iam_instance_profiles(session, region) -> list[str]:
-    iam = session.resource('iam')
+    iam = get_resource(session, 'iam')
     return [instance_profile.arn for instance_profile in iam.instance_profiles.all()]
 
 
-@register_terminate_function('IAM::InstanceProfile')
-def remove_iam_instance_profiles(session, region, resource_arns: list[str]) -> None:
-    iam = session.resource('iam')
+@register_terminate_function(
+    'IAM::InstanceProfile',
+    depends_on=['IAM::Role'],
+    call_budget=CallBudget(per_resource=1),
+)
+def remove_iam_instance_profiles(
+    session, region, resource_arns: list[ResourceRef]
+) -> None:
+    iam = get_resource(session, 'iam')
 
     for profile_arn in resource_arns:
-        profile_name = profile_arn.split('/')[-1]
+        profile_name = profile_arn.name
 
         profile = iam.InstanceProfile(profile_name)
         profile.delete()
 
 
-@register_query_function('IAM::Group')
+@register_query_function('IAM::Group', call_budget=CallBudget(per_page=1))
 def query_iam_groups(session, region) -> list[str]:
-    iam = session.resource('iam')
+    iam = get_resource(session, 'iam')
     return [group.arn for group in iam.groups.all()]
 
 
-@register_terminate_function('IAM::Group')
-def remove_iam_groups(session, region, resource_arns: list[str]) -> DeleteResponse:
-    iam = session.resource('iam')
+@register_terminate_function(
+    'IAM::Group', depends_on=['IAM::User'], call_budget=CallBudget(per_resource=3)
+)
+def remove_iam_groups(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    iam = get_resource(session, 'iam')
 
     response = DeleteResponse()
 
     for group_arn in resource_arns:
-        group_name = group_arn.split('/')[-1]
+        group_name = group_arn.name
         group = iam.Group(group_name)
 
         try:
             for policy in group.attached_policies.all():
                 policy.detach_role(RoleName=group_name)
             group.delete()
-            response.successful.append(group_arn)
+            response.mark_successful(group_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(group_arn)
+            response.mark_failed(group_arn, error_code)
 
     return response
 
 
-@register_query_function('IAM::Policy')
+@register_query_function(
+    'IAM::Policy', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_iam_policies(session, region) -> list[str]:
-    iam = session.resource('iam')
-    iam_c = session.client('iam')
+    iam = get_resource(session, 'iam')
+    iam_c = get_client(session, 'iam')
     resource_arns = []
 
     for policy in iam.policies.filter(Scope='Local'):
@@ -168,14 +189,20 @@ def query_iam_policies(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('IAM::Policy')
-def remove_iam_policies(session, region, resource_arns: list[str]) -> DeleteResponse:
-    iam = session.resource('iam')
+@register_terminate_function(
+    'IAM::Policy',
+    depends_on=['IAM::Group', 'IAM::Role', 'IAM::User'],
+    call_budget=CallBudget(per_resource=3),
+)
+def remove_iam_policies(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    iam = get_resource(session, 'iam')
 
     response = DeleteResponse()
 
     for policy_arn in resource_arns:
-        policy = iam.Policy(policy_arn)
+        policy = iam.Policy(policy_arn.arn)
 
         try:
             # Remove Policy Versions
@@ -185,9 +212,9 @@ def remove_iam_policies(session, region, resource_arns: list[str]) -> DeleteResp
 
             # Delete Policy
             policy.delete()
-            response.successful.append(policy_arn)
+            response.mark_successful(policy_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(policy_arn)
+            response.mark_failed(policy_arn, error_code)
 
     return response
@@ -1,14 +1,19 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
+from utils.deletion import DeletionTracker, get_remaining_kinesis_streams
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('Kinesis:Stream')
+@register_query_function(
+    'Kinesis:Stream', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_kinesis_datastreams(session, region) -> list[str]:
-    kinesis = session.client('kinesis', region_name=region)
+    kinesis = get_client(session, 'kinesis', region)
     resource_arns = []
 
     instances = list(
@@ -20,29 +25,42 @@ def query_kinesis_datastreams(session, region) -> list[str]:
     )
 
     for stream_arn, stream_name in instances:
-        stream_tags = kinesis.list_tags_for_stream(StreamName=stream_name)['Tags']
+        stream_tags = get_resource_tags(
+            session,
+            region,
+            stream_arn,
+            lambda: boto3_tag_list_to_dict(
+                kinesis.list_tags_for_stream(StreamName=stream_name)['Tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(stream_tags)):
+        if check_delete(stream_tags):
             resource_arns.append(stream_arn)
 
     return resource_arns
 
 
-@register_terminate_function('Kinesis:Stream')
+@register_terminate_function('Kinesis:Stream', call_budget=CallBudget(per_resource=1))
 def remove_kinesis_datastreams(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    kinesis = session.client('kinesis', region_name=region)
+    kinesis = get_client(session, 'kinesis', region)
 
     response = DeleteResponse()
+    tracker = DeletionTracker(
+        lambda arns: get_remaining_kinesis_streams(kinesis, arns), delay=10
+    )
 
     for stream_arn in resource_arns:
         try:
-            kinesis.delete_stream(EnforceConsumerDeletion=True, StreamARN=stream_arn)
-            kinesis.get_waiter('stream_not_exists').wait(StreamARN=stream_arn)
-            response.successful.append(stream_arn)
+            kinesis.delete_stream(
+                EnforceConsumerDeletion=True, StreamARN=stream_arn.arn
+            )
+            tracker.track(stream_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(stream_arn)
+            response.mark_failed(stream_arn, error_code)
+
+    tracker.wait(response)
 
     return response
@@ -1,14 +1,15 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('KMS::Key')
+@register_query_function('KMS::Key', call_budget=CallBudget(per_page=1, per_resource=1))
 def query_kms_keys(session, region) -> list[str]:
-    kms = session.client('kms', region_name=region)
+    kms = get_client(session, 'kms', region)
     resource_arns = []
 
     instances = list(
@@ -45,13 +46,15 @@ def query_kms_keys(session, region) -> list[str]:
 
 
 @register_terminate_function('KMS::Key')
-def remove_kms_keys(session, region, resource_arns: list[str]) -> DeleteResponse:
-    kms = session.client('kms', region_name=region)
+def remove_kms_keys(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    kms = get_client(session, 'kms', region)
 
     response = DeleteResponse()
 
     for key_arn in resource_arns:
-        key_id = key_arn.split('/')[-1]
+        key_id = key_arn.resource_id
 
         aliases = list(
             boto3_paginate(
@@ -67,9 +70,9 @@ def remove_kms_keys(session, region, resource_arns: list[str]) -> DeleteResponse
                 kms.delete_alias(AliasName=alias)
 
             kms.schedule_key_deletion(KeyId=key_id, PendingWindowInDays=7)
-            response.successful.append(key_arn)
+            response.mark_successful(key_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(key_arn)
+            response.mark_failed(key_arn, error_code)
 
     return response
@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate
+from utils.aws import boto3_paginate, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('Lambda::Function')
+@register_query_function(
+    'Lambda::Function', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_lambda_functions(session, region) -> list[str]:
-    lmbda = session.client('lambda', region_name=region)
+    lmbda = get_client(session, 'lambda', region)
     resource_arns = []
 
     functions = list(
@@ -19,7 +23,12 @@ def query_lambda_functions(session, region) -> list[str]:
         )
     )
     for function_arn in functions:
-        function_tags = lmbda.list_tags(Resource=function_arn)['Tags']
+        function_tags = get_resource_tags(
+            session,
+            region,
+            function_arn,
+            lambda: lmbda.list_tags(Resource=function_arn)['Tags'],
+        )
 
         if check_delete(function_tags):
             resource_arns.append(function_arn)
@@ -27,30 +36,32 @@ def query_lambda_functions(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('Lambda::Function')
+@register_terminate_function('Lambda::Function', call_budget=CallBudget(per_resource=1))
 def remove_lambda_functions(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    lmbda = session.client('lambda', region_name=region)
+    lmbda = get_client(session, 'lambda', region)
 
     response = DeleteResponse()
 
     for function_arn in resource_arns:
-        function_name = function_arn.split('/')[-1]
+        function_name = function_arn.resource_id
 
         try:
             lmbda.delete_function(FunctionName=function_name)
-            response.successful.append(function_arn)
+            response.mark_successful(function_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(function_arn)
+            response.mark_failed(function_arn, error_code)
 
     return response
 
 
-@register_query_function('Lambda::Layer')
+@register_query_function(
+    'Lambda::Layer', call_budget=CallBudget(per_page=1, page_size=50, per_resource=1)
+)
 def query_lambda_layers(session, region) -> list[str]:
-    lmbda = session.client('lambda', region_name=region)
+    lmbda = get_client(session, 'lambda', region)
     resource_arns = []
 
     layers = list(
@@ -76,22 +87,23 @@ def query_lambda_layers(session, region) -> list[str]:
 
 
 @register_terminate_function('Lambda::Layer')
-def remove_lambda_layers(session, region, resource_arns: list[str]) -> DeleteResponse:
-    lmbda = session.client('lambda', region_name=region)
+def remove_lambda_layers(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    lmbda = get_client(session, 'lambda', region)
 
     response = DeleteResponse()
 
     for layer_arn in resource_arns:
-        layer_name = layer_arn.split('/')[-2]
-        layer_version = layer_arn.split('/')[-1]
+        layer_name, layer_version = layer_arn.resource_id.rsplit(':', 1)
 
         try:
             lmbda.delete_layer_version(
                 LayerName=layer_name, VersionNumber=layer_version
             )
-            response.successful.append(layer_arn)
+            response.mark_successful(layer_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(layer_arn)
+            response.mark_failed(layer_arn, error_code)
 
     return response
@@ -1,14 +1,17 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate
+from utils.aws import boto3_paginate, boto3_paginate_async, get_client, map_async
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('Logs::LogGroup')
+@register_query_function(
+    'Logs::LogGroup', call_budget=CallBudget(per_page=1, page_size=50, per_resource=1)
+)
 def query_logs_loggroups(session, region) -> list[str]:
-    logs = session.client('logs', region_name=region)
+    logs = get_client(session, 'logs', region)
     resource_arns = []
 
     log_groups = [
@@ -21,7 +24,13 @@ def query_logs_loggroups(session, region) -> list[str]:
     ]
 
     for group_arn in log_groups:
-        group_tags = logs.list_tags_for_resource(resourceArn=group_arn)['tags']
+        try:
+            group_tags = logs.list_tags_for_resource(resourceArn=group_arn)['tags']
+        except botocore.exceptions.ClientError as e:
+            # Log groups deleted since they were listed
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                continue
+            raise e
 
         if check_delete(group_tags):
             resource_arns.append(group_arn)
@@ -29,20 +38,76 @@ def query_logs_loggroups(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('Logs::LogGroup')
-def remove_logs_loggroups(session, region, resource_arns: list[str]) -> DeleteResponse:
-    logs = session.client('logs', region_name=region)
+@register_terminate_function('Logs::LogGroup', call_budget=CallBudget(per_resource=1))
+def remove_logs_loggroups(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    logs = get_client(session, 'logs', region)
 
     response = DeleteResponse()
 
     for group_arn in resource_arns:
-        group_name = group_arn.split(':')[-1]
+        group_name = group_arn.resource_id
 
         try:
             logs.delete_log_group(logGroupName=group_name)
-            response.successful.append(group_arn)
+            response.mark_successful(group_arn)
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response['Error']['Code']
+            response.mark_failed(group_arn, error_code)
+
+    return response
+
+
+@register_query_function('Logs::LogGroup')
+async def query_logs_loggroups_async(session, region) -> list[str]:
+    logs = await session.client('logs', region_name=region)
+
+    log_groups = [
+        group_arn[:-2]
+        async for group_arn in boto3_paginate_async(
+            logs,
+            'describe_log_groups',
+            search='logGroups[].arn',
+        )
+    ]
+
+    async def get_group_tags(group_arn: str):
+        try:
+            return (await logs.list_tags_for_resource(resourceArn=group_arn))['tags']
+        except botocore.exceptions.ClientError as e:
+            # Log groups deleted since they were listed
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return None
+            raise e
+
+    group_tags = await map_async(get_group_tags, log_groups)
+
+    return [
+        group_arn
+        for group_arn, tags in zip(log_groups, group_tags)
+        if tags is not None and check_delete(tags)
+    ]
+
+
+@register_terminate_function('Logs::LogGroup')
+async def remove_logs_loggroups_async(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    logs = await session.client('logs', region_name=region)
+
+    response = DeleteResponse()
+
+    async def remove_log_group(group_arn: ResourceRef) -> None:
+        group_name = group_arn.resource_id
+
+        try:
+            await logs.delete_log_group(logGroupName=group_name)
+            response.mark_successful(group_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(group_arn)
+            response.mark_failed(group_arn, error_code)
+
+    await map_async(remove_log_group, resource_arns)
 
     return response
@@ -1,14 +1,23 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
+from utils.deletion import (
+    DeletionTracker,
+    get_remaining_db_clusters,
+    get_remaining_db_instances,
+)
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('Neptune::DBInstance')
+@register_query_function(
+    'Neptune::DBInstance', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_neptune_instances(session, region) -> list[str]:
-    neptune = session.client('neptune', region_name=region)
+    neptune = get_client(session, 'neptune', region)
     resource_arns = []
 
     instances = list(
@@ -20,11 +29,16 @@ def query_neptune_instances(session, region) -> list[str]:
     )
 
     for instance_arn, engine in instances:
-        instance_tags = neptune.list_tags_for_resource(ResourceName=instance_arn)[
-            'TagList'
-        ]
+        instance_tags = get_resource_tags(
+            session,
+            region,
+            instance_arn,
+            lambda: boto3_tag_list_to_dict(
+                neptune.list_tags_for_resource(ResourceName=instance_arn)['TagList']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(instance_tags)) and engine == 'neptune':
+        if check_delete(instance_tags) and engine == 'neptune':
             resource_arns.append(instance_arn)
 
     return resource_arns
@@ -32,14 +46,15 @@ def query_neptune_instances(session, region) -> list[str]:
 
 @register_terminate_function('Neptune::DBInstance')
 def remove_neptune_instances(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    neptune = session.client('neptune', region_name=region)
+    neptune = get_client(session, 'neptune', region)
 
     response = DeleteResponse()
+    tracker = DeletionTracker(lambda arns: get_remaining_db_instances(neptune, arns))
 
     for db_arn in resource_arns:
-        instance_id = db_arn.split('/')[-1]
+        instance_id = db_arn.resource_id
 
         try:
             neptune.delete_db_instance(
@@ -47,20 +62,21 @@ def remove_neptune_instances(
                 SkipFinalSnapshot=True,
                 DeleteAutomatedBackups=True,
             )
-            neptune.get_waiter('db_instance_deleted').wait(
-                DBInstanceIdentifier=instance_id
-            )
-            response.successful.append(db_arn)
+            tracker.track(db_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(db_arn)
+            response.mark_failed(db_arn, error_code)
+
+    tracker.wait(response)
 
     return response
 
 
-@register_query_function('Neptune::DBCluster')
+@register_query_function(
+    'Neptune::DBCluster', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_neptune_clusters(session, region) -> list[str]:
-    neptune = session.client('neptune', region_name=region)
+    neptune = get_client(session, 'neptune', region)
     resource_arns = []
 
     cluster = list(
@@ -72,26 +88,34 @@ def query_neptune_clusters(session, region) -> list[str]:
     )
 
     for cluster_arn, engine in cluster:
-        cluster_tags = neptune.list_tags_for_resource(ResourceName=cluster_arn)[
-            'TagList'
-        ]
+        cluster_tags = get_resource_tags(
+            session,
+            region,
+            cluster_arn,
+            lambda: boto3_tag_list_to_dict(
+                neptune.list_tags_for_resource(ResourceName=cluster_arn)['TagList']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(cluster_tags)) and engine == 'neptune':
+        if check_delete(cluster_tags) and engine == 'neptune':
             resource_arns.append(cluster_arn)
 
     return resource_arns
 
 
-@register_terminate_function('Neptune::DBCluster')
+@register_terminate_function('Neptune::DBCluster', depends_on=['Neptune::DBInstance'])
 def remove_neptune_clusters(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    neptune = session.client('neptune', region_name=region)
+    neptune = get_client(session, 'neptune', region)
 
     response = DeleteResponse()
+    tracker = DeletionTracker(
+        lambda arns: get_remaining_db_clusters(neptune, arns), delay=10
+    )
 
     for cluster_arn in resource_arns:
-        cluster_id = cluster_arn.split('/')[-1]
+        cluster_id = cluster_arn.resource_id
 
         try:
             neptune.delete_db_cluster(
@@ -99,12 +123,11 @@ def remove_neptune_clusters(
                 SkipFinalSnapshot=True,
                 DeleteAutomatedBackups=True,
             )
-            neptune.get_waiter('db_cluster_deleted').wait(
-                DBClusterIdentifier=cluster_id, WaiterConfig={'Delay': 10}
-            )
-            response.successful.append(cluster_arn)
+            tracker.track(cluster_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(cluster_arn)
+            response.mark_failed(cluster_arn, error_code)
+
+    tracker.wait(response)
 
     return response
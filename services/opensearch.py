@@ -1,14 +1,17 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_tag_list_to_dict
+from utils.aws import boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('OpenSearchService::Domain')
+@register_query_function(
+    'OpenSearchService::Domain', call_budget=CallBudget(per_page=1, per_resource=2)
+)
 def query_opensearch_domains(session, region) -> list[str]:
-    opensearch = session.client('opensearch', region_name=region)
+    opensearch = get_client(session, 'opensearch', region)
     resource_arns = []
 
     domains = [
@@ -34,22 +37,24 @@ def query_opensearch_domains(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('OpenSearchService::Domain')
+@register_terminate_function(
+    'OpenSearchService::Domain', call_budget=CallBudget(per_resource=1)
+)
 def remove_opensearch_domains(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    opensearch = session.client('opensearch', region_name=region)
+    opensearch = get_client(session, 'opensearch', region)
 
     response = DeleteResponse()
 
     for domain_arn in resource_arns:
-        domain_name = domain_arn.split('/')[-1]
+        domain_name = domain_arn.resource_id
 
         try:
             opensearch.delete_domain(DomainName=domain_name)
-            response.successful.append(domain_arn)
+            response.mark_successful(domain_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(domain_arn)
+            response.mark_failed(domain_arn, error_code)
 
     return response
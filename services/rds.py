@@ -1,14 +1,20 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
+from utils.deletion import (
+    DeletionTracker,
+    get_remaining_db_clusters,
+    get_remaining_db_instances,
+)
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('RDS::Instance')
+@register_query_function('RDS::Instance', call_budget=CallBudget(per_page=1))
 def query_rds_instances(session, region) -> list[str]:
-    rds = session.client('rds', region_name=region)
+    rds = get_client(session, 'rds', region)
     instances = list(
         boto3_paginate(
             rds,
@@ -26,13 +32,16 @@ def query_rds_instances(session, region) -> list[str]:
 
 
 @register_terminate_function('RDS::Instance')
-def remove_rds_instances(session, region, resource_arns: list[str]) -> DeleteResponse:
-    rds = session.client('rds', region_name=region)
+def remove_rds_instances(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    rds = get_client(session, 'rds', region)
 
     response = DeleteResponse()
+    tracker = DeletionTracker(lambda arns: get_remaining_db_instances(rds, arns))
 
     for db_arn in resource_arns:
-        instance_id = db_arn.split(':')[-1]
+        instance_id = db_arn.resource_id
 
         try:
             rds.delete_db_instance(
@@ -40,18 +49,19 @@ def remove_rds_instances(session, region, resource_arns: list[str]) -> DeleteRes
                 SkipFinalSnapshot=True,
                 DeleteAutomatedBackups=True,
             )
-            rds.get_waiter('db_instance_deleted').wait(DBInstanceIdentifier=instance_id)
-            response.successful.append(db_arn)
+            tracker.track(db_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(db_arn)
+            response.mark_failed(db_arn, error_code)
+
+    tracker.wait(response)
 
     return response
 
 
-@register_query_function('RDS::Cluster')
+@register_query_function('RDS::Cluster', call_budget=CallBudget(per_page=1))
 def query_rds_clusters(session, region) -> list[str]:
-    rds = session.client('rds', region_name=region)
+    rds = get_client(session, 'rds', region)
     cluster = list(
         boto3_paginate(
             rds,
@@ -68,14 +78,19 @@ def query_rds_clusters(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('RDS::Cluster')
-def remove_rds_clusters(session, region, resource_arns: list[str]) -> DeleteResponse:
-    rds = session.client('rds', region_name=region)
+@register_terminate_function('RDS::Cluster', depends_on=['RDS::Instance'])
+def remove_rds_clusters(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    rds = get_client(session, 'rds', region)
 
     response = DeleteResponse()
+    tracker = DeletionTracker(
+        lambda arns: get_remaining_db_clusters(rds, arns), delay=10
+    )
 
     for db_arn in resource_arns:
-        cluster_id = db_arn.split(':')[-1]
+        cluster_id = db_arn.resource_id
 
         try:
             rds.delete_db_cluster(
@@ -83,12 +98,11 @@ def remove_rds_clusters(session, region, resource_arns: list[str]) -> DeleteResp
                 SkipFinalSnapshot=True,
                 DeleteAutomatedBackups=True,
             )
-            rds.get_waiter('db_cluster_deleted').wait(
-                DBClusterIdentifier=cluster_id, WaiterConfig={'Delay': 10}
-            )
-            response.successful.append(db_arn)
+            tracker.track(db_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(db_arn)
+            response.mark_failed(db_arn, error_code)
+
+    tracker.wait(response)
 
     return response
@@ -1,9 +1,10 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_tag_list_to_dict
+from utils.aws import boto3_tag_list_to_dict, get_client, get_resource
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
 def get_bucket_region(s3, bucket_name):
@@ -12,9 +13,11 @@ def get_bucket_region(s3, bucket_name):
     ]
 
 
-@register_query_function('S3::Bucket')
+@register_query_function(
+    'S3::Bucket', call_budget=CallBudget(per_page=1, per_resource=2)
+)
 def query_s3_buckets(session, region) -> list[str]:
-    s3 = session.client('s3')
+    s3 = get_client(session, 's3')
 
     resource_arns = []
 
@@ -28,7 +31,7 @@ def query_s3_buckets(session, region) -> list[str]:
     ]
 
     # Now use a boto3 resource object, quicker for this service.
-    s3 = session.resource('s3')
+    s3 = get_resource(session, 's3')
     for bucket_name in buckets:
         bucket = s3.Bucket(bucket_name)
         try:
@@ -45,23 +48,25 @@ def query_s3_buckets(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('S3::Bucket')
-def remove_s3_buckets(session, region, resource_arns: list[str]) -> DeleteResponse:
-    s3 = session.resource('s3')
+@register_terminate_function('S3::Bucket', call_budget=CallBudget(per_resource=4))
+def remove_s3_buckets(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    s3 = get_resource(session, 's3')
 
     response = DeleteResponse()
 
     for bucket_arn in resource_arns:
-        bucket_name = bucket_arn.split(':')[-1]
+        bucket_name = bucket_arn.resource_id
 
         try:
             bucket = s3.Bucket(bucket_name)
             bucket.Policy().delete()
             bucket.object_versions.all().delete()
             bucket.delete()
-            response.successful.append(bucket_arn)
+            response.mark_successful(bucket_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(bucket_arn)
+            response.mark_failed(bucket_arn, error_code)
 
     return response
@@ -1,14 +1,15 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
 
 
-@register_query_function('SecretsManager::Secret')
+@register_query_function('SecretsManager::Secret', call_budget=CallBudget(per_page=1))
 def query_secretsmanager_secret(session, region) -> list[str]:
-    secretsmanager = session.client('secretsmanager', region_name=region)
+    secretsmanager = get_client(session, 'secretsmanager', region)
     secrets = list(
         boto3_paginate(
             secretsmanager,
@@ -24,22 +25,24 @@ def query_secretsmanager_secret(session, region) -> list[str]:
     ]
 
 
-@register_terminate_function('SecretsManager::Secret')
+@register_terminate_function(
+    'SecretsManager::Secret', call_budget=CallBudget(per_resource=1)
+)
 def remove_secretsmanager_secret(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    secretsmanager = session.client('secretsmanager', region_name=region)
+    secretsmanager = get_client(session, 'secretsmanager', region)
 
     response = DeleteResponse()
 
     for secret_arn in resource_arns:
         try:
             secretsmanager.delete_secret(
-                SecretId=secret_arn, ForceDeleteWithoutRecovery=True
+                SecretId=secret_arn.arn, ForceDeleteWithoutRecovery=True
             )
-            response.successful.append(secret_arn)
+            response.mark_successful(secret_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(secret_arn)
+            response.mark_failed(secret_arn, error_code)
 
     return response
@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('SNS::Topic')
+@register_query_function(
+    'SNS::Topic', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_sns_topics(session, region) -> list[str]:
-    sns = session.client('sns', region_name=region)
+    sns = get_client(session, 'sns', region)
     resource_arns = []
 
     topics = list(
@@ -20,26 +24,35 @@ def query_sns_topics(session, region) -> list[str]:
     )
 
     for topic_arn in topics:
-        topic_tags = sns.list_tags_for_resource(ResourceArn=topic_arn)['Tags']
+        topic_tags = get_resource_tags(
+            session,
+            region,
+            topic_arn,
+            lambda: boto3_tag_list_to_dict(
+                sns.list_tags_for_resource(ResourceArn=topic_arn)['Tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(topic_tags)):
+        if check_delete(topic_tags):
             resource_arns.append(topic_arn)
 
     return resource_arns
 
 
-@register_terminate_function('SNS::Topic')
-def remove_sns_topics(session, region, resource_arns: list[str]) -> DeleteResponse:
-    sns = session.client('sns', region_name=region)
+@register_terminate_function('SNS::Topic', call_budget=CallBudget(per_resource=1))
+def remove_sns_topics(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    sns = get_client(session, 'sns', region)
 
     response = DeleteResponse()
 
     for topic_arn in resource_arns:
         try:
-            sns.delete_topic(TopicArn=topic_arn)
-            response.successful.append(topic_arn)
+            sns.delete_topic(TopicArn=topic_arn.arn)
+            response.mark_successful(topic_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(topic_arn)
+            response.mark_failed(topic_arn, error_code)
 
     return response
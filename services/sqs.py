@@ -1,15 +1,20 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, get_account_id
+from utils.aws import boto3_paginate, get_account_id, get_client, get_partition
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('SQS::Queue')
+@register_query_function(
+    'SQS::Queue', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_sqs_queues(session, region) -> list[str]:
     account_id = get_account_id(session)
-    sqs = session.client('sqs', region_name=region)
+    partition = get_partition(session)
+    sqs = get_client(session, 'sqs', region)
     resource_arns = []
 
     queues = [
@@ -23,9 +28,15 @@ def query_sqs_queues(session, region) -> list[str]:
     ]
 
     for queue_url in queues:
-        queue_arn = f"arn:aws:sqs:{region}:{account_id}:{queue_url.split('/')[-1]}"
+        queue_name = queue_url.split('/')[-1]
+        queue_arn = f'arn:{partition}:sqs:{region}:{account_id}:{queue_name}'
         try:
-            queue_tags = sqs.list_queue_tags(QueueUrl=queue_url).get('Tags', {})
+            queue_tags = get_resource_tags(
+                session,
+                region,
+                queue_arn,
+                lambda: sqs.list_queue_tags(QueueUrl=queue_url).get('Tags', {}),
+            )
         except botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] == 'AWS.SimpleQueueService.NonExistentQueue':
                 continue
@@ -37,23 +48,25 @@ def query_sqs_queues(session, region) -> list[str]:
     return resource_arns
 
 
-@register_terminate_function('SQS::Queue')
-def remove_sqs_queues(session, region, resource_arns: list[str]) -> DeleteResponse:
-    sqs = session.client('sqs', region_name=region)
+@register_terminate_function('SQS::Queue', call_budget=CallBudget(per_resource=1))
+def remove_sqs_queues(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    sqs = get_client(session, 'sqs', region)
 
     response = DeleteResponse()
 
     for queue_arn in resource_arns:
-        account_id = queue_arn.split(':')[4]
-        region = queue_arn.split(':')[3]
-        queue_name = queue_arn.split(':')[-1]
-        queue_url = f'https://sqs.{region}.amazonaws.com/{account_id}/{queue_name}'
+        queue_url = (
+            f'https://sqs.{queue_arn.region}.amazonaws.com/'
+            f'{queue_arn.account_id}/{queue_arn.resource_id}'
+        )
 
         try:
             sqs.delete_queue(QueueUrl=queue_url)
-            response.successful.append(queue_arn)
+            response.mark_successful(queue_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(queue_arn)
+            response.mark_failed(queue_arn, error_code)
 
     return response
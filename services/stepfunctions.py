@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('StepFunctions::StateMachine')
+@register_query_function(
+    'StepFunctions::StateMachine', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_state_machines(session, region) -> list[str]:
-    sfn = session.client('stepfunctions', region_name=region)
+    sfn = get_client(session, 'stepfunctions', region)
     resource_arns = []
 
     machines = list(
@@ -20,26 +24,37 @@ def query_state_machines(session, region) -> list[str]:
     )
 
     for machine_arn, created in machines:
-        repo_tags = sfn.list_tags_for_resource(resourceArn=machine_arn)['tags']
+        repo_tags = get_resource_tags(
+            session,
+            region,
+            machine_arn,
+            lambda: boto3_tag_list_to_dict(
+                sfn.list_tags_for_resource(resourceArn=machine_arn)['tags']
+            ),
+        )
 
-        if check_delete(boto3_tag_list_to_dict(repo_tags)):
+        if check_delete(repo_tags):
             resource_arns.append(machine_arn)
 
     return resource_arns
 
 
-@register_terminate_function('StepFunctions::StateMachine')
-def remove_state_machines(session, region, resource_arns: list[str]) -> DeleteResponse:
-    sfn = session.client('stepfunctions', region_name=region)
+@register_terminate_function(
+    'StepFunctions::StateMachine', call_budget=CallBudget(per_resource=1)
+)
+def remove_state_machines(
+    session, region, resource_arns: list[ResourceRef]
+) -> DeleteResponse:
+    sfn = get_client(session, 'stepfunctions', region)
 
     response = DeleteResponse()
 
     for machine_arn in resource_arns:
         try:
-            sfn.delete_state_machine(stateMachineArn=machine_arn)
-            response.successful.append(machine_arn)
+            sfn.delete_state_machine(stateMachineArn=machine_arn.arn)
+            response.mark_successful(machine_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(machine_arn)
+            response.mark_failed(machine_arn, error_code)
 
     return response
@@ -1,14 +1,18 @@
 import botocore.exceptions
 
-from registry import DeleteResponse
+from registry import CallBudget, DeleteResponse
 from registry.decorator import register_query_function, register_terminate_function
-from utils.aws import boto3_paginate, boto3_tag_list_to_dict
+from utils.aws import boto3_paginate, boto3_tag_list_to_dict, get_client
 from utils.general import check_delete
+from utils.resource import ResourceRef
+from utils.tagging import get_resource_tags
 
 
-@register_query_function('Transfer::Server')
+@register_query_function(
+    'Transfer::Server', call_budget=CallBudget(per_page=1, per_resource=1)
+)
 def query_transfer_servers(session, region) -> list[str]:
-    transfer = session.client('transfer', region_name=region)
+    transfer = get_client(session, 'transfer', region)
     resource_arns = []
 
     servers = list(
@@ -20,16 +24,23 @@ def query_transfer_servers(session, region) -> list[str]:
     )
 
     for server_arn in servers:
-        tags = list(
-            boto3_paginate(
-                transfer,
-                'list_tags_for_resource',
-                Arn=server_arn,
-                search='Tags[]',
-            )
+        tags = get_resource_tags(
+            session,
+            region,
+            server_arn,
+            lambda: boto3_tag_list_to_dict(
+                list(
+                    boto3_paginate(
+                        transfer,
+                        'list_tags_for_resource',
+                        Arn=server_arn,
+                        search='Tags[]',
+                    )
+                )
+            ),
         )
 
-        if check_delete(boto3_tag_list_to_dict(tags)):
+        if check_delete(tags):
             resource_arns.append(server_arn)
 
     return resource_arns
@@ -37,20 +48,20 @@ def query_transfer_servers(session, region) -> list[str]:
 
 @register_terminate_function('Transfer::Server')
 def remove_transfer_servers(
-    session, region, resource_arns: list[str]
+    session, region, resource_arns: list[ResourceRef]
 ) -> DeleteResponse:
-    transfer = session.client('transfer', region_name=region)
+    transfer = get_client(session, 'transfer', region)
 
     response = DeleteResponse()
 
     for server_arn in resource_arns:
-        server_id = server_arn.split('/')[-1]
+        server_id = server_arn.resource_id
 
         try:
             transfer.delete_server(ServerId=server_id)
-            response.successful.append(server_arn)
+            response.mark_successful(server_arn)
         except botocore.exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
-            response.failures[error_code].append(server_arn)
+            response.mark_failed(server_arn, error_code)
 
     return response
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.budgets import (
+    RESOURCE_COUNTS,
+    check_budgets,
+    is_within_budget,
+    unpaced_calls,
+)
+from config import config
+from registry import init_registry_resources, query_call_budgets, terminate_call_budgets
+from utils import TAGGING_API_RESOURCE_TYPES
+from utils.aws import clear_client_cache, clear_client_hooks
+from utils.tagging import clear_tag_indexes
+
+
+@pytest.fixture(scope='module', autouse=True)
+def stubbed_account():
+    # Nothing reaches AWS, but never risk a real profile's credentials
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.delenv('AWS_PROFILE', raising=False)
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'budgets')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'budgets')
+        monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+
+        # Services are found relative to the repository root
+        monkeypatch.chdir(Path(__file__).parent.parent)
+        init_registry_resources()
+
+        with unpaced_calls():
+            yield
+
+    clear_client_cache()
+    clear_client_hooks()
+    clear_tag_indexes()
+
+
+def get_over_budget(results: dict[tuple[str, str], dict]) -> dict[str, object]:
+    return {
+        f'{resource_type} {function_kind}': result['error'] or result['calls']
+        for (resource_type, function_kind), result in results.items()
+        if not is_within_budget(result)
+    }
+
+
+@pytest.mark.parametrize('resource_count', RESOURCE_COUNTS)
+def test_functions_stay_within_their_budgets(resource_count):
+    resource_types = sorted(set(query_call_budgets) | set(terminate_call_budgets))
+
+    results = check_budgets(resource_types, resource_count)
+
+    assert get_over_budget(results) == {}
+
+
+@pytest.mark.parametrize('resource_count', RESOURCE_COUNTS)
+def test_tagging_api_discovery_makes_no_call_per_resource(resource_count, monkeypatch):
+    monkeypatch.setattr(config, 'DISCOVERY', 'tagging-api')
+
+    results = check_budgets(
+        sorted(TAGGING_API_RESOURCE_TYPES), resource_count, 'tagging-api'
+    )
+
+    assert {resource_type for resource_type, _ in results} == set(
+        TAGGING_API_RESOURCE_TYPES
+    )
+    assert get_over_budget(results) == {}
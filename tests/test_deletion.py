@@ -0,0 +1,88 @@
+import botocore.exceptions
+import pytest
+
+import utils.deletion
+from registry import DeleteResponse
+from utils.deletion import DeletionTracker
+from utils.resource import ResourceRef
+
+INSTANCE_ARNS = [
+    ResourceRef.from_arn(f'arn:aws:rds:us-east-1:123456789012:db:instance-{index}')
+    for index in range(3)
+]
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(utils.deletion.time, 'sleep', slept.append)
+    return slept
+
+
+def get_tracker(polls: list, **kwargs) -> tuple[DeletionTracker, list]:
+    # Each poll reports the next set of remaining resources
+    polled = []
+
+    def get_remaining(resource_arns):
+        polled.append(list(resource_arns))
+        return polls.pop(0)
+
+    tracker = DeletionTracker(get_remaining, **kwargs)
+    for resource_arn in INSTANCE_ARNS:
+        tracker.track(resource_arn)
+
+    return tracker, polled
+
+
+def test_polls_remaining_resources_together_until_they_have_gone(sleeps):
+    tracker, polled = get_tracker(
+        [set(INSTANCE_ARNS[1:]), {INSTANCE_ARNS[2]}, set()], delay=5
+    )
+    response = DeleteResponse()
+
+    tracker.wait(response)
+
+    assert polled == [INSTANCE_ARNS, INSTANCE_ARNS[1:], INSTANCE_ARNS[2:]]
+    assert sleeps == [5, 5, 5]
+    assert response.successful == tuple(INSTANCE_ARNS)
+    assert not tracker.in_flight
+
+
+def test_fails_resources_still_there_after_max_attempts():
+    tracker, polled = get_tracker(
+        [set(INSTANCE_ARNS[1:]), set(INSTANCE_ARNS[1:])], max_attempts=2
+    )
+    response = DeleteResponse()
+
+    tracker.wait(response)
+
+    assert len(polled) == 2
+    assert response.successful == tuple(INSTANCE_ARNS[:1])
+    assert response.failures == {'DeletionTimeout': tuple(INSTANCE_ARNS[1:])}
+
+
+def test_fails_resources_in_flight_when_polling_fails():
+    error = botocore.exceptions.ClientError(
+        {'Error': {'Code': 'AccessDenied'}}, 'DescribeDBInstances'
+    )
+
+    def get_remaining(resource_arns):
+        raise error
+
+    tracker = DeletionTracker(get_remaining)
+    for resource_arn in INSTANCE_ARNS:
+        tracker.track(resource_arn)
+    response = DeleteResponse()
+
+    tracker.wait(response)
+
+    assert response.failures == {'AccessDenied': tuple(INSTANCE_ARNS)}
+    assert not tracker.in_flight
+
+
+def test_does_not_poll_without_tracked_resources(sleeps):
+    tracker = DeletionTracker(lambda resource_arns: pytest.fail('Polled'))
+
+    tracker.wait(DeleteResponse())
+
+    assert not sleeps
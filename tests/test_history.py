@@ -0,0 +1,64 @@
+import pytest
+
+import engine.history
+from config import config
+from engine.history import ScanHistory
+
+ACCOUNT_ID = '123456789012'
+QUEUES = ('us-east-1', 'SQS::Queue')
+TOPICS = ('us-east-1', 'SNS::Topic')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(engine.history.time, 'time', lambda: now[0])
+    monkeypatch.setattr(config, 'SCAN_HISTORY_SKIP_AFTER', 2)
+    monkeypatch.setattr(config, 'SCAN_HISTORY_REFRESH_INTERVAL', 100)
+    return now
+
+
+def scan(path, work_units: list, counts: dict) -> list:
+    # A run scanning the work units not skipped, returning those it scanned
+    history = ScanHistory(path, ACCOUNT_ID)
+    scanned = history.skip_known_empty(work_units)
+    list(
+        history.record(
+            (region, resource_type, ['arn'] * counts.get((region, resource_type), 0))
+            for region, resource_type in scanned
+        )
+    )
+    return scanned
+
+
+def test_skips_pairs_empty_on_the_last_scans(tmp_path, clock):
+    path = tmp_path / 'history.json'
+
+    assert scan(path, [QUEUES, TOPICS], {TOPICS: 1}) == [QUEUES, TOPICS]
+    assert scan(path, [QUEUES, TOPICS], {TOPICS: 1}) == [QUEUES, TOPICS]
+    assert scan(path, [QUEUES, TOPICS], {TOPICS: 1}) == [TOPICS]
+
+
+def test_rescans_pairs_once_their_refresh_is_due(tmp_path, clock):
+    path = tmp_path / 'history.json'
+    scan(path, [QUEUES], {})
+    scan(path, [QUEUES], {})
+
+    clock[0] += 99
+    assert scan(path, [QUEUES], {}) == []
+
+    clock[0] += 1
+    assert scan(path, [QUEUES], {}) == [QUEUES]
+
+
+def test_filtered_runs_do_not_delay_other_pairs_refresh(tmp_path, clock):
+    path = tmp_path / 'history.json'
+    scan(path, [QUEUES, TOPICS], {TOPICS: 1})
+    scan(path, [QUEUES, TOPICS], {TOPICS: 1})
+
+    # A run narrowed to topics skips nothing, but never scanned the queues
+    clock[0] += 60
+    assert scan(path, [TOPICS], {TOPICS: 1}) == [TOPICS]
+    clock[0] += 60
+
+    assert scan(path, [QUEUES, TOPICS], {TOPICS: 1}) == [QUEUES, TOPICS]
@@ -0,0 +1,87 @@
+import pickle
+
+import pytest
+
+from utils.resource import ResourceRef
+
+
+@pytest.mark.parametrize(
+    'arn, prefix, resource_id, resource_type',
+    [
+        (
+            'arn:aws:ec2:us-east-1:123456789012:instance/i-0123',
+            'arn:aws:ec2:us-east-1:123456789012:instance/',
+            'i-0123',
+            'instance',
+        ),
+        (
+            'arn:aws:logs:us-east-1:123456789012:log-group:/aws/lambda/function',
+            'arn:aws:logs:us-east-1:123456789012:log-group:',
+            '/aws/lambda/function',
+            'log-group',
+        ),
+        (
+            'arn:aws:iam::123456789012:role/service-role/deploy',
+            'arn:aws:iam::123456789012:role/',
+            'service-role/deploy',
+            'role',
+        ),
+        (
+            'arn:aws:sqs:us-east-1:123456789012:queue',
+            'arn:aws:sqs:us-east-1:123456789012:',
+            'queue',
+            '',
+        ),
+    ],
+)
+def test_from_arn_splits_prefix_and_id(arn, prefix, resource_id, resource_type):
+    resource_arn = ResourceRef.from_arn(arn)
+
+    assert resource_arn.prefix == prefix
+    assert resource_arn.resource_id == resource_id
+    assert resource_arn.resource_type == resource_type
+    assert resource_arn.arn == arn
+
+
+def test_from_arn_parses_components():
+    resource_arn = ResourceRef.from_arn(
+        'arn:aws-cn:iam::123456789012:role/service-role/deploy'
+    )
+
+    assert resource_arn.partition == 'aws-cn'
+    assert resource_arn.service == 'iam'
+    assert resource_arn.region == ''
+    assert resource_arn.account_id == '123456789012'
+    assert resource_arn.name == 'deploy'
+
+
+def test_from_arn_returns_refs_unchanged():
+    resource_arn = ResourceRef.from_arn('arn:aws:sns:us-east-1:123456789012:topic')
+
+    assert ResourceRef.from_arn(resource_arn) is resource_arn
+
+
+def test_from_arn_rejects_invalid_arns():
+    with pytest.raises(ValueError):
+        ResourceRef.from_arn('arn:aws:s3:bucket')
+
+
+def test_refs_compare_and_hash_as_their_arns():
+    arn = 'arn:aws:ec2:us-east-1:123456789012:volume/vol-0123'
+    resource_arn = ResourceRef.from_arn(arn)
+
+    assert resource_arn == arn
+    assert resource_arn == ResourceRef.from_arn(arn)
+    assert arn in {resource_arn}
+    assert resource_arn in {arn: None}
+    assert str(resource_arn) == arn
+
+
+def test_refs_share_interned_prefixes():
+    first, second = (
+        ResourceRef.from_arn(f'arn:aws:ec2:us-east-1:123456789012:volume/vol-{index}')
+        for index in range(2)
+    )
+
+    assert first.prefix is second.prefix
+    assert pickle.loads(pickle.dumps(first)).prefix is first.prefix
@@ -0,0 +1,118 @@
+import pytest
+
+from engine.retry import (
+    PERMANENT,
+    RETRY_AFTER_DEPENDENTS,
+    RETRY_NOW,
+    classify_failure,
+    iter_retried_terminate_responses,
+)
+from registry import DeleteResponse
+
+INSTANCE_ARN = 'arn:aws:ec2:us-east-1:123456789012:instance/i-0123'
+GROUP_ARN = 'arn:aws:ec2:us-east-1:123456789012:security-group/sg-0123'
+
+
+@pytest.mark.parametrize(
+    'error_code, failure_class',
+    [
+        ('Throttling', RETRY_NOW),
+        ('RequestLimitExceeded', RETRY_NOW),
+        ('ServiceUnavailable', RETRY_NOW),
+        ('DependencyViolation', RETRY_AFTER_DEPENDENTS),
+        ('InvalidDBInstanceState', RETRY_AFTER_DEPENDENTS),
+        ('AccessDenied', PERMANENT),
+        ('UnknownError', PERMANENT),
+        # The delete is still running, so sending it again would fail
+        ('DeletionTimeout', PERMANENT),
+    ],
+)
+def test_classify_failure(error_code, failure_class):
+    assert classify_failure(error_code) == failure_class
+
+
+def get_response(error_codes: dict) -> DeleteResponse:
+    # None for a resource that was deleted
+    response = DeleteResponse()
+    for resource_arn, error_code in error_codes.items():
+        if error_code:
+            response.mark_failed(resource_arn, error_code)
+        else:
+            response.mark_successful(resource_arn)
+
+    return response
+
+
+def test_retries_transient_failures_until_they_succeed():
+    attempts = []
+
+    def iter_terminate(session, deferred):
+        attempts.append(deferred)
+        yield 'us-east-1', 'EC2::Instance', get_response({INSTANCE_ARN: None})
+
+    responses = [
+        ('us-east-1', 'EC2::Instance', get_response({INSTANCE_ARN: 'Throttling'}))
+    ]
+
+    retried = list(
+        iter_retried_terminate_responses(
+            None, iter(responses), iter_terminate, rounds=3, backoff=0
+        )
+    )
+
+    assert attempts == [{'us-east-1': {'EC2::Instance': [INSTANCE_ARN]}}]
+    assert retried[-1][2].outcomes[INSTANCE_ARN].successful
+
+
+def test_retries_dependents_only_where_something_was_deleted():
+    attempts = []
+
+    def iter_terminate(session, deferred):
+        attempts.append(deferred)
+        return iter([])
+
+    responses = [
+        (
+            'us-east-1',
+            'EC2::SecurityGroup',
+            get_response({GROUP_ARN: 'DependencyViolation'}),
+        ),
+        (
+            'eu-west-1',
+            'EC2::SecurityGroup',
+            get_response({GROUP_ARN: 'DependencyViolation'}),
+        ),
+        ('us-east-1', 'EC2::Instance', get_response({INSTANCE_ARN: None})),
+    ]
+
+    list(
+        iter_retried_terminate_responses(
+            None, iter(responses), iter_terminate, rounds=3, backoff=0
+        )
+    )
+
+    assert attempts == [{'us-east-1': {'EC2::SecurityGroup': [GROUP_ARN]}}]
+
+
+def test_does_not_retry_permanent_failures():
+    def iter_terminate(session, deferred):
+        raise AssertionError('Nothing should be retried')
+
+    responses = [
+        (
+            'us-east-1',
+            'EC2::Instance',
+            get_response({INSTANCE_ARN: 'DeletionTimeout'}),
+        )
+    ]
+
+    assert (
+        len(
+            list(
+                iter_retried_terminate_responses(
+                    None, iter(responses), iter_terminate, rounds=3, backoff=0
+                )
+            )
+        )
+        == 1
+    )
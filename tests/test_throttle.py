@@ -0,0 +1,229 @@
+import asyncio
+import threading
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import utils.throttle
+from utils.throttle import (
+    INITIAL_CONCURRENCY,
+    AdaptiveConcurrencyLimit,
+    TokenBucket,
+    clear_throttle_state,
+    get_concurrency_limits,
+    register_adaptive_concurrency,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.throttle.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_token_bucket_allows_its_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+
+def test_token_bucket_paces_callers_in_order(clock):
+    bucket = TokenBucket(rate=2, burst=1)
+    bucket.reserve()
+
+    assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+
+def test_token_bucket_refills_up_to_its_burst(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+
+    clock[0] += 60
+
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+
+def test_limit_starts_low_and_doubles_until_throttled():
+    limit = AdaptiveConcurrencyLimit(100)
+    assert limit.limit == INITIAL_CONCURRENCY
+
+    # A round trip of successful calls doubles it
+    for _ in range(INITIAL_CONCURRENCY):
+        limit.on_success()
+
+    assert limit.limit == INITIAL_CONCURRENCY * 2
+
+
+def test_limit_grows_to_its_ceiling():
+    limit = AdaptiveConcurrencyLimit(100)
+    for _ in range(200):
+        limit.on_success()
+
+    assert limit.limit == 100
+
+
+def test_limit_halves_then_grows_additively():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=20)
+
+    epoch = limit.acquire()
+    limit.on_throttle(epoch)
+    limit.release()
+    assert limit.limit == 10
+
+    for _ in range(10):
+        limit.on_success()
+
+    assert 10.9 < limit.limit < 11
+
+
+def test_limit_only_cuts_once_for_a_burst_of_throttles():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=20)
+    epochs = [limit.acquire() for _ in range(5)]
+
+    for epoch in epochs:
+        limit.on_throttle(epoch)
+
+    assert limit.limit == 10
+    assert limit.throttles == 5
+
+
+def test_limit_never_drops_below_one():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=2)
+    for _ in range(5):
+        limit.on_throttle(limit.try_acquire())
+        limit.release()
+
+    assert limit.limit == 1
+
+
+def test_try_acquire_respects_the_limit():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=2)
+
+    assert limit.try_acquire() is not None
+    assert limit.try_acquire() is not None
+    assert limit.try_acquire() is None
+
+    limit.release()
+    assert limit.try_acquire() is not None
+
+
+def test_release_wakes_a_waiting_thread():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=1)
+    limit.acquire()
+    acquired = threading.Event()
+
+    def wait():
+        limit.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    limit.release()
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_release_from_a_thread_wakes_async_waiters():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=1)
+
+    async def main():
+        await limit.acquire_async()
+        waiter = asyncio.create_task(limit.acquire_async())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        threading.Thread(target=limit.release).start()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(main())
+    assert limit.in_flight == 1
+
+
+def test_cancelled_async_waiter_passes_its_wakeup_on():
+    limit = AdaptiveConcurrencyLimit(100, initial_limit=1)
+
+    async def main():
+        await limit.acquire_async()
+        first = asyncio.create_task(limit.acquire_async())
+        second = asyncio.create_task(limit.acquire_async())
+        await asyncio.sleep(0)
+
+        # The first waiter is woken, but cancelled before it takes the slot
+        limit.release()
+        first.cancel()
+
+        await asyncio.wait_for(second, 1)
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert limit.in_flight == 1
+
+
+@pytest.fixture
+def limited_client():
+    clear_throttle_state()
+    client = boto3.client(
+        'sqs',
+        region_name='us-east-1',
+        aws_access_key_id='throttle',
+        aws_secret_access_key='throttle',
+    )
+    register_adaptive_concurrency(client, 100)
+
+    yield client
+
+    clear_throttle_state()
+
+
+def test_calls_give_their_slot_back(limited_client):
+    with Stubber(limited_client) as stubber:
+        stubber.add_response('list_queues', {'QueueUrls': []})
+        limited_client.list_queues()
+
+    limit = get_concurrency_limits()[('sqs', 'us-east-1')]
+    assert limit.in_flight == 0
+    assert limit.limit == INITIAL_CONCURRENCY + 1
+
+
+def test_calls_failing_before_they_are_sent_give_their_slot_back(limited_client):
+    def fail(**kwargs):
+        raise RuntimeError('Failed before sending')
+
+    limited_client.meta.events.register('before-call', fail)
+
+    for _ in range(INITIAL_CONCURRENCY + 1):
+        with pytest.raises(RuntimeError):
+            limited_client.list_queues()
+
+    assert get_concurrency_limits()[('sqs', 'us-east-1')].in_flight == 0
+
+
+def test_async_calls_failing_before_they_are_sent_give_their_slot_back():
+    aiobotocore_session = pytest.importorskip('aiobotocore.session')
+    clear_throttle_state()
+
+    def fail(**kwargs):
+        raise RuntimeError('Failed before sending')
+
+    async def main():
+        async with aiobotocore_session.get_session().create_client(
+            'sqs',
+            region_name='us-east-1',
+            aws_access_key_id='throttle',
+            aws_secret_access_key='throttle',
+        ) as client:
+            register_adaptive_concurrency(client, 100)
+            client.meta.events.register('before-call', fail)
+
+            for _ in range(INITIAL_CONCURRENCY + 1):
+                with pytest.raises(RuntimeError):
+                    await asyncio.wait_for(client.list_queues(), 1)
+
+    asyncio.run(main())
+    assert get_concurrency_limits()[('sqs', 'us-east-1')].in_flight == 0
+    clear_throttle_state()
@@ -18,8 +18,10 @@ API_MAX_PAGE_SIZE = {
     'cloudwatch.describe_alarms': 100,
     'cloudwatch.get_metric_data': MAX_PAGESIZE,
     'cloudwatch.list_dashboards': None,
-    'cloudwatchlogs.describe_log_groups': 50,  # Differs from API docs (logs)
     'codepipeline.list_pipelines': MAX_PAGESIZE,
+    'configservice.describe_configuration_aggregator_sources_status': 100,
+    'configservice.select_aggregate_resource_config': 100,
+    'configservice.select_resource_config': 100,
     'docdb.describe_db_clusters': 100,
     'docdb.describe_db_instances': 100,
     'dynamodb.list_tables': 100,
@@ -68,6 +70,7 @@ API_MAX_PAGE_SIZE = {
     'kms.list_keys': MAX_PAGESIZE,
     'lambda.list_functions': MAX_PAGESIZE,
     'lambda.list_layers': 50,
+    'logs.describe_log_groups': 50,  # Differs from API docs
     'neptune.describe_db_clusters': 100,
     'neptune.describe_db_instances': 100,
     'organizations.list_accounts_for_parent': 20,
@@ -95,3 +98,88 @@ API_MAX_PAGE_SIZE = {
     'storagegateway.list_volumes': MAX_PAGESIZE,
     'transfer.list_servers': MAX_PAGESIZE,
 }
+
+# Client-side token buckets, as (requests per second, burst), per account, region
+# and API call - same naming as above. Calls not listed here aren't paced.
+EC2_MUTATING_RATE = (5, 50)  # EC2 mutating/resource-intensive action buckets
+IAM_MUTATING_RATE = (10, 10)
+
+API_RATE_LIMITS = {
+    'apigateway.delete_rest_api': (1 / 30, 1),  # 1 request every 30 seconds
+    'ec2.delete_dhcp_options': EC2_MUTATING_RATE,
+    'ec2.delete_internet_gateway': EC2_MUTATING_RATE,
+    'ec2.delete_launch_template': EC2_MUTATING_RATE,
+    'ec2.delete_nat_gateway': EC2_MUTATING_RATE,
+    'ec2.delete_network_acl': EC2_MUTATING_RATE,
+    'ec2.delete_network_interface': EC2_MUTATING_RATE,
+    'ec2.delete_route_table': EC2_MUTATING_RATE,
+    'ec2.delete_security_group': EC2_MUTATING_RATE,
+    'ec2.delete_snapshot': EC2_MUTATING_RATE,
+    'ec2.delete_subnet': EC2_MUTATING_RATE,
+    'ec2.delete_volume': EC2_MUTATING_RATE,
+    'ec2.delete_vpc': EC2_MUTATING_RATE,
+    'ec2.delete_vpc_endpoints': EC2_MUTATING_RATE,
+    'ec2.delete_vpc_peering_connection': EC2_MUTATING_RATE,
+    'ec2.deregister_image': EC2_MUTATING_RATE,
+    'ec2.detach_internet_gateway': EC2_MUTATING_RATE,
+    'ec2.modify_instance_attribute': EC2_MUTATING_RATE,
+    'ec2.release_address': EC2_MUTATING_RATE,
+    'ec2.terminate_instances': EC2_MUTATING_RATE,
+    'iam.delete_group': IAM_MUTATING_RATE,
+    'iam.delete_instance_profile': IAM_MUTATING_RATE,
+    'iam.delete_policy': IAM_MUTATING_RATE,
+    'iam.delete_policy_version': IAM_MUTATING_RATE,
+    'iam.delete_role': IAM_MUTATING_RATE,
+    'iam.delete_user': IAM_MUTATING_RATE,
+    'iam.detach_group_policy': IAM_MUTATING_RATE,
+    'iam.detach_role_policy': IAM_MUTATING_RATE,
+    'iam.detach_user_policy': IAM_MUTATING_RATE,
+    'iam.remove_role_from_instance_profile': IAM_MUTATING_RATE,
+    'iam.remove_user_from_group': IAM_MUTATING_RATE,
+}
+
+# Resources a batch tag call accepts at once - same naming as above. TagResolver
+# (utils/tagging.py) fetches tags for this many resources per call
+TAG_API_BATCH_SIZE = {
+    'cloudtrail.list_tags': 20,
+    'ecs.describe_clusters': 100,
+    'elasticloadbalancing.describe_tags': 20,
+    'elasticloadbalancingv2.describe_tags': 20,
+}
+
+# Resource Groups Tagging API filters ("service[:type]") for the registry resource
+# types that can take their tags from a single regional sweep (--discovery tagging-api)
+TAGGING_API_RESOURCE_TYPES = {
+    'CertificateManager::Certificate': 'acm:certificate',
+    'CloudWatch::Alarm': 'cloudwatch:alarm',
+    'DocDB::DBCluster': 'rds:cluster',
+    'DocDB::DBInstance': 'rds:db',
+    'ECR::Repository': 'ecr:repository',
+    'ElastiCache::CacheCluster': 'elasticache:cluster',
+    'ElastiCache::ServerlessCache': 'elasticache:serverlesscache',
+    'Events::Rule': 'events:rule',
+    'Kinesis:Stream': 'kinesis:stream',
+    'Lambda::Function': 'lambda:function',
+    'Neptune::DBCluster': 'rds:cluster',
+    'Neptune::DBInstance': 'rds:db',
+    'SNS::Topic': 'sns',
+    'SQS::Queue': 'sqs',
+    'StepFunctions::StateMachine': 'states:stateMachine',
+    'Transfer::Server': 'transfer:server',
+}
+
+# AWS Config resource types, and the registry resource types they're found as, for
+# --discovery config. Only types whose query function does nothing more than list
+# and check tags belong here, anything else falls back to its query function
+CONFIG_RESOURCE_TYPES = {
+    'AWS::ACM::Certificate': 'CertificateManager::Certificate',
+    'AWS::CloudWatch::Alarm': 'CloudWatch::Alarm',
+    'AWS::DynamoDB::Table': 'DynamoDB::Table',
+    'AWS::ECR::Repository': 'ECR::Repository',
+    'AWS::ElastiCache::CacheCluster': 'ElastiCache::CacheCluster',
+    'AWS::Kinesis::Stream': 'Kinesis:Stream',
+    'AWS::Lambda::Function': 'Lambda::Function',
+    'AWS::SNS::Topic': 'SNS::Topic',
+    'AWS::SQS::Queue': 'SQS::Queue',
+    'AWS::StepFunctions::StateMachine': 'StepFunctions::StateMachine',
+}
@@ -1,9 +1,32 @@
+import asyncio
+import sys
+import threading
 from dataclasses import dataclass
+from typing import Callable, Optional
 
 import boto3
+import botocore.config
 import botocore.exceptions
 
+from config import config
+
 from . import API_MAX_PAGE_SIZE
+from .throttle import register_adaptive_concurrency, register_rate_limits
+
+# Clients are thread-safe and shared, resources are not so are cached per thread
+_client_cache: dict[tuple, object] = {}
+_client_cache_lock = threading.Lock()
+_thread_local = threading.local()
+
+# Tasks an async function runs at once for its resources, so thousands of
+# resources never become thousands of tasks
+ASYNC_TASK_LIMIT = 50
+
+# Called with every new client, e.g. to instrument or stub its calls
+_client_hooks: list[Callable] = []
+
+# Account details resolved once per session by the bootstrap phase
+_account_contexts: dict[boto3.session.Session, 'AccountContext'] = {}
 
 
 @dataclass
@@ -20,24 +43,24 @@ class InvalidServiceMethodException(Exception):
         return f'[ERROR] Invalid Client/Method: {context_info  }'
 
 
-def boto3_paginate(client, method: str, search: str | None = None, **kwargs):
-    """Pagination for AWS APIs
+@dataclass(frozen=True)
+class AccountContext:
+    account_id: str
+    partition: str
+    enabled_regions: tuple[str, ...]
 
-    Args:
-        client: a boto3 client (i.e. boto3.client('ec2'))
-        method: the API method to call
-        search (str | None, optional): JMESPath Search Filter
-        **kwargs: any additional parameters for API call
-
-    Returns:
-        Either a pagintor, or a filtered list of results
-    """
 
+def get_pagination_config(client, method: str, kwargs: dict) -> dict:
     service = client.__class__.__name__.lower()
     api_call = f'{service}.{method}'
 
     if api_call not in API_MAX_PAGE_SIZE:
-        print(f'Unknown: {service}.{method}')
+        # Some calls are listed under the service's name (i.e. logs) instead
+        api_call = f'{client.meta.service_model.service_name}.{method}'
+
+    if api_call not in API_MAX_PAGE_SIZE:
+        # Not stdout, which may be carrying JSON/NDJSON output
+        print(f'Unknown: {service}.{method}', file=sys.stderr)
 
     pagination_config = kwargs.pop('PaginationConfig', None)
     if not pagination_config:
@@ -51,6 +74,24 @@ def boto3_paginate(client, method: str, search: str | None = None, **kwargs):
     if not getattr(client, method, None):
         raise InvalidServiceMethodException(service, method)
 
+    return pagination_config
+
+
+def boto3_paginate(client, method: str, search: str | None = None, **kwargs):
+    """Pagination for AWS APIs
+
+    Args:
+        client: a boto3 client (i.e. boto3.client('ec2'))
+        method: the API method to call
+        search (str | None, optional): JMESPath Search Filter
+        **kwargs: any additional parameters for API call
+
+    Returns:
+        Either a pagintor, or a filtered list of results
+    """
+
+    pagination_config = get_pagination_config(client, method, kwargs)
+
     try:
         paginator = client.get_paginator(method).paginate(**kwargs, **pagination_config)
     except botocore.exceptions.OperationNotPageableError:
@@ -60,16 +101,231 @@ def boto3_paginate(client, method: str, search: str | None = None, **kwargs):
     return paginator.search(search) if search else paginator
 
 
+async def boto3_paginate_async(
+    client, method: str, search: str | None = None, **kwargs
+):
+    """Pagination for AWS APIs using an aiobotocore client
+
+    Args:
+        client: an aiobotocore client
+        method: the API method to call
+        search (str | None, optional): JMESPath Search Filter
+        **kwargs: any additional parameters for API call
+
+    Yields:
+        Either each page, or each filtered result
+    """
+
+    pagination_config = get_pagination_config(client, method, kwargs)
+    paginator = client.get_paginator(method).paginate(**kwargs, **pagination_config)
+
+    if search:
+        async for result in paginator.search(search):
+            yield result
+    else:
+        async for page in paginator:
+            yield page
+
+
+async def map_async(
+    function: Callable, items: list, limit: int = ASYNC_TASK_LIMIT
+) -> list:
+    """Await a coroutine function for each item, at most `limit` at a time
+
+    Args:
+        function: an async function taking one item
+        items: the items, i.e. resource ARNs
+        limit: the most calls to await at once
+
+    Returns:
+        The results, in the order of the items
+    """
+
+    results = [None] * len(items)
+    remaining = iter(enumerate(items))
+
+    async def worker():
+        for index, item in remaining:
+            results[index] = await function(item)
+
+    await asyncio.gather(*(worker() for _ in range(min(limit, len(items)))))
+    return results
+
+
+def get_session_profile(session: boto3.session.Session) -> str | None:
+    """
+    Get the profile a session was built from, or None if it uses the default chain.
+
+    boto3 reports "default" even when no such profile exists, so only named
+    profiles that actually exist are returned.
+    """
+    if session.profile_name in session.available_profiles:
+        return session.profile_name
+
+    return None
+
+
+def get_client_config() -> botocore.config.Config:
+    # Size the connection pool so every call adaptive concurrency lets through
+    # can share a client
+    return botocore.config.Config(
+        max_pool_connections=max(config.MAX_WORKERS, config.MAX_CONCURRENCY, 10)
+    )
+
+
+def register_client_limits(client, session: boto3.session.Session) -> None:
+    # Registered first-in-front, so calls wait for a rate token before a slot
+    if config.ADAPTIVE_CONCURRENCY:
+        register_adaptive_concurrency(client, config.MAX_CONCURRENCY)
+
+    register_rate_limits(client, get_session_account_id(session))
+
+
+def register_client_hook(hook: Callable) -> None:
+    """
+    Call a hook with every client created from now on.
+
+    Hooks register their own botocore event handlers on the client. They're
+    called as hook(client, is_async), where is_async is True for aiobotocore
+    clients, whose handlers may be coroutines. Registering a hook again has no
+    effect.
+
+    Args:
+        hook (Callable): The hook to call.
+
+    Returns:
+        None
+
+    """
+    if hook not in _client_hooks:
+        _client_hooks.append(hook)
+
+
+def clear_client_hooks() -> None:
+    _client_hooks.clear()
+
+
+def apply_client_hooks(client, is_async: bool = False) -> None:
+    for hook in _client_hooks:
+        hook(client, is_async)
+
+
+def get_client(
+    session: boto3.session.Session, service_name: str, region_name: Optional[str] = None
+):
+    """
+    Get a boto3 client, creating it only once per (session, service, region).
+
+    Client creation loads and validates the service model, so clients are
+    cached for the whole run and shared between threads. Calls listed in
+    API_RATE_LIMITS are paced by a token bucket shared by every client, and
+    calls in flight per service and region adapt to throttling responses.
+
+    Args:
+        session: The Boto3 session object.
+        service_name (str): The service name (i.e. 'ec2').
+        region_name (Optional[str]): The region, or None for the session default.
+
+    Returns:
+        The cached boto3 client.
+
+    """
+    key = (session, service_name, region_name)
+
+    if (client := _client_cache.get(key)) is None:
+        # boto3 sessions aren't thread-safe, so creation is serialised
+        with _client_cache_lock:
+            if (client := _client_cache.get(key)) is None:
+                client = session.client(
+                    service_name, region_name=region_name, config=get_client_config()
+                )
+                register_client_limits(client, session)
+                apply_client_hooks(client)
+                _client_cache[key] = client
+
+    return client
+
+
+def get_resource(
+    session: boto3.session.Session, service_name: str, region_name: Optional[str] = None
+):
+    """
+    Get a boto3 resource, creating it only once per thread.
+
+    boto3 resources are not thread-safe, so unlike clients they are cached
+    separately for each thread.
+
+    Args:
+        session: The Boto3 session object.
+        service_name (str): The service name (i.e. 'iam').
+        region_name (Optional[str]): The region, or None for the session default.
+
+    Returns:
+        The cached boto3 resource.
+
+    """
+    if not hasattr(_thread_local, 'resources'):
+        _thread_local.resources = {}
+
+    key = (session, service_name, region_name)
+    if (resource := _thread_local.resources.get(key)) is None:
+        with _client_cache_lock:
+            resource = session.resource(
+                service_name, region_name=region_name, config=get_client_config()
+            )
+            register_client_limits(resource.meta.client, session)
+            apply_client_hooks(resource.meta.client)
+        _thread_local.resources[key] = resource
+
+    return resource
+
+
+def clear_client_cache() -> None:
+    with _client_cache_lock:
+        _client_cache.clear()
+
+
+def set_account_context(
+    session: boto3.session.Session, account_context: AccountContext
+) -> None:
+    _account_contexts[session] = account_context
+
+
+def get_account_context(session: boto3.session.Session) -> Optional[AccountContext]:
+    return _account_contexts.get(session)
+
+
+def get_session_account_id(session: boto3.session.Session) -> Optional[str]:
+    # The account ID if it's already been bootstrapped, without calling STS
+    if account_context := get_account_context(session):
+        return account_context.account_id
+
+    return None
+
+
 def get_account_id(session: boto3.session.Session) -> str:
-    return session.client('sts').get_caller_identity()['Account']
+    if account_context := get_account_context(session):
+        return account_context.account_id
+
+    return get_client(session, 'sts').get_caller_identity()['Account']
+
+
+def get_partition(session: boto3.session.Session) -> str:
+    if account_context := get_account_context(session):
+        return account_context.partition
+
+    return get_client(session, 'sts').get_caller_identity()['Arn'].split(':')[1]
 
 
 def get_enabled_regions(session: boto3.session.Session) -> list:
     if not isinstance(session, boto3.session.Session):
         raise TypeError('Not a boto3 Session Object')
 
+    if account_context := get_account_context(session):
+        return list(account_context.enabled_regions)
+
     # Get a list of available regions
-    ec2 = session.client('ec2', region_name='us-east-1')
+    ec2 = get_client(session, 'ec2', 'us-east-1')
 
     return [
         region['RegionName']
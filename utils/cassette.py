@@ -0,0 +1,280 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Optional
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+from config import config
+
+from .aws import register_client_hook
+
+try:
+    from aiobotocore.awsrequest import AioAWSResponse
+except ImportError:
+    AioAWSResponse = None
+
+# The recording's details, written once per recording by the main process
+CASSETTE_METADATA_FILE = 'cassette.json'
+
+# Each process records its own file, so workers never share a gzip stream
+CASSETTE_FILE_PATTERN = 'cassette-*.ndjson.gz'
+
+
+class CassetteMissError(Exception):
+    """Raised when a replayed run makes a call that wasn't recorded."""
+
+
+class RecordedBody:
+    # Stands in for the HTTP body of a replayed response, sync or async
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+def get_cassette_key(client, operation_model, params: dict) -> str:
+    """
+    Get the key a call is recorded and replayed under.
+
+    Calls are identified by their service, operation, region and parameters.
+    Idempotency tokens are generated afresh for every call, so they're left out.
+
+    Args:
+        client: The boto3 or aiobotocore client making the call.
+        operation_model: The botocore operation model.
+        params (dict): The call's parameters, as passed to the client.
+
+    Returns:
+        str: The key.
+
+    """
+    input_shape = operation_model.input_shape
+    idempotency_tokens = {
+        member_name
+        for member_name, member_shape in (
+            input_shape.members.items() if input_shape else []
+        )
+        if member_shape.metadata.get('idempotencyToken')
+    }
+
+    canonical_params = json.dumps(
+        {
+            name: value
+            for name, value in params.items()
+            if name not in idempotency_tokens
+        },
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(canonical_params.encode()).hexdigest()[:32]
+
+    service_name = client.meta.service_model.service_name
+    return f'{service_name}.{operation_model.name}:{client.meta.region_name}:{digest}'
+
+
+def capture_cassette_key(client):
+    def handler(params, model, context, **kwargs):
+        context['cassette_key'] = get_cassette_key(client, model, params)
+
+    return handler
+
+
+class CassetteRecorder:
+    """
+    Records the response to every API call of a run to a gzipped cassette.
+
+    Every attempt is recorded, including throttled and failed ones, with how
+    long AWS took to answer it.
+    """
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / CASSETTE_FILE_PATTERN.replace('*', str(os.getpid()))
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+
+        # Spawned worker processes don't run atexit handlers, only finalizers
+        Finalize(self, self.close, exitpriority=0)
+
+    def register(self, client, is_async: bool) -> None:
+        events = client.meta.events
+        events.register('before-parameter-build', capture_cassette_key(client))
+        events.register('before-send', self.on_send)
+        events.register('response-received', self.on_response)
+
+    def on_send(self, request, **kwargs) -> None:
+        request.context['cassette_sent'] = time.perf_counter()
+
+    def on_response(self, response_dict, context, **kwargs) -> None:
+        # Connection errors have no response, streamed bodies aren't recorded
+        if not response_dict or not isinstance(response_dict['body'], bytes):
+            return
+
+        entry = {
+            'key': context['cassette_key'],
+            'status': response_dict['status_code'],
+            'headers': dict(response_dict['headers']),
+            'latency': round(time.perf_counter() - context['cassette_sent'], 6),
+        }
+        try:
+            entry['body'] = response_dict['body'].decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_base64'] = base64.b64encode(response_dict['body']).decode()
+
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class CassettePlayer:
+    """
+    Answers API calls from a recorded cassette, without reaching AWS.
+
+    Repeated calls get the recorded responses in the order they were recorded,
+    then the last one again, so polling ends where the recording did. Each
+    response waits for its recorded latency, multiplied by `latency_scale`.
+    """
+
+    def __init__(self, directory: Path, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self._responses: dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+        paths = sorted(directory.glob(CASSETTE_FILE_PATTERN))
+        if not paths:
+            raise SystemError(f'No recording found in "{directory}".')
+
+        for path in paths:
+            with gzip.open(path, 'rt', encoding='utf-8') as cassette_file:
+                for line in cassette_file:
+                    entry = json.loads(line)
+                    self._responses[entry['key']].append(entry)
+
+    def next_entry(self, key: str) -> dict:
+        with self._lock:
+            if not (entries := self._responses.get(key)):
+                raise CassetteMissError(f'{key} was not recorded')
+
+            return entries.popleft() if len(entries) > 1 else entries[0]
+
+    def get_response(self, entry: dict, response_class=AWSResponse) -> AWSResponse:
+        if 'body_base64' in entry:
+            body = base64.b64decode(entry['body_base64'])
+        else:
+            body = entry['body'].encode('utf-8')
+
+        return response_class(
+            'https://cassette.invalid/',
+            entry['status'],
+            entry['headers'],
+            RecordedBody(body),
+        )
+
+    def register(self, client, is_async: bool) -> None:
+        events = client.meta.events
+        events.register('before-parameter-build', capture_cassette_key(client))
+
+        if is_async:
+
+            async def respond_async(request, **kwargs):
+                entry = self.next_entry(request.context['cassette_key'])
+                await asyncio.sleep(entry['latency'] * self.latency_scale)
+                return self.get_response(entry, AioAWSResponse)
+
+            events.register('before-send', respond_async)
+        else:
+
+            def respond(request, **kwargs):
+                entry = self.next_entry(request.context['cassette_key'])
+                time.sleep(entry['latency'] * self.latency_scale)
+                return self.get_response(entry)
+
+            events.register('before-send', respond)
+
+
+def check_record_dir(directory: Path) -> None:
+    # Recordings are never mixed, or overwritten
+    if any(directory.glob(CASSETTE_FILE_PATTERN)):
+        raise SystemError(f'"{directory}" already contains a recording.')
+
+
+def save_cassette_metadata(directory: Path, session: boto3.session.Session) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / CASSETTE_METADATA_FILE).write_text(
+        json.dumps(
+            {
+                'recorded': datetime.now(timezone.utc).isoformat(),
+                'region_name': session.region_name,
+            },
+            indent=2,
+        )
+    )
+
+
+def use_replay_credentials(directory: Path) -> None:
+    """
+    Give every session placeholder credentials and the recording's region.
+
+    Replayed calls are still signed, but never sent, and calls to the default
+    region must resolve to the region they were recorded in. Environment
+    variables reach every session, including the async engine's and those of
+    spawned worker processes.
+
+    Args:
+        directory (Path): The recording's directory.
+
+    Returns:
+        None
+
+    """
+    try:
+        metadata = json.loads((directory / CASSETTE_METADATA_FILE).read_text())
+    except (OSError, ValueError):
+        metadata = {}
+
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ['AWS_ACCESS_KEY_ID'] = 'replay'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'replay'
+    os.environ.pop('AWS_SESSION_TOKEN', None)
+    if region_name := metadata.get('region_name'):
+        os.environ['AWS_DEFAULT_REGION'] = region_name
+
+
+def install_cassette() -> Optional[object]:
+    """
+    Record, or replay, every client's API calls, as configured.
+
+    Returns:
+        Optional[object]: The CassetteRecorder or CassettePlayer, or None if
+            neither is configured.
+
+    """
+    if config.RECORD_DIR:
+        cassette = CassetteRecorder(Path(config.RECORD_DIR))
+    elif config.REPLAY_DIR:
+        cassette = CassettePlayer(Path(config.REPLAY_DIR), config.REPLAY_LATENCY_SCALE)
+    else:
+        return None
+
+    register_client_hook(cassette.register)
+    return cassette
@@ -0,0 +1,230 @@
+import json
+import threading
+from collections import defaultdict
+from typing import Optional
+
+import boto3
+import botocore.exceptions
+
+from config import config
+
+from . import CONFIG_RESOURCE_TYPES
+from .aws import boto3_paginate, boto3_tag_list_to_dict, get_account_id, get_client
+from .general import check_delete
+
+# {registry type: [arns]} per (session, region), for the types recorded there
+_inventories: dict[tuple, Optional[dict[str, list[str]]]] = {}
+# {region: {registry type: [arns]}} per session, from the configured aggregator
+_aggregate_inventories: dict[boto3.session.Session, dict] = {}
+_inventory_locks: dict[tuple, threading.Lock] = {}
+_inventory_lock = threading.Lock()
+
+
+def get_key_lock(key: tuple) -> threading.Lock:
+    with _inventory_lock:
+        return _inventory_locks.setdefault(key, threading.Lock())
+
+
+def get_recorded_types(session: boto3.session.Session, region: str) -> set[str]:
+    """
+    Get the AWS Config resource types being recorded in a region.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The region.
+
+    Returns:
+        set[str]: The recorded types from CONFIG_RESOURCE_TYPES, empty if
+            there's no recorder running (or it can't be described).
+
+    """
+    configservice = get_client(session, 'config', region)
+
+    try:
+        recorders = configservice.describe_configuration_recorders()[
+            'ConfigurationRecorders'
+        ]
+        statuses = configservice.describe_configuration_recorder_status()[
+            'ConfigurationRecordersStatus'
+        ]
+    except botocore.exceptions.ClientError:
+        return set()
+
+    if not any(status.get('recording') for status in statuses):
+        return set()
+
+    recorded = set()
+    for recorder in recorders:
+        group = recorder.get('recordingGroup', {})
+
+        if group.get('allSupported', True):
+            recorded.update(CONFIG_RESOURCE_TYPES)
+        elif (
+            group.get('recordingStrategy', {}).get('useOnly')
+            == 'EXCLUSION_BY_RESOURCE_TYPES'
+        ):
+            excluded = group.get('exclusionByResourceTypes', {})
+            recorded.update(
+                set(CONFIG_RESOURCE_TYPES) - set(excluded.get('resourceTypes', []))
+            )
+        else:
+            recorded.update(group.get('resourceTypes', []))
+
+    return recorded & set(CONFIG_RESOURCE_TYPES)
+
+
+def build_query(resource_types: set[str], account_id: Optional[str] = None) -> str:
+    conditions = [
+        'resourceType IN ({})'.format(
+            ', '.join(f"'{resource_type}'" for resource_type in sorted(resource_types))
+        ),
+        "configurationItemStatus IN ('OK', 'ResourceDiscovered')",
+    ]
+    if account_id:
+        conditions.append(f"accountId = '{account_id}'")
+
+    return f'SELECT arn, resourceType, awsRegion, tags WHERE {" AND ".join(conditions)}'
+
+
+def collect_results(results, regions: defaultdict) -> None:
+    # Results come back as JSON documents, tags are [{"key": .., "value": ..}]
+    for result in results:
+        resource = json.loads(result)
+        if not check_delete(boto3_tag_list_to_dict(resource.get('tags', []))):
+            continue
+
+        resource_type = CONFIG_RESOURCE_TYPES[resource['resourceType']]
+        regions[resource['awsRegion']][resource_type].append(resource['arn'])
+
+
+def query_region_inventory(
+    session: boto3.session.Session, region: str, recorded_types: set[str]
+) -> dict[str, list[str]]:
+    configservice = get_client(session, 'config', region)
+    regions = defaultdict(lambda: defaultdict(list))
+
+    collect_results(
+        boto3_paginate(
+            configservice,
+            'select_resource_config',
+            Expression=build_query(recorded_types),
+            search='Results[]',
+        ),
+        regions,
+    )
+
+    return regions[region]
+
+
+def query_aggregate_inventory(session: boto3.session.Session) -> dict:
+    # Aggregators are looked up in the session's default region
+    configservice = get_client(session, 'config')
+    account_id = get_account_id(session)
+
+    # Only trust the aggregator for regions it's successfully collecting
+    aggregated_regions = {
+        source['AwsRegion']
+        for source in boto3_paginate(
+            configservice,
+            'describe_configuration_aggregator_sources_status',
+            ConfigurationAggregatorName=config.CONFIG_AGGREGATOR,
+            search='AggregatedSourceStatusList[]',
+        )
+        if source.get('SourceId') == account_id
+        and source.get('LastUpdateStatus') == 'SUCCEEDED'
+    }
+    regions = defaultdict(lambda: defaultdict(list))
+
+    collect_results(
+        boto3_paginate(
+            configservice,
+            'select_aggregate_resource_config',
+            ConfigurationAggregatorName=config.CONFIG_AGGREGATOR,
+            Expression=build_query(set(CONFIG_RESOURCE_TYPES), account_id),
+            search='Results[]',
+        ),
+        regions,
+    )
+
+    return {region: regions[region] for region in aggregated_regions}
+
+
+def build_inventory(
+    session: boto3.session.Session, region: str
+) -> Optional[dict[str, list[str]]]:
+    """
+    Build a region's inventory of the registry resource types Config records.
+
+    With an aggregator configured, the aggregator is queried once for every
+    region, otherwise each region's own recorder is queried.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The region.
+
+    Returns:
+        Optional[dict[str, list[str]]]: The deletable ARNs for each recorded
+            registry resource type, or None if Config can't be used.
+
+    """
+    if not (recorded_types := get_recorded_types(session, region)):
+        return None
+
+    if config.CONFIG_AGGREGATOR:
+        with get_key_lock((session,)):
+            if session not in _aggregate_inventories:
+                try:
+                    _aggregate_inventories[session] = query_aggregate_inventory(session)
+                except botocore.exceptions.ClientError:
+                    # Every region falls back to its query functions
+                    _aggregate_inventories[session] = {}
+
+        if (found := _aggregate_inventories[session].get(region)) is None:
+            return None
+    else:
+        try:
+            found = query_region_inventory(session, region, recorded_types)
+        except botocore.exceptions.ClientError:
+            return None
+
+    return {
+        CONFIG_RESOURCE_TYPES[aws_type]: list(
+            found.get(CONFIG_RESOURCE_TYPES[aws_type], [])
+        )
+        for aws_type in recorded_types
+    }
+
+
+def get_config_resources(
+    session: boto3.session.Session, region: str, resource_type: str
+) -> Optional[list[str]]:
+    """
+    Get a resource type's deletable ARNs in a region from AWS Config.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The region.
+        resource_type (str): The registry resource type.
+
+    Returns:
+        Optional[list[str]]: The ARNs, or None if Config doesn't record this
+            resource type here and its query function should be used instead.
+
+    """
+    key = (session, region)
+    if key not in _inventories:
+        with get_key_lock(key):
+            if key not in _inventories:
+                _inventories[key] = build_inventory(session, region)
+
+    if (inventory := _inventories[key]) is None:
+        return None
+
+    return inventory.get(resource_type)
+
+
+def clear_config_inventories() -> None:
+    with _inventory_lock:
+        _inventories.clear()
+        _aggregate_inventories.clear()
+        _inventory_locks.clear()
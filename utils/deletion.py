@@ -0,0 +1,156 @@
+import time
+from typing import Callable
+
+import botocore.exceptions
+
+from registry import DeleteResponse
+
+from .aws import boto3_paginate
+from .general import batch
+from .resource import ResourceRef
+from .tracing import span
+
+# Identifiers per filtered describe call when polling deletions
+FILTER_BATCH_SIZE = 100
+
+
+class DeletionTracker:
+    """
+    Waits on many in-flight deletions together.
+
+    Deletes are all fired first and each resource ARN is tracked as it's deleted.
+    The tracker then polls with a single filtered describe (per batch of
+    FILTER_BATCH_SIZE) each interval, rather than a waiter per resource, so N
+    deletions take about as long as the slowest of them.
+    """
+
+    def __init__(
+        self,
+        get_remaining: Callable[[list[ResourceRef]], set],
+        delay: int = 30,
+        max_attempts: int = 60,
+    ) -> None:
+        self.get_remaining = get_remaining
+        self.delay = delay
+        self.max_attempts = max_attempts
+        self.in_flight: list[ResourceRef] = []
+
+    def track(self, resource_arn: ResourceRef) -> None:
+        self.in_flight.append(resource_arn)
+
+    def wait(self, response: DeleteResponse) -> None:
+        """
+        Poll until every tracked resource has gone, recording the outcomes.
+
+        Resources still present after max_attempts polls fail with
+        DeletionTimeout, and an error polling fails everything still in flight.
+
+        Args:
+            response (DeleteResponse): The response to record outcomes in.
+
+        """
+        for _ in range(self.max_attempts):
+            if not self.in_flight:
+                return
+
+            with span('sleep', **{'apocalypse.in_flight': len(self.in_flight)}):
+                time.sleep(self.delay)
+
+            try:
+                remaining = self.get_remaining(self.in_flight)
+            except botocore.exceptions.ClientError as e:
+                error_code = e.response['Error']['Code']
+                for resource_arn in self.in_flight:
+                    response.mark_failed(resource_arn, error_code)
+                self.in_flight = []
+                return
+
+            for resource_arn in self.in_flight:
+                if resource_arn not in remaining:
+                    response.mark_successful(resource_arn)
+            self.in_flight = [
+                resource_arn
+                for resource_arn in self.in_flight
+                if resource_arn in remaining
+            ]
+
+        for resource_arn in self.in_flight:
+            response.mark_failed(resource_arn, 'DeletionTimeout')
+        self.in_flight = []
+
+
+def get_remaining_db_instances(client, instance_arns: list[ResourceRef]) -> set[str]:
+    # RDS, DocumentDB and Neptune share the same describe calls, and their
+    # filters take ARNs as well as identifiers
+    return {
+        instance_arn
+        for instance_batch in batch(instance_arns, FILTER_BATCH_SIZE)
+        for instance_arn in boto3_paginate(
+            client,
+            'describe_db_instances',
+            Filters=[
+                {
+                    'Name': 'db-instance-id',
+                    'Values': [instance_arn.arn for instance_arn in instance_batch],
+                }
+            ],
+            search='DBInstances[].DBInstanceArn',
+        )
+    }
+
+
+def get_remaining_db_clusters(client, cluster_arns: list[ResourceRef]) -> set[str]:
+    return {
+        cluster_arn
+        for cluster_batch in batch(cluster_arns, FILTER_BATCH_SIZE)
+        for cluster_arn in boto3_paginate(
+            client,
+            'describe_db_clusters',
+            Filters=[
+                {
+                    'Name': 'db-cluster-id',
+                    'Values': [cluster_arn.arn for cluster_arn in cluster_batch],
+                }
+            ],
+            search='DBClusters[].DBClusterArn',
+        )
+    }
+
+
+def get_remaining_ec2_instances(
+    ec2, instance_arns: list[ResourceRef]
+) -> set[ResourceRef]:
+    instance_ids = {
+        instance_arn.resource_id: instance_arn for instance_arn in instance_arns
+    }
+
+    # Terminated instances stay visible for a while, so filter them out
+    return {
+        instance_ids[instance_id]
+        for instance_batch in batch(list(instance_ids), FILTER_BATCH_SIZE)
+        for instance_id in boto3_paginate(
+            ec2,
+            'describe_instances',
+            Filters=[
+                {'Name': 'instance-id', 'Values': instance_batch},
+                {
+                    'Name': 'instance-state-name',
+                    'Values': [
+                        'pending',
+                        'running',
+                        'shutting-down',
+                        'stopping',
+                        'stopped',
+                    ],
+                },
+            ],
+            search='Reservations[].Instances[].InstanceId',
+        )
+    }
+
+
+def get_remaining_kinesis_streams(kinesis, stream_arns: list[ResourceRef]) -> set[str]:
+    # There's no filter, but one listing covers every stream in the region
+    return set(
+        boto3_paginate(kinesis, 'list_streams', search='StreamSummaries[].StreamARN')
+    )
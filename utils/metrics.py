@@ -0,0 +1,336 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from inspect import iscoroutinefunction
+from typing import Callable
+
+from config import config
+
+from .aws import register_client_hook
+from .throttle import THROTTLING_ERROR_CODES, get_api_call, get_error_code
+
+# Upper bounds, in seconds, of the latency histogram's buckets - the last
+# bucket holds everything slower
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Calls made outside of a query or terminate function (i.e. bootstrapping)
+UNATTRIBUTED = '-'
+
+# The resource type whose registry function is running, set per thread or task
+_resource_type: contextvars.ContextVar[str] = contextvars.ContextVar(
+    'resource_type', default=UNATTRIBUTED
+)
+
+# Metrics are per process, worker processes pass theirs back with each region
+_api_metrics: dict[tuple[str, str, str], 'ApiCallMetrics'] = {}
+_api_metrics_lock = threading.Lock()
+
+
+@dataclass
+class ApiCallMetrics:
+    """The calls made to one API call, in one region, for one resource type."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    latency_histogram: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    retries: int = 0
+    throttles: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    error_codes: Counter = field(default_factory=Counter)
+
+    def record_latency(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def merge(self, other: 'ApiCallMetrics') -> None:
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.latency_histogram = [
+            count + other_count
+            for count, other_count in zip(
+                self.latency_histogram, other.latency_histogram
+            )
+        ]
+        self.retries += other.retries
+        self.throttles += other.throttles
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.error_codes.update(other.error_codes)
+
+    def get_percentile(self, percentile: float) -> float:
+        """
+        Estimate a latency percentile from the histogram.
+
+        Args:
+            percentile (float): The percentile, between 0 and 1.
+
+        Returns:
+            float: The upper bound of the bucket it falls in, or the slowest
+                call if that's the last bucket.
+
+        """
+        rank = percentile * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.latency_histogram):
+            seen += count
+            if count and seen >= rank:
+                if bucket < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[bucket], self.max_seconds)
+                break
+
+        return self.max_seconds
+
+
+@contextlib.contextmanager
+def resource_type_scope(resource_type: str):
+    # Calls made in the scope, in this thread or task, are attributed to it
+    token = _resource_type.set(resource_type)
+    try:
+        yield
+    finally:
+        _resource_type.reset(token)
+
+
+def attribute_api_calls(resource_type: str, function: Callable) -> Callable:
+    """
+    Wrap a registry function so the API calls it makes are attributed to it.
+
+    Args:
+        resource_type (str): The function's resource type.
+        function (Callable): The query or terminate function, sync or async.
+
+    Returns:
+        Callable: The wrapped function.
+
+    """
+    if iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with resource_type_scope(resource_type):
+                return await function(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with resource_type_scope(resource_type):
+                return function(*args, **kwargs)
+
+    return wrapper
+
+
+def carry_context(function: Callable) -> Callable:
+    # Threads don't inherit context variables (i.e. the resource type and
+    # trace span), so pools hand them on explicitly
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(function, *args, **kwargs)
+
+    return wrapper
+
+
+def get_frame_resource_type(frame) -> str:
+    """
+    Find the resource type a thread's stack is running a registry function for.
+
+    Context variables can't be read from another thread, so samplers walk the
+    stack for the wrappers above instead, innermost first.
+
+    Args:
+        frame: The innermost frame of the stack, i.e. from sys._current_frames().
+
+    Returns:
+        str: The resource type, or UNATTRIBUTED.
+
+    """
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'wrapper' and code.co_filename == __file__:
+            frame_locals = frame.f_locals
+            if 'resource_type' in frame_locals:
+                return frame_locals['resource_type']
+            if 'context' in frame_locals:
+                return frame_locals['context'].get(_resource_type, UNATTRIBUTED)
+        frame = frame.f_back
+
+    return UNATTRIBUTED
+
+
+def get_call_metrics(api_call: str, region_name: str) -> ApiCallMetrics:
+    key = (api_call, region_name, _resource_type.get())
+    if (metrics := _api_metrics.get(key)) is None:
+        with _api_metrics_lock:
+            metrics = _api_metrics.setdefault(key, ApiCallMetrics())
+
+    return metrics
+
+
+def register_api_metrics(client, is_async: bool) -> None:
+    """
+    Record every call a client makes in the run's API metrics.
+
+    Latency is how long the caller waited for the call, including rate limit
+    and concurrency waits and any retries. Throttles and bytes are counted for
+    every attempt.
+
+    Args:
+        client: A boto3 or aiobotocore client.
+        is_async (bool): Whether it's an aiobotocore client.
+
+    Returns:
+        None
+
+    """
+    region_name = client.meta.region_name or 'default'
+
+    def start(model, context, **kwargs):
+        context['metrics'] = get_call_metrics(
+            get_api_call(client, model.name), region_name
+        )
+        context['metrics_started'] = time.perf_counter()
+
+    def count_request(request, **kwargs):
+        if (metrics := request.context.get('metrics')) and isinstance(
+            request.body, (bytes, str)
+        ):
+            with _api_metrics_lock:
+                metrics.request_bytes += len(request.body)
+
+    def count_attempt(response_dict, parsed_response, context, **kwargs):
+        if not (metrics := context.get('metrics')):
+            return
+
+        with _api_metrics_lock:
+            if response_dict and isinstance(response_dict['body'], bytes):
+                metrics.response_bytes += len(response_dict['body'])
+            if get_error_code(parsed_response) in THROTTLING_ERROR_CODES:
+                metrics.throttles += 1
+                context['metrics_throttled'] = True
+
+    def finish(context, parsed=None, exception=None, **kwargs):
+        if not (metrics := context.pop('metrics', None)):
+            return
+
+        elapsed = time.perf_counter() - context.pop('metrics_started')
+        error_code = get_error_code(parsed) or (
+            type(exception).__name__ if exception else None
+        )
+        response_metadata = (parsed or {}).get('ResponseMetadata', {})
+
+        with _api_metrics_lock:
+            metrics.record_latency(elapsed)
+            metrics.retries += response_metadata.get('RetryAttempts', 0)
+            if error_code:
+                metrics.error_codes[error_code] += 1
+            # Responses short-circuited before sending are never counted above
+            if error_code in THROTTLING_ERROR_CODES and not context.get(
+                'metrics_throttled'
+            ):
+                metrics.throttles += 1
+
+    # Registered in front of the rate and concurrency limits, so waiting on
+    # them counts towards the call's latency
+    client.meta.events.register_first('before-call', start)
+    client.meta.events.register('before-send', count_request)
+    client.meta.events.register('response-received', count_attempt)
+    client.meta.events.register('after-call', finish)
+    client.meta.events.register('after-call-error', finish)
+
+
+def install_api_metrics() -> None:
+    # Prometheus exposition reports the same metrics
+    if config.METRICS or config.METRICS_PORT or config.METRICS_TEXTFILE:
+        register_client_hook(register_api_metrics)
+
+
+def get_api_metrics() -> dict[tuple[str, str, str], ApiCallMetrics]:
+    with _api_metrics_lock:
+        return dict(_api_metrics)
+
+
+def merge_api_metrics(metrics: dict[tuple[str, str, str], ApiCallMetrics]) -> None:
+    # Adds metrics recorded elsewhere, i.e. by a worker process
+    with _api_metrics_lock:
+        for key, call_metrics in metrics.items():
+            _api_metrics.setdefault(key, ApiCallMetrics()).merge(call_metrics)
+
+
+def drain_api_metrics() -> dict[tuple[str, str, str], ApiCallMetrics]:
+    # Takes the metrics recorded so far, leaving none behind
+    with _api_metrics_lock:
+        metrics = dict(_api_metrics)
+        _api_metrics.clear()
+
+    return metrics
+
+
+def clear_api_metrics() -> None:
+    with _api_metrics_lock:
+        _api_metrics.clear()
+
+
+def summarise_api_metrics(
+    metrics: dict[tuple[str, str, str], ApiCallMetrics],
+) -> list[dict]:
+    """
+    Total the metrics of each API call and resource type across regions.
+
+    Args:
+        metrics (dict[tuple[str, str, str], ApiCallMetrics]): The metrics keyed
+            by (API call, region, resource type).
+
+    Returns:
+        list[dict]: The totals, the biggest time sinks first.
+
+    """
+    totals: dict[tuple[str, str], ApiCallMetrics] = {}
+    regions: dict[tuple[str, str], set[str]] = {}
+    for (api_call, region_name, resource_type), call_metrics in metrics.items():
+        key = (api_call, resource_type)
+        totals.setdefault(key, ApiCallMetrics()).merge(call_metrics)
+        regions.setdefault(key, set()).add(region_name)
+
+    return [
+        {
+            'api_call': api_call,
+            'resource_type': resource_type,
+            'regions': sorted(regions[(api_call, resource_type)]),
+            'calls': call_metrics.calls,
+            'seconds': round(call_metrics.seconds, 6),
+            'mean_seconds': round(call_metrics.seconds / call_metrics.calls, 6),
+            'p50_seconds': round(call_metrics.get_percentile(0.5), 6),
+            'p95_seconds': round(call_metrics.get_percentile(0.95), 6),
+            'max_seconds': round(call_metrics.max_seconds, 6),
+            'latency_histogram': dict(
+                zip(
+                    [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'],
+                    call_metrics.latency_histogram,
+                )
+            ),
+            'retries': call_metrics.retries,
+            'throttles': call_metrics.throttles,
+            'request_bytes': call_metrics.request_bytes,
+            'response_bytes': call_metrics.response_bytes,
+            'error_codes': dict(call_metrics.error_codes.most_common()),
+        }
+        for (api_call, resource_type), call_metrics in sorted(
+            totals.items(), key=lambda item: item[1].seconds, reverse=True
+        )
+        if call_metrics.calls
+    ]
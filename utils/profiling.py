@@ -0,0 +1,243 @@
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from multiprocessing.util import Finalize
+from typing import Optional
+
+from config import config
+
+from .metrics import get_frame_resource_type
+
+# Seconds between stack samples for the flamegraph
+SAMPLE_INTERVAL = 0.01
+
+# From 3.12 cProfile uses sys.monitoring, which sees every thread
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+# Paths in frame names are shortened to what's after these
+_path_prefixes = sorted(
+    {os.path.join(path, '') for path in sys.path if path and os.path.isdir(path)}
+    | {os.path.join(os.getcwd(), '')},
+    key=len,
+    reverse=True,
+)
+
+
+class ThreadProfiler:
+    """
+    Profiles a run with cProfile, including the threads it starts.
+
+    Before 3.12 cProfile only sees the thread that enabled it, so each new
+    thread enables its own profile and they're combined at the end.
+    """
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        self.thread_profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def profile_thread(self, *args) -> None:
+        # threading.setprofile hook, so runs once as each new thread starts
+        profile = cProfile.Profile()
+        with self._lock:
+            self.thread_profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(self.profile_thread)
+        self.profile.enable()
+
+    def stop(self, path: str) -> None:
+        # The main profile goes first, disabling the others also disables
+        # profiling of the calling thread
+        self.profile.disable()
+        threading.setprofile(None)
+
+        stats = pstats.Stats(self.profile)
+        with self._lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        stats.dump_stats(path)
+
+
+def get_frame_name(code, frame_names: dict) -> str:
+    if (frame_name := frame_names.get(code)) is None:
+        filename = code.co_filename
+        for prefix in _path_prefixes:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix) :]
+                break
+
+        qualified_name = getattr(code, 'co_qualname', code.co_name)
+        frame_name = frame_names[code] = (
+            f'{qualified_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+        )
+
+    return frame_name
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples every thread's stack, for a collapsed-stack flamegraph.
+
+    Each sample is weighted by the CPU time its thread used since the last one,
+    in microseconds, so threads waiting on AWS add nothing. Where threads have
+    no CPU clock (i.e. macOS), samples are weighted by wall time instead.
+    Stacks start with the resource type they're running a registry function
+    for.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        super().__init__(daemon=True, name='apocalypse-stack-sampler')
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.uses_cpu_clocks = hasattr(time, 'pthread_getcpuclockid')
+        self.stopped = threading.Event()
+        self._cpu_clocks: dict[int, tuple[int, int]] = {}
+        self._frame_names: dict = {}
+
+    def get_weight(self, thread_id: int) -> int:
+        if not self.uses_cpu_clocks:
+            return int(self.interval * 1_000_000)
+
+        try:
+            # Clocks are looked up while the thread is known to be alive
+            if (cpu_clock := self._cpu_clocks.get(thread_id)) is None:
+                clock_id = time.pthread_getcpuclockid(thread_id)
+                self._cpu_clocks[thread_id] = (
+                    clock_id,
+                    time.clock_gettime_ns(clock_id),
+                )
+                return 0
+
+            clock_id, last_cpu_ns = cpu_clock
+            cpu_ns = time.clock_gettime_ns(clock_id)
+        except OSError:
+            return 0
+
+        self._cpu_clocks[thread_id] = (clock_id, cpu_ns)
+        return (cpu_ns - last_cpu_ns) // 1000
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        for thread_id in set(self._cpu_clocks) - set(frames):
+            del self._cpu_clocks[thread_id]
+
+        for thread_id, frame in frames.items():
+            if thread_id == self.ident or not (weight := self.get_weight(thread_id)):
+                continue
+
+            stack = []
+            leaf = frame
+            while frame is not None:
+                stack.append(get_frame_name(frame.f_code, self._frame_names))
+                frame = frame.f_back
+            stack.append(get_frame_resource_type(leaf))
+
+            self.stacks[';'.join(reversed(stack))] += weight
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self, path: str) -> None:
+        self.stopped.set()
+        self.join()
+
+        with open(path, 'w') as folded_file:
+            for stack, weight in sorted(self.stacks.items()):
+                folded_file.write(f'{stack} {weight}\n')
+
+    def get_resource_type_weights(self) -> Counter:
+        weights = Counter()
+        for stack, weight in self.stacks.items():
+            weights[stack.split(';', 1)[0]] += weight
+
+        return weights
+
+
+class CPUProfiler:
+    # The cProfile profile and the stack sampler, as configured
+    def __init__(self, profile_path: str, flamegraph_path: str) -> None:
+        self.profile_path = profile_path
+        self.flamegraph_path = flamegraph_path
+        self.thread_profiler = ThreadProfiler() if profile_path else None
+        self.sampler = StackSampler() if flamegraph_path else None
+        self.started = (time.perf_counter(), time.process_time())
+
+    def start(self) -> None:
+        if self.sampler:
+            self.sampler.start()
+        if self.thread_profiler:
+            self.thread_profiler.start()
+
+    def stop(self, suffix: str = '') -> None:
+        if self.thread_profiler:
+            self.thread_profiler.stop(self.profile_path + suffix)
+        if self.sampler:
+            self.sampler.stop(self.flamegraph_path + suffix)
+
+    def show_summary(self) -> None:
+        # Whether the run was waiting on AWS, or on Python
+        wall_seconds = time.perf_counter() - self.started[0]
+        cpu_seconds = time.process_time() - self.started[1]
+        print(
+            f'CPU Profile: {cpu_seconds:.1f}s CPU in {wall_seconds:.1f}s'
+            f' ({cpu_seconds / wall_seconds:.0%} of a core)',
+            file=sys.stderr,
+        )
+
+        if self.sampler and (weights := self.sampler.get_resource_type_weights()):
+            total = weights.total()
+            print(
+                'CPU By Resource Type: '
+                + ', '.join(
+                    f'{resource_type} {weight / total:.0%}'
+                    for resource_type, weight in weights.most_common(5)
+                ),
+                file=sys.stderr,
+            )
+
+
+def get_cpu_profiler() -> Optional[CPUProfiler]:
+    if not config.PROFILE_CPU and not config.PROFILE_CPU_FLAMEGRAPH:
+        return None
+
+    return CPUProfiler(config.PROFILE_CPU, config.PROFILE_CPU_FLAMEGRAPH)
+
+
+@contextlib.contextmanager
+def profile_cpu():
+    """
+    Profile the block, as configured by --profile-cpu and --profile-cpu-flamegraph.
+
+    The profile and flamegraph are written, and a summary shown on stderr, once
+    the block ends, even if it raised.
+
+    Yields:
+        None
+
+    """
+    if not (profiler := get_cpu_profiler()):
+        yield
+        return
+
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        profiler.show_summary()
+
+
+def install_worker_cpu_profiler() -> None:
+    # Worker processes write their own files, suffixed with their PID
+    if profiler := get_cpu_profiler():
+        profiler.start()
+        Finalize(profiler, profiler.stop, args=(f'.{os.getpid()}',), exitpriority=0)
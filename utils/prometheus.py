@@ -0,0 +1,405 @@
+import contextlib
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+from config import config
+from registry import DeleteResponse
+
+from .metrics import LATENCY_BUCKETS, ApiCallMetrics, get_api_metrics
+from .resource import ResourceRef
+from .throttle import get_concurrency_limits
+
+# Seconds between rewrites of the textfile while a run is going
+TEXTFILE_INTERVAL = 15
+
+# Resources per (resource type, region), and failures per error code too
+_discovered: Counter = Counter()
+_deleted: Counter = Counter()
+_failed: Counter = Counter()
+_in_flight: Counter = Counter()
+
+# Phase name to (started, ended), ended is None while it's running
+_phases: dict[str, tuple[float, Optional[float]]] = {}
+_run: dict[str, float] = {}
+_labels: dict[str, str] = {}
+_lock = threading.Lock()
+
+_server: Optional[ThreadingHTTPServer] = None
+_textfile_writer: Optional['TextfileWriter'] = None
+
+
+def count_discovered_resources(
+    results: Iterator[tuple[str, str, list[ResourceRef]]],
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    # Counts scan results as they pass through, whichever engine found them
+    for region, resource_type, resource_arns in results:
+        with _lock:
+            _discovered[(resource_type, region)] += len(resource_arns)
+        yield region, resource_type, resource_arns
+
+
+def count_deletion_outcomes(
+    region: str, resource_type: str, response: DeleteResponse
+) -> None:
+    with _lock:
+        _deleted[(resource_type, region)] += len(response.successful)
+        for error_code, resource_arns in response.failures.items():
+            _failed[(resource_type, region, error_code)] += len(resource_arns)
+
+
+@contextlib.contextmanager
+def deletions_in_flight(region: str, resource_type: str, count: int):
+    # Resources handed to a terminate function that hasn't returned yet
+    with _lock:
+        _in_flight[(resource_type, region)] += count
+    try:
+        yield
+    finally:
+        with _lock:
+            _in_flight[(resource_type, region)] -= count
+
+
+@contextlib.contextmanager
+def time_phase(name: str):
+    with _lock:
+        _phases[name] = (time.time(), None)
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases[name] = (_phases[name][0], time.time())
+
+
+def set_metric_labels(**labels: str) -> None:
+    # Labels on every metric (i.e. the account), once they're known
+    with _lock:
+        _labels.update(labels)
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: dict) -> str:
+    labels = {**_labels, **labels}
+    if not labels:
+        return ''
+
+    return (
+        '{'
+        + ','.join(
+            f'{name}="{escape_label_value(value)}"' for name, value in labels.items()
+        )
+        + '}'
+    )
+
+
+class Exposition:
+    # Builds the Prometheus text format, one metric family at a time
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def add(self, name: str, metric_type: str, help_text: str, samples) -> None:
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {metric_type}')
+        for suffix, labels, value in samples:
+            self.lines.append(f'{name}{suffix}{format_labels(labels)} {value}')
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def get_api_call_samples(metrics: dict[tuple[str, str], ApiCallMetrics], field: str):
+    return [
+        ('', {'api_call': api_call, 'region': region}, getattr(call_metrics, field))
+        for (api_call, region), call_metrics in sorted(metrics.items())
+    ]
+
+
+def get_api_histogram_samples(metrics: dict[tuple[str, str], ApiCallMetrics]):
+    samples = []
+    for (api_call, region), call_metrics in sorted(metrics.items()):
+        labels = {'api_call': api_call, 'region': region}
+        seen = 0
+        for bound, count in zip(
+            [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'],
+            call_metrics.latency_histogram,
+        ):
+            seen += count
+            samples.append(('_bucket', {**labels, 'le': bound}, seen))
+        samples.append(('_sum', labels, round(call_metrics.seconds, 6)))
+        samples.append(('_count', labels, call_metrics.calls))
+
+    return samples
+
+
+def render_metrics() -> str:
+    """
+    Render the run's metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics.
+
+    """
+    # API metrics are kept per resource type too, which is too many series
+    api_metrics: dict[tuple[str, str], ApiCallMetrics] = defaultdict(ApiCallMetrics)
+    for (api_call, region, _), call_metrics in get_api_metrics().items():
+        api_metrics[(api_call, region)].merge(call_metrics)
+
+    now = time.time()
+    with _lock:
+        discovered = sorted(_discovered.items())
+        deleted = sorted(_deleted.items())
+        failed = sorted(_failed.items())
+        in_flight = sorted(_in_flight.items())
+        phases = sorted(_phases.items())
+        run = dict(_run)
+
+    exposition = Exposition()
+    exposition.add(
+        'apocalypse_resources_discovered_total',
+        'counter',
+        'Resources found by the scan.',
+        [
+            ('', {'resource_type': resource_type, 'region': region}, count)
+            for (resource_type, region), count in discovered
+        ],
+    )
+    exposition.add(
+        'apocalypse_resources_deleted_total',
+        'counter',
+        'Resources deleted.',
+        [
+            ('', {'resource_type': resource_type, 'region': region}, count)
+            for (resource_type, region), count in deleted
+        ],
+    )
+    exposition.add(
+        'apocalypse_resources_failed_total',
+        'counter',
+        'Failed deletion attempts, retried ones included.',
+        [
+            (
+                '',
+                {
+                    'resource_type': resource_type,
+                    'region': region,
+                    'error_code': error_code,
+                },
+                count,
+            )
+            for (resource_type, region, error_code), count in failed
+        ],
+    )
+    exposition.add(
+        'apocalypse_deletions_in_flight',
+        'gauge',
+        'Resources whose terminate function is running.',
+        [
+            ('', {'resource_type': resource_type, 'region': region}, count)
+            for (resource_type, region), count in in_flight
+        ],
+    )
+    exposition.add(
+        'apocalypse_api_calls_total',
+        'counter',
+        'API calls made.',
+        get_api_call_samples(api_metrics, 'calls'),
+    )
+    exposition.add(
+        'apocalypse_api_call_duration_seconds',
+        'histogram',
+        'How long API calls took, including rate limit waits and retries.',
+        get_api_histogram_samples(api_metrics),
+    )
+    exposition.add(
+        'apocalypse_api_retries_total',
+        'counter',
+        'API call attempts retried by botocore.',
+        get_api_call_samples(api_metrics, 'retries'),
+    )
+    exposition.add(
+        'apocalypse_api_throttles_total',
+        'counter',
+        'Throttled API call attempts.',
+        get_api_call_samples(api_metrics, 'throttles'),
+    )
+    exposition.add(
+        'apocalypse_api_errors_total',
+        'counter',
+        'API calls that failed.',
+        [
+            ('', {'api_call': api_call, 'region': region, 'error_code': code}, count)
+            for (api_call, region), call_metrics in sorted(api_metrics.items())
+            for code, count in sorted(call_metrics.error_codes.items())
+        ],
+    )
+
+    concurrency_limits = sorted(
+        get_concurrency_limits().items(),
+        key=lambda item: (item[0][0], item[0][1] or ''),
+    )
+    exposition.add(
+        'apocalypse_api_calls_in_flight',
+        'gauge',
+        'API calls in flight per service (adaptive concurrency).',
+        [
+            ('', {'service': service, 'region': region or 'default'}, limit.in_flight)
+            for (service, region), limit in concurrency_limits
+        ],
+    )
+    exposition.add(
+        'apocalypse_api_concurrency_limit',
+        'gauge',
+        'Current adaptive concurrency limit per service.',
+        [
+            ('', {'service': service, 'region': region or 'default'}, int(limit.limit))
+            for (service, region), limit in concurrency_limits
+        ],
+    )
+
+    exposition.add(
+        'apocalypse_phase_duration_seconds',
+        'gauge',
+        'How long each phase of the run took, or has taken so far.',
+        [
+            ('', {'phase': name}, round((ended or now) - started, 3))
+            for name, (started, ended) in phases
+        ],
+    )
+    exposition.add(
+        'apocalypse_run_start_timestamp_seconds',
+        'gauge',
+        'When the run started.',
+        [('', {}, run['started'])] if 'started' in run else [],
+    )
+    exposition.add(
+        'apocalypse_run_end_timestamp_seconds',
+        'gauge',
+        'When the run ended.',
+        [('', {}, run['ended'])] if 'ended' in run else [],
+    )
+    exposition.add(
+        'apocalypse_run_success',
+        'gauge',
+        'Whether the run finished without an error.',
+        [('', {}, run['success'])] if 'success' in run else [],
+    )
+
+    return exposition.render()
+
+
+def write_textfile(path: str) -> None:
+    # Written aside then renamed, so the textfile collector never reads half
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as textfile:
+        textfile.write(render_metrics())
+    os.replace(temp_path, path)
+
+
+class TextfileWriter(threading.Thread):
+    """Rewrites the textfile every TEXTFILE_INTERVAL seconds while a run goes."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(daemon=True)
+        self.path = path
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(TEXTFILE_INTERVAL):
+            write_textfile(self.path)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+        write_textfile(self.path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Scrapes would otherwise be logged over the run's output
+        pass
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """
+    Serve the run's metrics on http://0.0.0.0:<port>/metrics.
+
+    The server runs in a daemon thread until the process exits, and is reused
+    by later runs in the same process (i.e. a warm Lambda).
+
+    Args:
+        port (int): The port to listen on.
+
+    Returns:
+        ThreadingHTTPServer: The server.
+
+    """
+    global _server
+
+    if _server and _server.server_address[1] == port:
+        return _server
+
+    _server = ThreadingHTTPServer(('', port), MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def clear_exposition() -> None:
+    with _lock:
+        for counter in (_discovered, _deleted, _failed, _in_flight):
+            counter.clear()
+        _phases.clear()
+        _run.clear()
+        _labels.clear()
+
+
+def install_exposition() -> None:
+    """
+    Start exposing the run's metrics, as configured.
+
+    Returns:
+        None
+
+    """
+    global _textfile_writer
+
+    clear_exposition()
+    with _lock:
+        _run['started'] = time.time()
+
+    if config.METRICS_PORT:
+        start_metrics_server(config.METRICS_PORT)
+
+    if config.METRICS_TEXTFILE:
+        _textfile_writer = TextfileWriter(config.METRICS_TEXTFILE)
+        _textfile_writer.start()
+
+
+def finish_exposition(successful: bool) -> None:
+    global _textfile_writer
+
+    with _lock:
+        _run['ended'] = time.time()
+        _run['success'] = int(successful)
+
+    if _textfile_writer:
+        _textfile_writer.stop()
+        _textfile_writer = None
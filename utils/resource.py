@@ -0,0 +1,104 @@
+import sys
+from functools import lru_cache
+from typing import Union
+
+
+@lru_cache(maxsize=None)
+def parse_prefix(prefix: str) -> tuple[str, str, str, str, str]:
+    # arn:partition:service:region:account:[resource_type(/|:)]
+    _, partition, service, region, account_id, resource_type = prefix.split(':', 5)
+    return partition, service, region, account_id, resource_type.rstrip('/:')
+
+
+class ResourceRef:
+    """
+    A resource ARN, parsed once.
+
+    ARNs are arn:partition:service:region:account:resource, where the resource
+    is "id", "type/id" or "type:id". Everything before the ID is held as one
+    interned prefix shared by every ref of that type, account and region, and
+    its components are parsed once per prefix.
+
+    Refs compare and hash equal to their ARN strings, so they can be looked up
+    alongside plain ARNs. Use str() (or .arn) where an ARN string is needed,
+    such as API parameters and output.
+    """
+
+    __slots__ = ('prefix', 'resource_id')
+
+    def __init__(self, prefix: str, resource_id: str) -> None:
+        self.prefix = sys.intern(prefix)
+        self.resource_id = resource_id
+
+    @classmethod
+    def from_arn(cls, arn: Union[str, 'ResourceRef']) -> 'ResourceRef':
+        if isinstance(arn, ResourceRef):
+            return arn
+
+        parts = arn.split(':', 5)
+        if len(parts) < 6:
+            raise ValueError(f'Invalid ARN: {arn}')
+
+        resource = parts[5]
+        separators = [
+            index for index in (resource.find('/'), resource.find(':')) if index >= 0
+        ]
+        id_start = min(separators) + 1 if separators else 0
+
+        return cls(arn[: len(arn) - len(resource) + id_start], resource[id_start:])
+
+    @property
+    def arn(self) -> str:
+        return self.prefix + self.resource_id
+
+    @property
+    def partition(self) -> str:
+        return parse_prefix(self.prefix)[0]
+
+    @property
+    def service(self) -> str:
+        return parse_prefix(self.prefix)[1]
+
+    @property
+    def region(self) -> str:
+        return parse_prefix(self.prefix)[2]
+
+    @property
+    def account_id(self) -> str:
+        return parse_prefix(self.prefix)[3]
+
+    @property
+    def resource_type(self) -> str:
+        return parse_prefix(self.prefix)[4]
+
+    @property
+    def name(self) -> str:
+        # The last part of a path-style ID, e.g. an IAM role's name
+        return self.resource_id.rsplit('/', 1)[-1]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ResourceRef):
+            return self.prefix == other.prefix and self.resource_id == other.resource_id
+        if isinstance(other, str):
+            return self.arn == other
+        return NotImplemented
+
+    def __lt__(self, other) -> bool:
+        return self.arn < str(other)
+
+    def __hash__(self) -> int:
+        return hash(self.arn)
+
+    def __str__(self) -> str:
+        return self.arn
+
+    def __repr__(self) -> str:
+        return f'ResourceRef({self.arn!r})'
+
+    def __reduce__(self):
+        # Re-intern the prefix when passed between processes
+        return ResourceRef, (self.prefix, self.resource_id)
+
+
+def to_resource_refs(resource_arns: list[str]) -> list[ResourceRef]:
+    return [ResourceRef.from_arn(arn) for arn in resource_arns]
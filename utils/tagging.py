@@ -0,0 +1,230 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import boto3
+import botocore.exceptions
+
+from config import config
+
+from . import TAG_API_BATCH_SIZE, TAGGING_API_RESOURCE_TYPES
+from .aws import boto3_paginate, boto3_tag_list_to_dict, get_client
+from .general import batch
+from .metrics import carry_context
+
+# {arn: tags} per (session, region), or None where the Tagging API isn't usable
+_tag_indexes: dict[tuple, Optional[dict[str, dict]]] = {}
+_tag_index_locks: dict[tuple, threading.Lock] = {}
+_tag_index_lock = threading.Lock()
+
+
+def build_tag_index(
+    session: boto3.session.Session, region: str
+) -> Optional[dict[str, dict]]:
+    """
+    Sweep every supported, tagged resource in a region with its tags.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The region to sweep.
+
+    Returns:
+        Optional[dict[str, dict]]: The tags keyed by ARN, or None if the
+            Tagging API can't be used in this region.
+
+    """
+    tagging = get_client(session, 'resourcegroupstaggingapi', region)
+
+    try:
+        return {
+            resource['ResourceARN']: boto3_tag_list_to_dict(resource['Tags'])
+            for resource in boto3_paginate(
+                tagging,
+                'get_resources',
+                ResourceTypeFilters=sorted(set(TAGGING_API_RESOURCE_TYPES.values())),
+                search='ResourceTagMappingList[]',
+            )
+        }
+    except botocore.exceptions.ClientError:
+        return None
+
+
+def get_tag_index(
+    session: boto3.session.Session, region: str
+) -> Optional[dict[str, dict]]:
+    """
+    Get the region's tag index, sweeping it on first use.
+
+    Work units in the same region wait for a single sweep rather than each
+    making their own.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The region.
+
+    Returns:
+        Optional[dict[str, dict]]: The tags keyed by ARN, or None if the
+            Tagging API can't be used in this region.
+
+    """
+    key = (session, region)
+    if key in _tag_indexes:
+        return _tag_indexes[key]
+
+    with _tag_index_lock:
+        region_lock = _tag_index_locks.setdefault(key, threading.Lock())
+
+    with region_lock:
+        if key not in _tag_indexes:
+            _tag_indexes[key] = build_tag_index(session, region)
+
+    return _tag_indexes[key]
+
+
+def get_resource_tags(
+    session: boto3.session.Session,
+    region: str,
+    resource_arn: str,
+    fetch_tags: Callable[[], dict],
+) -> dict:
+    """
+    Get a resource's tags, from the tag index when using Tagging API discovery.
+
+    Only resources in the index are taken from it. A resource can be missing
+    because it has no tags, but also because its tags haven't reached the
+    Tagging API yet or its ARN doesn't match the one the API reports, so its
+    own tag call is made before it can be deleted - unless exceptions aren't
+    allowed, when no tag would spare it. If the sweep failed, every resource's
+    own tag call is made.
+
+    Args:
+        session: The Boto3 session object.
+        region (str): The resource's region.
+        resource_arn (str): The resource ARN, as the Tagging API reports it.
+        fetch_tags (Callable[[], dict]): Gets the tags with the native API.
+
+    Returns:
+        dict: The resource's tags.
+
+    """
+    if config.DISCOVERY == 'tagging-api':
+        tag_index = get_tag_index(session, region)
+        if tag_index is not None:
+            if resource_arn in tag_index:
+                return tag_index[resource_arn]
+            if not config.ALLOW_EXCEPTIONS:
+                return {}
+
+    return fetch_tags()
+
+
+def fetch_cloudtrail_tags(cloudtrail, trail_arns: list[str]) -> dict[str, list]:
+    return {
+        resource['ResourceId']: resource.get('TagsList', [])
+        for resource in cloudtrail.list_tags(ResourceIdList=trail_arns)[
+            'ResourceTagList'
+        ]
+    }
+
+
+def fetch_ecs_cluster_tags(ecs, cluster_arns: list[str]) -> dict[str, list]:
+    return {
+        cluster['clusterArn']: cluster.get('tags', [])
+        for cluster in ecs.describe_clusters(clusters=cluster_arns, include=['TAGS'])[
+            'clusters'
+        ]
+    }
+
+
+def fetch_elb_tags(elb, lb_names: list[str]) -> dict[str, list]:
+    return {
+        description['LoadBalancerName']: description['Tags']
+        for description in elb.describe_tags(LoadBalancerNames=lb_names)[
+            'TagDescriptions'
+        ]
+    }
+
+
+def fetch_elbv2_tags(elb, resource_arns: list[str]) -> dict[str, list]:
+    return {
+        description['ResourceArn']: description['Tags']
+        for description in elb.describe_tags(ResourceArns=resource_arns)[
+            'TagDescriptions'
+        ]
+    }
+
+
+# Batch tag calls, named as in TAG_API_BATCH_SIZE, and how to fetch one batch
+BATCH_TAG_FETCHERS = {
+    'cloudtrail.list_tags': fetch_cloudtrail_tags,
+    'ecs.describe_clusters': fetch_ecs_cluster_tags,
+    'elasticloadbalancing.describe_tags': fetch_elb_tags,
+    'elasticloadbalancingv2.describe_tags': fetch_elbv2_tags,
+}
+
+
+class TagResolver:
+    """
+    Fetches tags for many resources at once with a service's batch tag call.
+
+    Identifiers are split into batches of the call's TAG_API_BATCH_SIZE, the
+    batches are fetched concurrently and each resource's tags are returned as
+    a dict, ready for check_delete.
+    """
+
+    def __init__(self, client, operation_name: str) -> None:
+        self.client = client
+        self.api_call = f'{client.__class__.__name__.lower()}.{operation_name}'
+        self.batch_size = TAG_API_BATCH_SIZE[self.api_call]
+        self.fetch_batch = BATCH_TAG_FETCHERS[self.api_call]
+
+    def fetch(self, identifiers: list[str]) -> dict[str, list]:
+        return self.fetch_batch(self.client, identifiers)
+
+    def resolve(self, identifiers: list[str]) -> dict[str, dict]:
+        """
+        Get the tags for each resource.
+
+        Args:
+            identifiers (list[str]): The resource ARNs, or names where the batch
+                call takes names.
+
+        Returns:
+            dict[str, dict]: The tags keyed by identifier, in the order given.
+                Resources the call no longer finds are left out.
+
+        """
+        batches = list(batch(identifiers, self.batch_size))
+
+        if len(batches) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(len(batches), config.MAX_WORKERS)
+            ) as pool:
+                tag_lists = list(pool.map(carry_context(self.fetch), batches))
+        else:
+            tag_lists = [self.fetch(identifiers) for identifiers in batches]
+
+        found = {
+            identifier: boto3_tag_list_to_dict(tag_list)
+            for batch_tag_lists in tag_lists
+            for identifier, tag_list in batch_tag_lists.items()
+        }
+
+        return {
+            identifier: found[identifier]
+            for identifier in identifiers
+            if identifier in found
+        }
+
+
+def set_tag_index(
+    session: boto3.session.Session, region: str, tag_index: Optional[dict[str, dict]]
+) -> None:
+    # Use this index for the region instead of sweeping it
+    _tag_indexes[(session, region)] = tag_index
+
+
+def clear_tag_indexes() -> None:
+    with _tag_index_lock:
+        _tag_indexes.clear()
+        _tag_index_locks.clear()
@@ -0,0 +1,382 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from botocore import xform_name
+
+from . import API_RATE_LIMITS
+
+# Error codes AWS uses to say a caller is being throttled
+THROTTLING_ERROR_CODES = {
+    'BandwidthLimitExceeded',
+    'EC2ThrottledException',
+    'LimitExceededException',
+    'PriorRequestNotComplete',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'ThrottledException',
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'TransactionInProgressException',
+}
+
+# Calls in flight a service and region's adaptive limit starts at
+INITIAL_CONCURRENCY = 4
+
+# Buckets and limits are per process, which is fine as process workers are
+# sharded by region
+_buckets: dict[tuple[Optional[str], Optional[str], str], 'TokenBucket'] = {}
+_buckets_lock = threading.Lock()
+_concurrency_limits: dict[tuple[str, Optional[str]], 'AdaptiveConcurrencyLimit'] = {}
+
+# The concurrency slot held by the client call running in this thread or task
+_call_slot: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    'call_slot', default=None
+)
+
+
+class TokenBucket:
+    """
+    A token bucket that paces callers to a steady rate after an initial burst.
+
+    Tokens are reserved up front, so waiting callers are released in the
+    order they arrived and never race each other for the next token.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, returning how long to wait before it can be used.
+
+        Returns:
+            float: The delay in seconds, 0 if a token was available.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        if delay := self.reserve():
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        if delay := self.reserve():
+            await asyncio.sleep(delay)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    An AIMD limit on the calls in flight to a single service and region.
+
+    The limit starts at `initial_limit` and, until the first throttle, grows by
+    one for every successful call (doubling each round trip) to find the
+    highest concurrency AWS accepts. After that it grows by roughly one for
+    every limit's worth of successful calls, never past `max_limit`, and halves
+    when a call is throttled. Throttles from calls that started before the last
+    cut are ignored, so a burst of them only cuts once.
+
+    Slots are shared by threads and event loops. Async callers wait on a future
+    of their own loop, resolved when a slot is released, rather than polling.
+    """
+
+    def __init__(self, max_limit: int, initial_limit: int = INITIAL_CONCURRENCY):
+        self.max_limit = max_limit
+        self.limit = float(min(initial_limit, max_limit))
+        self.in_flight = 0
+        self.throttles = 0
+        self._epoch = 0
+        self._condition = threading.Condition()
+        self._async_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = (
+            deque()
+        )
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _take_slot(self) -> int:
+        self.in_flight += 1
+        return self._epoch
+
+    def _wake_async_waiters(self) -> None:
+        # Called holding the condition, one waiter per free slot, and woken
+        # waiters retry as a thread may have taken the slot first
+        free_slots = int(self.limit) - self.in_flight
+        while free_slots > 0 and self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            with contextlib.suppress(RuntimeError):  # Its loop has closed
+                loop.call_soon_threadsafe(wake_future, future)
+                free_slots -= 1
+
+    def _notify(self, count: Optional[int] = None) -> None:
+        if count is None:
+            self._condition.notify_all()
+        else:
+            self._condition.notify(count)
+        self._wake_async_waiters()
+
+    def try_acquire(self) -> Optional[int]:
+        with self._condition:
+            if not self._has_capacity():
+                return None
+
+            return self._take_slot()
+
+    def acquire(self) -> int:
+        """
+        Wait for a free slot and take it.
+
+        Returns:
+            int: The epoch the call started in, passed back to on_throttle.
+
+        """
+        with self._condition:
+            self._condition.wait_for(self._has_capacity)
+            return self._take_slot()
+
+    async def acquire_async(self) -> int:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            with self._condition:
+                if self._has_capacity():
+                    return self._take_slot()
+
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                    else:
+                        # It was woken for a slot it won't take, so pass it on
+                        self._wake_async_waiters()
+                raise
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._notify(1)
+
+    def on_success(self) -> None:
+        with self._condition:
+            growth = 1 if not self.throttles else 1 / self.limit
+            self.limit = min(self.max_limit, self.limit + growth)
+            self._notify()
+
+    def on_throttle(self, epoch: Optional[int]) -> None:
+        with self._condition:
+            self.throttles += 1
+            if epoch == self._epoch:
+                self.limit = max(1.0, self.limit / 2)
+                self._epoch += 1
+
+
+def wake_future(future: asyncio.Future) -> None:
+    # Waiters may have been cancelled since they were woken
+    if not future.done():
+        future.set_result(None)
+
+
+def get_api_call(client, operation_name: str) -> str:
+    # Matches the naming used by API_MAX_PAGE_SIZE and API_RATE_LIMITS
+    return f'{client.__class__.__name__.lower()}.{xform_name(operation_name)}'
+
+
+def get_bucket(
+    account_id: Optional[str], region_name: Optional[str], api_call: str
+) -> Optional[TokenBucket]:
+    """
+    Get the shared bucket for an API call, if it has a declared rate limit.
+
+    Args:
+        account_id (Optional[str]): The account being called.
+        region_name (Optional[str]): The client's region.
+        api_call (str): The 'service.method' API call.
+
+    Returns:
+        Optional[TokenBucket]: The bucket, or None if the call isn't limited.
+
+    """
+    if api_call not in API_RATE_LIMITS:
+        return None
+
+    key = (account_id, region_name, api_call)
+    if (bucket := _buckets.get(key)) is None:
+        with _buckets_lock:
+            if (bucket := _buckets.get(key)) is None:
+                bucket = _buckets[key] = TokenBucket(*API_RATE_LIMITS[api_call])
+
+    return bucket
+
+
+def get_concurrency_limit(
+    service_name: str, region_name: Optional[str], max_limit: int
+) -> AdaptiveConcurrencyLimit:
+    key = (service_name, region_name)
+    if (limit := _concurrency_limits.get(key)) is None:
+        with _buckets_lock:
+            if (limit := _concurrency_limits.get(key)) is None:
+                limit = _concurrency_limits[key] = AdaptiveConcurrencyLimit(max_limit)
+
+    return limit
+
+
+def get_concurrency_limits() -> dict[tuple, AdaptiveConcurrencyLimit]:
+    return dict(_concurrency_limits)
+
+
+def clear_throttle_state() -> None:
+    # Rate limit buckets and concurrency limits start afresh
+    with _buckets_lock:
+        _buckets.clear()
+        _concurrency_limits.clear()
+
+
+def get_error_code(parsed: Optional[dict]) -> Optional[str]:
+    return (parsed or {}).get('Error', {}).get('Code')
+
+
+def register_adaptive_concurrency(client, max_limit: int) -> None:
+    """
+    Hold each call to a slot of its service and region's adaptive limit.
+
+    The slot is taken in before-call, once the call has its rate limit token,
+    and given back when the client's _make_api_call returns or raises, so a
+    call failing before it's sent (i.e. in another before-call handler) can't
+    leak it. Throttled attempts are seen through needs-retry, so botocore's own
+    retries still cut the limit. Responses short-circuited before sending
+    (which never retry) are checked in after-call instead.
+
+    Args:
+        client: A boto3 or aiobotocore client.
+        max_limit (int): The most calls to ever allow in flight, the limit
+            starts lower and grows towards it.
+
+    Returns:
+        None
+
+    """
+    limit = get_concurrency_limit(
+        client.__class__.__name__.lower(), client.meta.region_name, max_limit
+    )
+    make_api_call = client._make_api_call
+
+    def get_epoch() -> Optional[int]:
+        return (_call_slot.get() or {}).get('epoch')
+
+    def acquire(**kwargs):
+        if (slot := _call_slot.get()) is not None:
+            slot['epoch'] = limit.acquire()
+
+    async def acquire_async(**kwargs):
+        if (slot := _call_slot.get()) is not None:
+            slot['epoch'] = await limit.acquire_async()
+
+    def release(slot: dict) -> None:
+        if slot.pop('epoch', None) is not None:
+            limit.release()
+
+    def limited_api_call(operation_name, api_params):
+        token = _call_slot.set(slot := {})
+        try:
+            return make_api_call(operation_name, api_params)
+        finally:
+            _call_slot.reset(token)
+            release(slot)
+
+    async def limited_api_call_async(operation_name, api_params):
+        token = _call_slot.set(slot := {})
+        try:
+            return await make_api_call(operation_name, api_params)
+        finally:
+            _call_slot.reset(token)
+            release(slot)
+
+    def check_retry(request_dict, response, **kwargs):
+        if response and get_error_code(response[1]) in THROTTLING_ERROR_CODES:
+            request_dict['context']['concurrency_throttled'] = True
+            limit.on_throttle(get_epoch())
+
+    def check_response(http_response, parsed, context, **kwargs):
+        if http_response.status_code < 300:
+            limit.on_success()
+        elif get_error_code(parsed) in THROTTLING_ERROR_CODES and not context.get(
+            'concurrency_throttled'
+        ):
+            limit.on_throttle(get_epoch())
+
+    is_async = asyncio.iscoroutinefunction(make_api_call)
+    client._make_api_call = limited_api_call_async if is_async else limited_api_call
+    client.meta.events.register_first(
+        'before-call', acquire_async if is_async else acquire
+    )
+    client.meta.events.register('needs-retry', check_retry)
+    client.meta.events.register('after-call', check_response)
+
+
+def register_rate_limits(client, account_id: Optional[str]) -> None:
+    """
+    Pace a client's calls to the limits declared in API_RATE_LIMITS.
+
+    Args:
+        client: A boto3 client.
+        account_id (Optional[str]): The account the client calls into.
+
+    Returns:
+        None
+
+    """
+    region_name = client.meta.region_name
+
+    def limit(model, **kwargs):
+        api_call = get_api_call(client, model.name)
+        if bucket := get_bucket(account_id, region_name, api_call):
+            bucket.acquire()
+
+    client.meta.events.register_first('before-call', limit)
+
+
+def register_rate_limits_async(client, account_id: Optional[str]) -> None:
+    """
+    Pace an aiobotocore client's calls without blocking the event loop.
+
+    Args:
+        client: An aiobotocore client.
+        account_id (Optional[str]): The account the client calls into.
+
+    Returns:
+        None
+
+    """
+    region_name = client.meta.region_name
+
+    async def limit(model, **kwargs):
+        api_call = get_api_call(client, model.name)
+        if bucket := get_bucket(account_id, region_name, api_call):
+            await bucket.acquire_async()
+
+    client.meta.events.register_first('before-call', limit)
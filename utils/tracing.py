@@ -0,0 +1,519 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from inspect import iscoroutinefunction
+from typing import Callable, Optional
+
+from config import config
+
+from .aws import register_client_hook
+from .throttle import get_api_call, get_error_code
+
+# Finished spans are exported in batches of this many
+EXPORT_BATCH_SIZE = 512
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+# The span calls and waits in this thread or task belong to
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar(
+    'current_span', default=None
+)
+
+# The run's tracer, None unless tracing is configured
+_tracer: Optional['Tracer'] = None
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_otlp(self, trace_id: str) -> dict:
+        otlp_span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': to_otlp_attributes(self.attributes),
+        }
+        if self.parent_id:
+            otlp_span['parentSpanId'] = self.parent_id
+        if self.error:
+            otlp_span['status'] = {'code': STATUS_CODE_ERROR, 'message': self.error}
+
+        return otlp_span
+
+
+def to_otlp_attributes(attributes: dict) -> list[dict]:
+    otlp_attributes = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            otlp_value = {'boolValue': value}
+        elif isinstance(value, int):
+            otlp_value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            otlp_value = {'doubleValue': value}
+        else:
+            otlp_value = {'stringValue': str(value)}
+        otlp_attributes.append({'key': key, 'value': otlp_value})
+
+    return otlp_attributes
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class OTLPFileExporter:
+    """Appends each batch of spans to a file, as a line of OTLP/JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'w'):
+            pass
+
+    def export(self, request: dict) -> None:
+        with open(self.path, 'a') as trace_file:
+            trace_file.write(json.dumps(request, separators=(',', ':')) + '\n')
+
+
+class OTLPHTTPExporter:
+    """Posts each batch of spans to an OTLP/HTTP collector, as JSON."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.failed = False
+
+    def export(self, request: dict) -> None:
+        http_request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(request).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=10):
+                pass
+        except (urllib.error.URLError, OSError) as e:
+            # Tracing never stops a run, so only the first failure is reported
+            if not self.failed:
+                print(f'WARNING: Trace Export Failed: {e}', file=sys.stderr)
+            self.failed = True
+
+
+class Tracer:
+    """
+    Collects a run's spans, exporting them in batches as they finish.
+
+    Spans started outside of another span belong to their region's span in
+    the current phase. Region spans are never started or ended themselves,
+    they cover their spans and are exported when the phase ends.
+
+    Worker processes trace without a trace ID or exporters, and pass their
+    finished spans back to be adopted by the parent's tracer.
+    """
+
+    def __init__(self, exporters: list, trace_id: Optional[str] = None):
+        self.exporters = exporters
+        self.trace_id = trace_id
+        self.run_span: Optional[Span] = None
+        self.phase_span: Optional[Span] = None
+        self._region_spans: dict[str, Span] = {}
+        self._finished: list[Span] = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def get_parent(self, region: Optional[str] = None) -> Optional[Span]:
+        if parent := _current_span.get():
+            return parent
+
+        phase_span = self.phase_span
+        if not phase_span or not region:
+            return phase_span or self.run_span
+
+        with self._lock:
+            if (region_span := self._region_spans.get(region)) is None:
+                region_span = self._region_spans[region] = Span(
+                    region,
+                    new_span_id(),
+                    phase_span.span_id,
+                    time.time_ns(),
+                    attributes={'cloud.region': region},
+                )
+
+        return region_span
+
+    def start_span(
+        self,
+        name: str,
+        region: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        **attributes,
+    ) -> Span:
+        parent = self.get_parent(region)
+        return Span(
+            name,
+            new_span_id(),
+            parent.span_id if parent else None,
+            time.time_ns(),
+            kind=kind,
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self.add_spans([span])
+
+    def add_spans(self, spans: list[Span]) -> None:
+        with self._lock:
+            for span in spans:
+                # Region spans cover every span they're the parent of
+                for region_span in self._region_spans.values():
+                    if span.parent_id == region_span.span_id:
+                        region_span.start_ns = min(region_span.start_ns, span.start_ns)
+                        region_span.end_ns = max(region_span.end_ns, span.end_ns)
+                        break
+
+            self._finished.extend(spans)
+            if len(self._finished) < EXPORT_BATCH_SIZE:
+                return
+
+            batch, self._finished = self._finished, []
+
+        self.export(batch)
+
+    def adopt_spans(self, spans: list[Span]) -> None:
+        """
+        Add the spans finished by a worker process to the run's trace.
+
+        Args:
+            spans (list[Span]): The worker's spans.
+
+        Returns:
+            None
+
+        """
+        for span in spans:
+            if span.parent_id is None:
+                parent = self.get_parent(span.attributes.get('cloud.region'))
+                span.parent_id = parent.span_id if parent else None
+
+        self.add_spans(spans)
+
+    def drain(self) -> list[Span]:
+        with self._lock:
+            spans, self._finished = self._finished, []
+
+        return spans
+
+    def export(self, spans: list[Span]) -> None:
+        if not spans or not self.exporters:
+            return
+
+        request = {
+            'resourceSpans': [
+                {
+                    'resource': {
+                        'attributes': to_otlp_attributes(
+                            {'service.name': 'aws-apocalypse'}
+                        )
+                    },
+                    'scopeSpans': [
+                        {
+                            'scope': {'name': 'aws-apocalypse'},
+                            'spans': [span.to_otlp(self.trace_id) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+        with self._export_lock:
+            for exporter in self.exporters:
+                exporter.export(request)
+
+    def start_phase(self, name: str) -> Span:
+        self.phase_span = self.start_span(name)
+        return self.phase_span
+
+    def end_phase(self) -> None:
+        with self._lock:
+            region_spans = list(self._region_spans.values())
+            self._region_spans.clear()
+
+        if self.phase_span:
+            self.end_span(self.phase_span)
+        self.phase_span = None
+
+        # Regions with nothing in them never got an end
+        self.add_spans([span for span in region_spans if span.end_ns])
+
+    def flush(self) -> None:
+        self.export(self.drain())
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextlib.contextmanager
+def span(name: str, region: Optional[str] = None, **attributes):
+    """
+    Trace a block, i.e. a wait, as a span of whatever contains it.
+
+    Does nothing unless tracing is configured.
+
+    Args:
+        name (str): The span name.
+        region (Optional[str]): The region, if the block is outside of any
+            other span.
+        **attributes: The span's attributes.
+
+    Yields:
+        Optional[Span]: The span, to add attributes to, or None.
+
+    """
+    if not (tracer := _tracer):
+        yield None
+        return
+
+    current_span = tracer.start_span(name, region, **attributes)
+    token = _current_span.set(current_span)
+    try:
+        yield current_span
+    except BaseException as e:
+        current_span.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end_span(current_span)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    # Run phases (i.e. retrieve_data) are the parents of their region spans
+    if not (tracer := _tracer):
+        yield
+        return
+
+    tracer.start_phase(name)
+    try:
+        yield
+    finally:
+        tracer.end_phase()
+
+
+def record_registry_outcome(current_span: Span, kind: str, args: tuple, result) -> None:
+    # Query functions return ARNs, terminate functions a DeleteResponse
+    if kind == 'query':
+        current_span.attributes['apocalypse.arn_count'] = len(result or [])
+        current_span.attributes['apocalypse.outcome'] = 'ok'
+        return
+
+    current_span.attributes['apocalypse.arn_count'] = len(args[2])
+    if result is None:
+        current_span.attributes['apocalypse.outcome'] = 'ok'
+        return
+
+    failed = len(result.outcomes) - len(result.successful)
+    current_span.attributes['apocalypse.deleted'] = len(result.successful)
+    current_span.attributes['apocalypse.failed'] = failed
+    current_span.attributes['apocalypse.outcome'] = (
+        'failed' if failed and not result.successful else 'partial' if failed else 'ok'
+    )
+
+
+def trace_registry_function(kind: str, resource_type: str, function: Callable):
+    """
+    Wrap a registry function so each invocation is traced as a span.
+
+    Spans are tagged with the function's region, resource type, ARN count and
+    outcome.
+
+    Args:
+        kind (str): 'query' or 'terminate'.
+        resource_type (str): The function's resource type.
+        function (Callable): The registry function, sync or async.
+
+    Returns:
+        Callable: The wrapped function.
+
+    """
+
+    def get_span(args: tuple):
+        region = args[1] if len(args) > 1 else None
+        return span(
+            f'{kind} {resource_type}',
+            region,
+            **{
+                'apocalypse.kind': kind,
+                'apocalypse.resource_type': resource_type,
+                'cloud.region': region,
+            },
+        )
+
+    if iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if not _tracer:
+                return await function(*args, **kwargs)
+
+            with get_span(args) as current_span:
+                result = await function(*args, **kwargs)
+                record_registry_outcome(current_span, kind, args, result)
+                return result
+
+    else:
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _tracer:
+                return function(*args, **kwargs)
+
+            with get_span(args) as current_span:
+                result = function(*args, **kwargs)
+                record_registry_outcome(current_span, kind, args, result)
+                return result
+
+    return wrapper
+
+
+def register_api_spans(client, is_async: bool) -> None:
+    """
+    Trace every call a client makes as a span of the function making it.
+
+    Args:
+        client: A boto3 or aiobotocore client.
+        is_async (bool): Whether it's an aiobotocore client.
+
+    Returns:
+        None
+
+    """
+    region_name = client.meta.region_name
+
+    def start(model, context, **kwargs):
+        if tracer := _tracer:
+            context['trace_span'] = tracer.start_span(
+                get_api_call(client, model.name),
+                region_name,
+                SPAN_KIND_CLIENT,
+                **{
+                    'rpc.system': 'aws-api',
+                    'rpc.service': client.meta.service_model.service_name,
+                    'rpc.method': model.name,
+                    'cloud.region': region_name or 'default',
+                },
+            )
+
+    def finish(context, http_response=None, parsed=None, exception=None, **kwargs):
+        if not (current_span := context.pop('trace_span', None)) or not _tracer:
+            return
+
+        if http_response is not None:
+            current_span.attributes['http.status_code'] = http_response.status_code
+        response_metadata = (parsed or {}).get('ResponseMetadata', {})
+        if retries := response_metadata.get('RetryAttempts'):
+            current_span.attributes['aws.retries'] = retries
+        if error_code := get_error_code(parsed) or (
+            type(exception).__name__ if exception else None
+        ):
+            current_span.error = error_code
+
+        _tracer.end_span(current_span)
+
+    # In front of the rate and concurrency limits, so the span includes them
+    client.meta.events.register_first('before-call', start)
+    client.meta.events.register('after-call', finish)
+    client.meta.events.register('after-call-error', finish)
+
+
+def install_tracing() -> Optional[Tracer]:
+    """
+    Start tracing the run, if a trace file or endpoint is configured.
+
+    The run gets a new trace ID, and its spans are exported to the trace file
+    and/or endpoint. Worker processes use install_worker_tracing instead, and
+    the parent adopts their spans.
+
+    Returns:
+        Optional[Tracer]: The tracer, or None if tracing isn't configured.
+
+    """
+    global _tracer
+
+    if not config.TRACE_FILE and not config.TRACE_ENDPOINT:
+        return None
+
+    exporters = []
+    if config.TRACE_FILE:
+        exporters.append(OTLPFileExporter(config.TRACE_FILE))
+    if config.TRACE_ENDPOINT:
+        exporters.append(OTLPHTTPExporter(config.TRACE_ENDPOINT))
+
+    _tracer = Tracer(exporters, os.urandom(16).hex())
+    register_client_hook(register_api_spans)
+    return _tracer
+
+
+def install_worker_tracing() -> None:
+    global _tracer
+
+    if config.TRACE_FILE or config.TRACE_ENDPOINT:
+        _tracer = Tracer([])
+        register_client_hook(register_api_spans)
+
+
+def start_run_span(**attributes) -> None:
+    if tracer := _tracer:
+        tracer.run_span = tracer.start_span('run', **attributes)
+
+
+def finish_tracing() -> None:
+    """
+    End the run's span and export whatever hasn't been exported yet.
+
+    Returns:
+        None
+
+    """
+    global _tracer
+
+    if not (tracer := _tracer):
+        return
+
+    tracer.end_phase()
+    if tracer.run_span:
+        tracer.end_span(tracer.run_span)
+    tracer.flush()
+    _tracer = None
+
+
+def drain_spans() -> list[Span]:
+    # Takes the spans finished so far, for a worker to pass back
+    return _tracer.drain() if _tracer else []
+
+
+def adopt_spans(spans: list[Span]) -> None:
+    if _tracer and spans:
+        _tracer.adopt_spans(spans)
@@ -1,13 +1,20 @@
 import json
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, Optional
 
 from rich.console import Console
 from rich.table import Table
-from rich.text import Text
 
 from config import config
-from registry import query_registry
+from engine.scan import iter_scan_results, merge_scan_results, plan_work_units
+from utils.resource import ResourceRef
+from view.sinks import (
+    NDJSONSink,
+    ResourceSink,
+    RichLogSink,
+    get_configured_sinks,
+    iter_sink_results,
+)
 
 
 class OutputHandler(ABC):
@@ -19,6 +26,17 @@ class OutputHandler(ABC):
             else:
                 raise ValueError('Invalid Type: Console Expected')
 
+    def get_sinks(self) -> list[ResourceSink]:
+        # The sinks results stream to as each work unit completes
+        return get_configured_sinks()
+
+    def iter_results(
+        self, work_units: list[tuple[str, str]]
+    ) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+        return iter_sink_results(
+            iter_scan_results(self.session, work_units), self.get_sinks()
+        )
+
     @abstractmethod
     def retrieve_data(
         self, resource_types: list[str], regions: list[str]
@@ -30,26 +48,41 @@ class JSONOutputHandler(OutputHandler):
     def retrieve_data(
         self, resource_types: list[str], regions: list[str] | set[str]
     ) -> dict[str, dict[str, dict]]:
-        resource_output: dict[str, dict[str, dict]] = {}
-
-        for resource_type in resource_types:
-            delete_function = query_registry[resource_type]
-            for region in regions:
-                if (
-                    region == 'global' and resource_type not in config.GLOBAL_RESOURCES
-                ) or (region != 'global' and resource_type in config.GLOBAL_RESOURCES):
-                    continue
-
-                if results := delete_function(self.session, region):
-                    resource_output.setdefault(region, {}).update(
-                        {resource_type: results}
-                    )
-
-        print(json.dumps(resource_output))
+        work_units = plan_work_units(self.session, resource_types, regions)
+        results = {
+            (region, resource_type): resource_arns
+            for region, resource_type, resource_arns in self.iter_results(work_units)
+        }
+        resource_output = merge_scan_results(results, work_units)
+
+        # ResourceRefs are written as their ARNs
+        print(json.dumps(resource_output, default=str))
         return resource_output
 
 
+class NDJSONOutputHandler(OutputHandler):
+    def get_sinks(self) -> list[ResourceSink]:
+        return [NDJSONSink(), *super().get_sinks()]
+
+    def retrieve_data(
+        self, resource_types: list[str], regions: list[str] | set[str]
+    ) -> dict[str, dict[str, dict]]:
+        work_units = plan_work_units(self.session, resource_types, regions)
+        results: dict[tuple[str, str], list[ResourceRef]] = {}
+
+        # Each resource is printed as soon as its query completes, and results
+        # are only kept when they're needed for termination
+        for region, resource_type, resource_arns in self.iter_results(work_units):
+            if config.COMMAND == 'aws':
+                results[(region, resource_type)] = resource_arns
+
+        return merge_scan_results(results, work_units)
+
+
 class RichOutputHandler(OutputHandler):
+    def get_sinks(self) -> list[ResourceSink]:
+        return [RichLogSink(self.console), *super().get_sinks()]
+
     def display_rich_resource_table(self, resources: dict) -> None:
         table = Table()
         table.add_column('Region')
@@ -59,42 +92,28 @@ class RichOutputHandler(OutputHandler):
         for region, regional_resources in resources.items():
             for resource_type, resource_arns in regional_resources.items():
                 for arn in resource_arns:
-                    table.add_row(region, resource_type, arn)
+                    table.add_row(region, resource_type, str(arn))
 
         self.console.print(table)
 
     def retrieve_data(
         self, resource_types: list[str], regions: list[str] | set[str]
     ) -> dict[str, dict[str, dict]]:
-        resource_output: dict[str, dict[str, dict]] = {}
-
-        for resource_type in resource_types:
-            retrieve_function = query_registry[resource_type]
-            for region in regions:
-                if (
-                    region == 'global' and resource_type not in config.GLOBAL_RESOURCES
-                ) or (region != 'global' and resource_type in config.GLOBAL_RESOURCES):
-                    continue
-
-                with self.console.status(
-                    f'[bold green]Searching {region} For {resource_type}',
-                    spinner='aesthetic',
-                ):
-                    if results := retrieve_function(self.session, region):
-                        resource_output.setdefault(region, {}).update(
-                            {resource_type: results}
-                        )
-
-                    self.console.print(
-                        Text.assemble(
-                            (' INFO ', 'bold grey35 on green'),
-                            ' ',
-                            (
-                                f'{resource_type} | Found {len(results or [])} resources in {region}',
-                                'green',
-                            ),
-                        )
-                    )
+        work_units = plan_work_units(self.session, resource_types, regions)
+        results: dict[tuple[str, str], list[ResourceRef]] = {}
+
+        with self.console.status(
+            f'[bold green]Searching {len(work_units)} Region/Resource Type Pairs',
+            spinner='aesthetic',
+        ) as status:
+            for region, resource_type, resource_arns in self.iter_results(work_units):
+                results[(region, resource_type)] = resource_arns
+                status.update(
+                    f'[bold green]Searching {len(work_units)} Region/Resource Type Pairs'
+                    f' ({len(results)} Complete)'
+                )
+
+        resource_output = merge_scan_results(results, work_units)
 
         if resource_output:
             self.console.print('\n# [yellow] Found AWS Resources\n')
@@ -0,0 +1,138 @@
+import csv
+import gzip
+import json
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from rich.console import Console
+from rich.text import Text
+
+from config import config
+from utils.resource import ResourceRef
+
+
+class ResourceSink(ABC):
+    """Receives each work unit's resources as soon as its query completes."""
+
+    @abstractmethod
+    def write(
+        self, region: str, resource_type: str, resource_arns: list[ResourceRef]
+    ) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class NDJSONSink(ResourceSink):
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        # Looked up when created, so redirecting stdout is respected
+        self.stream = stream or sys.stdout
+
+    def write(
+        self, region: str, resource_type: str, resource_arns: list[ResourceRef]
+    ) -> None:
+        for arn in resource_arns:
+            self.stream.write(
+                json.dumps(
+                    {'region': region, 'resource_type': resource_type, 'arn': str(arn)}
+                )
+                + '\n'
+            )
+
+        self.stream.flush()
+
+
+class RichLogSink(ResourceSink):
+    def __init__(self, console: Console) -> None:
+        self.console = console
+
+    def write(
+        self, region: str, resource_type: str, resource_arns: list[ResourceRef]
+    ) -> None:
+        self.console.print(
+            Text.assemble(
+                (' INFO ', 'bold grey35 on green'),
+                ' ',
+                (
+                    f'{resource_type} | Found {len(resource_arns)} resources in {region}',
+                    'green',
+                ),
+            )
+        )
+
+
+class PartitionedFileSink(ResourceSink):
+    """
+    Writes a gzip compressed file per region and resource type.
+
+    Files are laid out as <directory>/<region>/<resource_type>.<format>.gz and
+    each is written and closed as soon as its work unit completes.
+    """
+
+    def __init__(self, directory: Path, file_format: str = 'ndjson') -> None:
+        if file_format not in ('ndjson', 'csv'):
+            raise ValueError(f'Invalid Output File Format: {file_format}')
+
+        self.directory = directory
+        self.file_format = file_format
+
+    def get_path(self, region: str, resource_type: str) -> Path:
+        file_name = resource_type.replace('::', '-').replace(':', '-')
+        return self.directory / region / f'{file_name}.{self.file_format}.gz'
+
+    def write(
+        self, region: str, resource_type: str, resource_arns: list[ResourceRef]
+    ) -> None:
+        if not resource_arns:
+            return
+
+        path = self.get_path(region, resource_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with gzip.open(path, 'wt', newline='') as output_file:
+            if self.file_format == 'csv':
+                writer = csv.writer(output_file)
+                writer.writerow(['region', 'resource_type', 'arn'])
+                writer.writerows(
+                    (region, resource_type, str(arn)) for arn in resource_arns
+                )
+            else:
+                NDJSONSink(output_file).write(region, resource_type, resource_arns)
+
+
+def get_configured_sinks() -> list[ResourceSink]:
+    if not config.OUTPUT_DIR:
+        return []
+
+    return [
+        PartitionedFileSink(
+            Path(config.OUTPUT_DIR).expanduser(), config.OUTPUT_DIR_FORMAT
+        )
+    ]
+
+
+def iter_sink_results(
+    results: Iterator[tuple[str, str, list[ResourceRef]]], sinks: list[ResourceSink]
+) -> Iterator[tuple[str, str, list[ResourceRef]]]:
+    """
+    Pass each scan result to the sinks before yielding it on.
+
+    Args:
+        results (Iterator): The (region, resource_type, arns) scan results.
+        sinks (list[ResourceSink]): The sinks to write to.
+
+    Yields:
+        tuple[str, str, list[ResourceRef]]: Each scan result, unchanged.
+
+    """
+    try:
+        for region, resource_type, resource_arns in results:
+            for sink in sinks:
+                sink.write(region, resource_type, resource_arns)
+            yield region, resource_type, resource_arns
+    finally:
+        for sink in sinks:
+            sink.close()